@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CompetitionApplicationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.competition_application"
+
+    def ready(self):
+        import apps.competition_application.signals  # 注册信号
+        import apps.competition_application.hot_queries  # 登记热点查询（explain_hot_queries）
@@ -0,0 +1,38 @@
+# apps/competition_application/caching.py
+
+from django.core.cache import cache
+from django.db import transaction
+
+# 按学生或教师划分的缓存。每个学生、教师有一个版本号，缓存键中带版本号；
+# 申请写入提交后递增对应的版本号，写入前按旧数据算出的值不会再被读到
+VERSION_KEY = 'applications:version:{}:{}'
+ENTRY_KEY = 'applications:{}:{}:{}:{}'
+ENTRY_TTL = 30 * 60
+
+STUDENT = 'student'
+TEACHER = 'teacher'
+
+
+def owner_version(scope, owner):
+    return cache.get(VERSION_KEY.format(scope, owner), 0)
+
+
+def bump_owner_version(scope, owner):
+    """事务提交后递增学生或教师的缓存版本号"""
+    version_key = VERSION_KEY.format(scope, owner)
+
+    def bump():
+        cache.add(version_key, 0, None)
+        cache.incr(version_key)
+
+    transaction.on_commit(bump)
+
+
+def cached_for_owner(scope, owner, name, compute):
+    """返回学生或教师名下的缓存值 name，不存在时调用 compute() 计算"""
+    key = ENTRY_KEY.format(name, scope, owner, owner_version(scope, owner))
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, ENTRY_TTL)
+    return value
@@ -0,0 +1,85 @@
+# apps/competition_application/counters.py
+
+import logging
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+
+from apps.competitions.models import Competition
+
+from .models import CompetitionApplication
+
+logger = logging.getLogger(__name__)
+
+# 单独计数的申请状态 -> 竞赛上的计数字段；application_count 为全部申请数
+STATUS_COUNTERS = {
+    'pending': 'pending_count',
+    'approved': 'approved_count',
+}
+
+
+def apply_transition(competition_id, old_status, new_status):
+    """
+    按一次状态变化增减竞赛的申请计数，old_status 为 None 表示新建，new_status 为 None 表示删除。
+    使用一条 F() 表达式的 UPDATE，应与状态变化在同一事务中执行。
+    """
+    apply_transitions([competition_id], old_status, new_status)
+
+
+def apply_transitions(competition_ids, old_status, new_status):
+    """
+    批量版本：competition_ids 中每一项对应一条发生了同样状态变化的申请，可以重复。
+    变化条数相同的竞赛合并为一条 UPDATE，语句数只与不同的条数有关。
+    """
+    deltas = defaultdict(int)
+    if old_status is None:
+        deltas['application_count'] += 1
+    if new_status is None:
+        deltas['application_count'] -= 1
+    if old_status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[old_status]] -= 1
+    if new_status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[new_status]] += 1
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    by_times = defaultdict(list)
+    for competition_id, times in Counter(competition_ids).items():
+        by_times[times].append(competition_id)
+    for times, ids in by_times.items():
+        Competition.objects.filter(pk__in=ids).update(
+            **{field: F(field) + delta * times for field, delta in deltas.items()}
+        )
+
+
+def reconcile_counters(batch_size=1000):
+    """
+    按申请表重新统计全部竞赛的计数，只写回有偏差的竞赛，返回修正的竞赛数。
+    统计为一次 GROUP BY，写回为 bulk_update；运行期间并发的增减可能被覆盖，
+    计数只用于展示和排序，再运行一次即可修正。
+    """
+    counted = {
+        row['competition_id']: row
+        for row in CompetitionApplication.objects.order_by().values('competition_id').annotate(
+            application_count=Count('id'),
+            **{
+                field: Count('id', filter=Q(application_status=status))
+                for status, field in STATUS_COUNTERS.items()
+            },
+        )
+    }
+    drifted = []
+    for competition in Competition.objects.only('id', *Competition.COUNTER_FIELDS).iterator():
+        row = counted.get(competition.id, {})
+        changed = False
+        for field in Competition.COUNTER_FIELDS:
+            expected = row.get(field, 0)
+            if getattr(competition, field) != expected:
+                setattr(competition, field, expected)
+                changed = True
+        if changed:
+            drifted.append(competition)
+    if drifted:
+        Competition.objects.bulk_update(drifted, Competition.COUNTER_FIELDS, batch_size=batch_size)
+        logger.info(f"已修正 {len(drifted)} 个竞赛的申请计数")
+    return len(drifted)
@@ -0,0 +1,139 @@
+# apps/competition_application/events.py
+
+import logging
+
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import ApplicationEvent, CompetitionApplication
+
+logger = logging.getLogger(__name__)
+
+# ApplicationEvent.kind
+APPLICATION = 'application'
+PROCESS = 'process'
+REIMBURSEMENT = 'reimbursement'
+
+REVIEWED_STATUSES = ('approved', 'rejected')
+
+
+def record(application_id, kind, old_status, new_status):
+    """记录一次状态变化，old_status 为 None 表示新建。应与变化在同一事务中调用"""
+    record_many([application_id], kind, old_status, new_status)
+
+
+def record_many(application_ids, kind, old_status, new_status):
+    """批量版本：application_ids 中的申请发生了同样的变化，一条 INSERT 写入"""
+    now = timezone.now()
+    ApplicationEvent.objects.bulk_create([
+        ApplicationEvent(
+            application_id=application_id, kind=kind, old_status=old_status, new_status=new_status, created=now,
+        )
+        for application_id in application_ids
+    ])
+
+
+def timeline_queryset(application_id):
+    return ApplicationEvent.objects.filter(application_id=application_id).order_by('created', 'id')
+
+
+def timeline(application_id):
+    """申请的全部事件，按发生顺序排列；一次 (application, created) 索引上的范围扫描"""
+    return list(timeline_queryset(application_id))
+
+
+def _milestone(event):
+    if event.kind == APPLICATION:
+        if event.old_status is None:
+            return 'submitted'
+        if event.new_status in REVIEWED_STATUSES:
+            return 'reviewed'
+        if event.new_status == 'cancelled':
+            return 'cancelled'
+    elif event.kind == REIMBURSEMENT:
+        if event.old_status is None:
+            return 'reimbursement_submitted'
+        if event.new_status in REVIEWED_STATUSES:
+            return 'reimbursement_reviewed'
+    elif event.kind == PROCESS and event.new_status == 'ended':
+        return 'ended'
+    return None
+
+
+def milestones(events):
+    """
+    时间线中各流程节点最近一次发生的时间：submitted、reviewed、cancelled、
+    reimbursement_submitted、reimbursement_reviewed、ended，未发生的节点不出现
+    """
+    result = {}
+    for event in events:
+        name = _milestone(event)
+        if name is not None:
+            result[name] = event.created
+    return result
+
+
+def review_queryset(since, until=None, teacher_id=None):
+    """
+    [since, until) 内的审核（批准或拒绝）事件，附带 submitted（提交时间），结果为 (提交时间, 审核时间)。
+    审核事件按 (kind, created) 索引扫描，每条的提交时间为 (application, created) 索引上的子查询
+    """
+    reviews = ApplicationEvent.objects.filter(
+        kind=APPLICATION, new_status__in=REVIEWED_STATUSES, created__gte=since,
+    )
+    if until is not None:
+        reviews = reviews.filter(created__lt=until)
+    if teacher_id is not None:
+        reviews = reviews.filter(application__teacher_id=teacher_id)
+    submitted = ApplicationEvent.objects.filter(
+        application=OuterRef('application'), kind=APPLICATION, old_status__isnull=True,
+    ).order_by('created').values('created')[:1]
+    return reviews.annotate(submitted=Subquery(submitted)).values_list('submitted', 'created')
+
+
+def review_durations(since, until=None, teacher_id=None):
+    """[since, until) 内审核的申请从提交到审核的用时列表"""
+    return [
+        created - submitted
+        for submitted, created in review_queryset(since, until, teacher_id)
+        if submitted is not None
+    ]
+
+
+def backfill_events(batch_size=1000):
+    """
+    为还没有任何事件的申请按当前数据补写事件，返回补写的申请数，只用于启用事件表之前的旧数据。
+    提交时间取 submission_time、submit_time，审核、结束时间只能取 update_time，与以前的推断相同
+    """
+    legacy = CompetitionApplication.objects.filter(
+        ~Exists(ApplicationEvent.objects.filter(application=OuterRef('pk'))),
+    ).select_related('reimbursement').order_by('pk')
+    batch = []
+    count = 0
+    for application in legacy.iterator(chunk_size=batch_size):
+        batch.extend(_legacy_events(application))
+        count += 1
+        if len(batch) >= batch_size:
+            ApplicationEvent.objects.bulk_create(batch)
+            batch = []
+    ApplicationEvent.objects.bulk_create(batch)
+    logger.info(f"已为 {count} 条申请补写事件")
+    return count
+
+
+def _legacy_events(application):
+    def event(kind, old_status, new_status, created):
+        return ApplicationEvent(
+            application=application, kind=kind, old_status=old_status, new_status=new_status, created=created,
+        )
+
+    yield event(APPLICATION, None, 'pending', application.submission_time)
+    if application.application_status != 'pending':
+        yield event(APPLICATION, 'pending', application.application_status, application.update_time)
+    reimbursement = getattr(application, 'reimbursement', None)
+    if reimbursement is not None:
+        yield event(REIMBURSEMENT, None, 'pending', reimbursement.submit_time)
+        if reimbursement.status != 'pending':
+            yield event(REIMBURSEMENT, 'pending', reimbursement.status, reimbursement.update_time)
+    if application.process_status == 'ended':
+        yield event(PROCESS, 'ongoing', 'ended', application.update_time)
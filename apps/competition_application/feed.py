@@ -0,0 +1,17 @@
+# apps/competition_application/feed.py
+
+from .caching import STUDENT, cached_for_owner
+from .models import CompetitionApplication
+
+# 计为 “已申请” 的状态：撤销后可以重新申请，不再从推荐中排除
+APPLIED_STATUSES = ('pending', 'approved', 'rejected')
+
+
+def applied_competition_ids(student_id):
+    """学生已申请（未撤销）的竞赛 id 集合，缓存到该学生的申请下次变化为止"""
+    return cached_for_owner(STUDENT, student_id, 'applied', lambda: frozenset(
+        CompetitionApplication.objects.filter(
+            student_id=student_id,
+            application_status__in=APPLIED_STATUSES,
+        ).values_list('competition_id', flat=True)
+    ))
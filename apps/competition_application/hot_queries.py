@@ -0,0 +1,67 @@
+# apps/competition_application/hot_queries.py
+"""
+请求路径上的申请查询，由 explain_hot_queries 命令检查执行计划。
+查询形状与接口相同（同样的列、联表、排序和游标条件），参数为示例值。
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from utils.explain_advisor import hot_query
+
+from . import events, rows
+from .feed import APPLIED_STATUSES
+from .models import CompetitionApplication
+from .pagination import ApplicationCursorPagination
+
+TEACHER_ID = 'T0001'
+STUDENT_ID = 1
+
+
+def _list(**filters):
+    queryset = CompetitionApplication.objects.filter(**filters).select_related(
+        'student', 'competition', 'teacher', 'reimbursement',
+    )
+    return rows.values(queryset, rows.parse_fields(None))
+
+
+def _page(queryset, next_page=False):
+    position = (timezone.now(), 1) if next_page else None
+    return ApplicationCursorPagination().page_queryset(queryset, position)
+
+
+@hot_query('applications.teacher_list')
+def teacher_list():
+    return _page(_list(teacher_id=TEACHER_ID))
+
+
+@hot_query('applications.teacher_list_next_page')
+def teacher_list_next_page():
+    return _page(_list(teacher_id=TEACHER_ID), next_page=True)
+
+
+@hot_query('applications.teacher_pending')
+def teacher_pending():
+    return _page(_list(teacher_id=TEACHER_ID, application_status='pending'))
+
+
+@hot_query('applications.student_list')
+def student_list():
+    return _page(_list(student_id=STUDENT_ID))
+
+
+@hot_query('applications.student_applied_competitions')
+def student_applied_competitions():
+    return CompetitionApplication.objects.filter(
+        student_id=STUDENT_ID, application_status__in=APPLIED_STATUSES,
+    ).values_list('competition_id', flat=True)
+
+
+@hot_query('applications.timeline')
+def timeline():
+    return events.timeline_queryset(1)
+
+
+@hot_query('applications.review_sla')
+def review_sla():
+    return events.review_queryset(timezone.now() - timedelta(days=30), teacher_id=TEACHER_ID)
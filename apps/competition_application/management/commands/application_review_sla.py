@@ -0,0 +1,35 @@
+# apps/competition_application/management/commands/application_review_sla.py
+
+from datetime import timedelta
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...events import review_durations
+
+
+def _hours(duration):
+    return f"{duration.total_seconds() / 3600:.1f} 小时"
+
+
+class Command(BaseCommand):
+    help = '统计最近一段时间内审核的申请从提交到审核的用时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='统计最近多少天内的审核，默认 30')
+        parser.add_argument('--teacher', help='只统计该工号教师的审核')
+
+    def handle(self, *args, **options):
+        if options['days'] <= 0:
+            raise CommandError('天数必须为正数')
+        since = timezone.now() - timedelta(days=options['days'])
+        durations = sorted(review_durations(since, teacher_id=options['teacher']))
+        if not durations:
+            self.stdout.write('该时间段内没有审核记录')
+            return
+        p90 = durations[min(len(durations) - 1, int(len(durations) * 0.9))]
+        self.stdout.write(
+            f"审核 {len(durations)} 条，中位数 {_hours(median(durations))}，"
+            f"90% 分位 {_hours(p90)}，最长 {_hours(durations[-1])}"
+        )
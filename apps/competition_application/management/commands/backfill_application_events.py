@@ -0,0 +1,13 @@
+# apps/competition_application/management/commands/backfill_application_events.py
+
+from django.core.management.base import BaseCommand
+
+from ...events import backfill_events
+
+
+class Command(BaseCommand):
+    help = '为启用事件表之前的申请按当前数据补写状态变化事件，已有事件的申请不处理'
+
+    def handle(self, *args, **options):
+        count = backfill_events()
+        self.stdout.write(f"已为 {count} 条申请补写事件")
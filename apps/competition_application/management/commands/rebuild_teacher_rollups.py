@@ -0,0 +1,13 @@
+# apps/competition_application/management/commands/rebuild_teacher_rollups.py
+
+from django.core.management.base import BaseCommand
+
+from ...rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = '按申请表重建教师工作台的申请汇总'
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(f"已重建 {count} 名教师的申请汇总")
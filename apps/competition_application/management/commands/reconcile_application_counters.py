@@ -0,0 +1,15 @@
+# apps/competition_application/management/commands/reconcile_application_counters.py
+
+from django.core.management.base import BaseCommand
+
+from ...counters import reconcile_counters
+from ...quotas import reconcile_quotas
+
+
+class Command(BaseCommand):
+    help = '按申请表重新统计竞赛的申请计数和已占用名额，修正偏差'
+
+    def handle(self, *args, **options):
+        counters = reconcile_counters()
+        quotas = reconcile_quotas()
+        self.stdout.write(f"已修正申请计数 {counters} 个竞赛，已占用名额 {quotas} 个竞赛")
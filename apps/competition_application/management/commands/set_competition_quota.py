@@ -0,0 +1,29 @@
+# apps/competition_application/management/commands/set_competition_quota.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.competitions.models import Competition
+
+from ...quotas import set_capacity
+
+
+class Command(BaseCommand):
+    help = '设置竞赛的申报名额上限，已占用名额按现有申请重新统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_id', type=int, help='竞赛 id')
+        parser.add_argument('capacity', nargs='?', type=int, help='名额上限，省略时不限名额')
+
+    def handle(self, *args, **options):
+        try:
+            competition = Competition.objects.get(pk=options['competition_id'])
+        except Competition.DoesNotExist:
+            raise CommandError(f"竞赛 {options['competition_id']} 不存在")
+        capacity = options['capacity']
+        if capacity is not None and capacity < 0:
+            raise CommandError('名额上限不能为负数')
+        quota = set_capacity(competition, capacity)
+        if quota is None:
+            self.stdout.write(f"{competition.name}: 不限名额")
+        else:
+            self.stdout.write(f"{competition.name}: 名额 {quota.used}/{quota.capacity}")
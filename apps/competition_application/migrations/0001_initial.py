@@ -0,0 +1,88 @@
+# Generated by Django 4.2 on 2026-10-18 13:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('competitions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('application', '申报状态'), ('process', '流程状态'), ('reimbursement', '报销状态')], max_length=20)),
+                ('old_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('new_status', models.CharField(max_length=20)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': '申请事件',
+                'verbose_name_plural': '申请事件',
+            },
+        ),
+        migrations.CreateModel(
+            name='CompetitionApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('application_status', models.CharField(choices=[('pending', '申报中'), ('approved', '已批准'), ('rejected', '已拒绝'), ('cancelled', '已撤销')], default='pending', max_length=10)),
+                ('contact_info', models.CharField(max_length=15)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('submission_time', models.DateTimeField(auto_now_add=True)),
+                ('update_time', models.DateTimeField(auto_now=True)),
+                ('photo', models.FileField(blank=True, null=True, upload_to='competition_files/')),
+                ('summary', models.FileField(blank=True, null=True, upload_to='competition_files/')),
+                ('certificate', models.FileField(blank=True, null=True, upload_to='competition_files/')),
+                ('process_status', models.CharField(choices=[('ongoing', '进行中'), ('ended', '已结束')], default='ongoing', max_length=20, verbose_name='流程状态')),
+            ],
+            options={
+                'verbose_name': '竞赛申请',
+                'verbose_name_plural': '竞赛申请',
+                'ordering': ['-submission_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CompetitionQuota',
+            fields=[
+                ('competition', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quota', serialize=False, to='competitions.competition')),
+                ('capacity', models.PositiveIntegerField(verbose_name='名额上限')),
+                ('used', models.PositiveIntegerField(default=0, verbose_name='已占用名额')),
+            ],
+            options={
+                'verbose_name': '竞赛申报名额',
+                'verbose_name_plural': '竞赛申报名额',
+            },
+        ),
+        migrations.CreateModel(
+            name='CompetitionReimbursement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registration_fee', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='报名费')),
+                ('transportation_fee', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='交通费')),
+                ('accommodation_fee', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='住宿费')),
+                ('other_fee', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='其他费用')),
+                ('other_fee_description', models.TextField(blank=True, verbose_name='其他费用说明')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='总金额')),
+                ('bank_name', models.CharField(max_length=100, verbose_name='开户银行')),
+                ('bank_account', models.CharField(max_length=50, verbose_name='银行账号')),
+                ('account_name', models.CharField(max_length=50, verbose_name='开户人姓名')),
+                ('invoice', models.FileField(upload_to='reimbursement_files/', verbose_name='发票/票据')),
+                ('status', models.CharField(choices=[('pending', '待审批'), ('approved', '已通过'), ('rejected', '已拒绝')], default='pending', max_length=20)),
+                ('submit_time', models.DateTimeField(auto_now_add=True)),
+                ('update_time', models.DateTimeField(auto_now=True)),
+                ('comment', models.TextField(blank=True, verbose_name='审批意见')),
+            ],
+            options={
+                'verbose_name': '竞赛报销',
+                'verbose_name_plural': '竞赛报销',
+                'ordering': ['-submit_time'],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2 on 2026-10-18 13:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('competition_application', '0001_initial'),
+        ('competitions', '0001_initial'),
+        ('student_center', '0001_initial'),
+        ('teacher_center', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherApplicationRollup',
+            fields=[
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='application_rollup', serialize=False, to='teacher_center.teacherprofile', to_field='teacher_id')),
+                ('pending_count', models.IntegerField(default=0)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('rejected_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('ongoing_count', models.IntegerField(default=0)),
+                ('ended_count', models.IntegerField(default=0)),
+                ('reimbursement_pending_count', models.IntegerField(default=0)),
+                ('reimbursement_approved_count', models.IntegerField(default=0)),
+                ('reimbursement_rejected_count', models.IntegerField(default=0)),
+                ('reimbursement_requested_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('reimbursement_approved_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('update_time', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '教师申请汇总',
+                'verbose_name_plural': '教师申请汇总',
+            },
+        ),
+        migrations.AddField(
+            model_name='competitionreimbursement',
+            name='application',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reimbursement', to='competition_application.competitionapplication'),
+        ),
+        migrations.AddField(
+            model_name='competitionapplication',
+            name='competition',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='competitions.competition'),
+        ),
+        migrations.AddField(
+            model_name='competitionapplication',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='competition_applications', to='student_center.studentprofile'),
+        ),
+        migrations.AddField(
+            model_name='competitionapplication',
+            name='teacher',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='teacher_center.teacherprofile', to_field='teacher_id'),
+        ),
+        migrations.AddField(
+            model_name='applicationevent',
+            name='application',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='competition_application.competitionapplication'),
+        ),
+        migrations.AddIndex(
+            model_name='competitionapplication',
+            index=models.Index(fields=['teacher', '-submission_time', 'id'], name='app_teacher_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competitionapplication',
+            index=models.Index(fields=['student', '-submission_time', 'id'], name='app_student_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competitionapplication',
+            index=models.Index(fields=['teacher', 'application_status', '-submission_time', 'id'], name='app_teacher_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competitionapplication',
+            index=models.Index(fields=['competition', 'application_status'], name='app_competition_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationevent',
+            index=models.Index(fields=['application', 'created'], name='app_event_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationevent',
+            index=models.Index(fields=['kind', 'created'], name='app_event_kind_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 14:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition_application', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicationevent',
+            name='application',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='competition_application.competitionapplication'),
+        ),
+    ]
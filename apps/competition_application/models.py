@@ -3,6 +3,7 @@ from apps.competitions.models import Competition
 from apps.student_center.models import StudentProfile
 from apps.teacher_center.models import TeacherProfile
 from django.db import models
+from django.utils import timezone
 
 class CompetitionApplication(models.Model):
     STATUS_CHOICES = [
@@ -79,6 +80,18 @@ class CompetitionApplication(models.Model):
 
     class Meta:
         ordering = ['-submission_time']
+        indexes = [
+            # 列表按提交时间从新到旧、id 为并列排序键分页（ApplicationCursorPagination）
+            models.Index(fields=['teacher', '-submission_time', 'id'], name='app_teacher_submitted_idx'),
+            models.Index(fields=['student', '-submission_time', 'id'], name='app_student_submitted_idx'),
+            # 教师按状态筛选（待审批队列）以及批量审批的条件更新
+            models.Index(
+                fields=['teacher', 'application_status', '-submission_time', 'id'],
+                name='app_teacher_status_idx',
+            ),
+            # 竞赛的计数、已占用名额按状态统计
+            models.Index(fields=['competition', 'application_status'], name='app_competition_status_idx'),
+        ]
         verbose_name = '竞赛申请'
         verbose_name_plural = '竞赛申请'
 
@@ -162,4 +175,110 @@ class CompetitionReimbursement(models.Model):
     class Meta:
         ordering = ['-submit_time']
         verbose_name = '竞赛报销'
-        verbose_name_plural = '竞赛报销'
\ No newline at end of file
+        verbose_name_plural = '竞赛报销'
+
+
+class CompetitionQuota(models.Model):
+    """
+    竞赛申报名额。没有名额记录的竞赛不限人数。
+    used 为已占用的名额（申报中和已批准的申请），只通过 quotas 模块中的条件更新修改
+    """
+    competition = models.OneToOneField(
+        Competition,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='quota'
+    )
+    capacity = models.PositiveIntegerField(verbose_name='名额上限')
+    used = models.PositiveIntegerField(default=0, verbose_name='已占用名额')
+
+    def __str__(self):
+        return f"{self.competition.name} - {self.used}/{self.capacity}"
+
+    @property
+    def remaining(self):
+        return max(self.capacity - self.used, 0)
+
+    class Meta:
+        verbose_name = '竞赛申报名额'
+        verbose_name_plural = '竞赛申报名额'
+
+
+class TeacherApplicationRollup(models.Model):
+    """
+    教师名下申请的汇总，教师工作台只读这一行。
+    只通过 rollups 模块中的 F() 增减修改，与状态变化在同一事务中；
+    rebuild_teacher_rollups 命令按申请表用一次 GROUP BY 重建
+    """
+    teacher = models.OneToOneField(
+        TeacherProfile,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        to_field='teacher_id',
+        related_name='application_rollup'
+    )
+    # 按申报状态
+    pending_count = models.IntegerField(default=0)
+    approved_count = models.IntegerField(default=0)
+    rejected_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    # 按流程状态
+    ongoing_count = models.IntegerField(default=0)
+    ended_count = models.IntegerField(default=0)
+    # 按报销状态，以及报销申请总金额和已通过的金额
+    reimbursement_pending_count = models.IntegerField(default=0)
+    reimbursement_approved_count = models.IntegerField(default=0)
+    reimbursement_rejected_count = models.IntegerField(default=0)
+    reimbursement_requested_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reimbursement_approved_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    update_time = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.teacher_id} 申请汇总"
+
+    class Meta:
+        verbose_name = '教师申请汇总'
+        verbose_name_plural = '教师申请汇总'
+
+
+class ApplicationEvent(models.Model):
+    """
+    申请的状态变化记录，只追加、不修改、不删除。由 events 模块在状态变化的同一事务中写入，
+    时间线、流程 PDF、审核时效都从这里读取，不再根据申请上会变化的 update_time 推断。
+    old_status 为 None 表示新建（提交申请、提交报销）。
+    application 不建外键约束、删除申请时不级联：申请删除后事件保留，application_id 仍是原申请的 id
+    """
+    KIND_CHOICES = [
+        ('application', '申报状态'),
+        ('process', '流程状态'),
+        ('reimbursement', '报销状态'),
+    ]
+
+    application = models.ForeignKey(
+        CompetitionApplication,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='events'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    old_status = models.CharField(max_length=20, null=True, blank=True)
+    new_status = models.CharField(max_length=20)
+    created = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.application_id} {self.kind}: {self.old_status} -> {self.new_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('申请事件只能追加，不能修改')
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # 单个申请的时间线：一次按 (application, created) 的范围扫描
+            models.Index(fields=['application', 'created'], name='app_event_timeline_idx'),
+            # 审核时效：按时间段扫描某一类变化
+            models.Index(fields=['kind', 'created'], name='app_event_kind_created_idx'),
+        ]
+        verbose_name = '申请事件'
+        verbose_name_plural = '申请事件'
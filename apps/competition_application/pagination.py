@@ -0,0 +1,34 @@
+# apps/competition_application/pagination.py
+
+from utils.pagination import KeysetPagination
+
+
+class ApplicationCursorPagination(KeysetPagination):
+    """
+    申请列表分页：按提交时间从新到旧，id 作为并列时的唯一排序键。
+    带 with_total=1 时附带申请总数，由视图的 get_approximate_total 提供，
+    总数按学生或教师缓存，可能略滞后于刚提交的写入。
+    """
+    ordering = ('-submission_time', 'id')
+    page_size = 20
+    max_page_size = 100
+    total_query_param = 'with_total'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        page = super().paginate_queryset(queryset, request, view)
+        if (page is not None and request.query_params.get(self.total_query_param)
+                and hasattr(view, 'get_approximate_total')):
+            self.total = view.get_approximate_total(queryset)
+        return page
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.total is not None:
+            response.data['total'] = self.total
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['total'] = {'type': 'integer', 'nullable': True}
+        return schema
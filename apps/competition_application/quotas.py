@@ -0,0 +1,90 @@
+# apps/competition_application/quotas.py
+
+import logging
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, F, When
+
+from .models import CompetitionApplication, CompetitionQuota
+
+logger = logging.getLogger(__name__)
+
+# 占用名额的申请状态；申请被拒绝、撤销或删除时归还名额
+HOLDING_STATUSES = ('pending', 'approved')
+
+# 名额的占用和归还都是一条带条件的 UPDATE，由数据库在单行上判断并修改，
+# 不先查询再写入，也不锁整张表，并发提交时不会超出名额。
+
+
+def reserve_seat(competition_id):
+    """
+    为竞赛占用一个名额，成功返回 True，名额已满返回 False；竞赛没有名额限制时总是成功。
+    应与创建申请放在同一事务中，申请创建失败时占用随事务回滚。
+    """
+    updated = CompetitionQuota.objects.filter(
+        competition_id=competition_id,
+        used__lt=F('capacity'),
+    ).update(used=F('used') + 1)
+    if updated:
+        return True
+    # 没有更新到行：要么名额已满，要么该竞赛不限名额
+    return not CompetitionQuota.objects.filter(competition_id=competition_id).exists()
+
+
+def release_seat(competition_id):
+    """归还一个名额，不会减到 0 以下"""
+    CompetitionQuota.objects.filter(
+        competition_id=competition_id,
+        used__gt=0,
+    ).update(used=F('used') - 1)
+
+
+def release_seats(competition_ids):
+    """批量归还名额，competition_ids 中每一项归还一个，可以重复；不会减到 0 以下"""
+    by_times = defaultdict(list)
+    for competition_id, times in Counter(competition_ids).items():
+        by_times[times].append(competition_id)
+    for times, ids in by_times.items():
+        CompetitionQuota.objects.filter(competition_id__in=ids, used__gt=0).update(
+            used=Case(When(used__gte=times, then=F('used') - times), default=0)
+        )
+
+
+def set_capacity(competition, capacity):
+    """
+    设置竞赛的名额上限，capacity 为 None 时取消限制。
+    已占用的名额按当前申请重新统计，调低上限不会影响已提交的申请。
+    """
+    if capacity is None:
+        CompetitionQuota.objects.filter(competition=competition).delete()
+        return None
+    used = competition.applications.filter(application_status__in=HOLDING_STATUSES).count()
+    quota, _ = CompetitionQuota.objects.update_or_create(
+        competition=competition,
+        defaults={'capacity': capacity, 'used': used},
+    )
+    logger.info(f"竞赛 {competition.pk} 名额设置为 {capacity}，已占用 {used}")
+    return quota
+
+
+def reconcile_quotas():
+    """
+    按申请表重新统计各竞赛已占用的名额，返回修正的记录数。
+    先读名额再统计申请，写回时以读到的 used 为条件，
+    期间有并发提交或归还的记录保持不变，不会因修正而超出名额。
+    """
+    quotas = list(CompetitionQuota.objects.values_list('competition_id', 'used'))
+    holding = dict(
+        CompetitionApplication.objects.filter(application_status__in=HOLDING_STATUSES)
+        .order_by().values_list('competition_id').annotate(used=Count('id'))
+    )
+    fixed = 0
+    for competition_id, used in quotas:
+        expected = holding.get(competition_id, 0)
+        if used != expected:
+            fixed += CompetitionQuota.objects.filter(
+                competition_id=competition_id, used=used,
+            ).update(used=expected)
+    if fixed:
+        logger.info(f"已修正 {fixed} 个竞赛的已占用名额")
+    return fixed
@@ -0,0 +1,171 @@
+# apps/competition_application/rollups.py
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CompetitionApplication, TeacherApplicationRollup
+
+logger = logging.getLogger(__name__)
+
+# 状态 -> 汇总表中的计数字段
+APPLICATION_STATUS_FIELDS = {
+    'pending': 'pending_count',
+    'approved': 'approved_count',
+    'rejected': 'rejected_count',
+    'cancelled': 'cancelled_count',
+}
+PROCESS_STATUS_FIELDS = {
+    'ongoing': 'ongoing_count',
+    'ended': 'ended_count',
+}
+REIMBURSEMENT_STATUS_FIELDS = {
+    'pending': 'reimbursement_pending_count',
+    'approved': 'reimbursement_approved_count',
+    'rejected': 'reimbursement_rejected_count',
+}
+AMOUNT_FIELDS = ('reimbursement_requested_amount', 'reimbursement_approved_amount')
+
+ROLLUP_FIELDS = (
+    *APPLICATION_STATUS_FIELDS.values(),
+    *PROCESS_STATUS_FIELDS.values(),
+    *REIMBURSEMENT_STATUS_FIELDS.values(),
+    *AMOUNT_FIELDS,
+)
+
+
+def _move(deltas, fields, old, new, amount=1):
+    if old in fields:
+        deltas[fields[old]] -= amount
+    if new in fields:
+        deltas[fields[new]] += amount
+
+
+def _apply(teacher_id, deltas):
+    """一条 F() 表达式的 UPDATE；教师还没有汇总行时先创建"""
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    changes['update_time'] = timezone.now()
+    rollups = TeacherApplicationRollup.objects.filter(teacher_id=teacher_id)
+    if not rollups.update(**changes):
+        TeacherApplicationRollup.objects.get_or_create(teacher_id=teacher_id)
+        rollups.update(**changes)
+
+
+# 以下函数的 old 为 None 表示新建，new 为 None 表示删除，应与变化在同一事务中调用
+
+def apply_application_transition(application, old_status, new_status):
+    """申报状态变化；新建、删除时流程状态的计数一并增减"""
+    apply_application_transitions([application], old_status, new_status)
+
+
+def apply_application_transitions(applications, old_status, new_status):
+    """批量版本：applications 中的申请发生了同样的状态变化，按教师合并为每名教师一条 UPDATE"""
+    by_teacher = defaultdict(list)
+    for application in applications:
+        by_teacher[application.teacher_id].append(application)
+    for teacher_id, group in by_teacher.items():
+        deltas = defaultdict(int)
+        _move(deltas, APPLICATION_STATUS_FIELDS, old_status, new_status, amount=len(group))
+        for application in group:
+            if old_status is None:
+                deltas[PROCESS_STATUS_FIELDS[application.process_status]] += 1
+            if new_status is None:
+                deltas[PROCESS_STATUS_FIELDS[application.process_status]] -= 1
+        _apply(teacher_id, deltas)
+
+
+def apply_process_transition(application, old_status, new_status):
+    deltas = defaultdict(int)
+    _move(deltas, PROCESS_STATUS_FIELDS, old_status, new_status)
+    _apply(application.teacher_id, deltas)
+
+
+def apply_reimbursement_transition(teacher_id, amount, old_status, new_status):
+    deltas = defaultdict(int)
+    _move(deltas, REIMBURSEMENT_STATUS_FIELDS, old_status, new_status)
+    if old_status is None:
+        deltas['reimbursement_requested_amount'] += amount
+    if new_status is None:
+        deltas['reimbursement_requested_amount'] -= amount
+    _move(
+        deltas, {'approved': 'reimbursement_approved_amount'},
+        old_status, new_status, amount=amount,
+    )
+    _apply(teacher_id, deltas)
+
+
+def summary(teacher_id):
+    """教师工作台的汇总数据，读取一行；还没有申请的教师各项为 0"""
+    rollup = TeacherApplicationRollup.objects.filter(teacher_id=teacher_id).first()
+    if rollup is None:
+        rollup = TeacherApplicationRollup(teacher_id=teacher_id, update_time=None)
+    return {
+        'total': sum(getattr(rollup, field) for field in APPLICATION_STATUS_FIELDS.values()),
+        'application_status': {
+            status: getattr(rollup, field) for status, field in APPLICATION_STATUS_FIELDS.items()
+        },
+        'process_status': {
+            status: getattr(rollup, field) for status, field in PROCESS_STATUS_FIELDS.items()
+        },
+        'reimbursement_status': {
+            status: getattr(rollup, field) for status, field in REIMBURSEMENT_STATUS_FIELDS.items()
+        },
+        # 与申请详情中的报销金额一样输出为数字
+        'reimbursement_amount': {
+            'requested': float(rollup.reimbursement_requested_amount),
+            'approved': float(rollup.reimbursement_approved_amount),
+        },
+        'update_time': rollup.update_time,
+    }
+
+
+def _zero_amount():
+    return Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def rebuild_rollups(batch_size=1000):
+    """
+    按申请表重建全部教师的汇总，返回写入的教师数。
+    统计为一次按教师分组的 GROUP BY（左连接报销表），写回为一次批量 upsert，
+    已没有申请的教师的汇总行清零。运行期间并发的增减可能被覆盖，再运行一次即可修正。
+    """
+    aggregates = {
+        **{field: Count('id', filter=Q(application_status=status))
+           for status, field in APPLICATION_STATUS_FIELDS.items()},
+        **{field: Count('id', filter=Q(process_status=status))
+           for status, field in PROCESS_STATUS_FIELDS.items()},
+        **{field: Count('reimbursement', filter=Q(reimbursement__status=status))
+           for status, field in REIMBURSEMENT_STATUS_FIELDS.items()},
+        'reimbursement_requested_amount': Coalesce(Sum('reimbursement__total_amount'), _zero_amount()),
+        'reimbursement_approved_amount': Coalesce(
+            Sum('reimbursement__total_amount', filter=Q(reimbursement__status='approved')), _zero_amount(),
+        ),
+    }
+    rows = CompetitionApplication.objects.order_by().values('teacher_id').annotate(**aggregates)
+    now = timezone.now()
+    rollups = [
+        TeacherApplicationRollup(
+            teacher_id=row['teacher_id'], update_time=now, **{field: row[field] for field in ROLLUP_FIELDS},
+        )
+        for row in rows
+    ]
+    TeacherApplicationRollup.objects.bulk_create(
+        rollups,
+        batch_size=batch_size,
+        update_conflicts=True,
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不指定冲突列
+        unique_fields=['teacher'] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=[*ROLLUP_FIELDS, 'update_time'],
+    )
+    TeacherApplicationRollup.objects.exclude(
+        teacher_id__in=[rollup.teacher_id for rollup in rollups],
+    ).update(update_time=now, **{field: 0 for field in ROLLUP_FIELDS})
+    logger.info(f"已重建 {len(rollups)} 名教师的申请汇总")
+    return len(rollups)
@@ -0,0 +1,258 @@
+# apps/competition_application/rows.py
+"""
+申请列表的只读快速路径。
+
+列表接口由一条 .values() 联表查询直接拼出字典，输出与 CompetitionApplicationSerializer
+逐字段相同，但不经过序列化器按实例、按字段的解析。
+?fields=id,application_status,competition 只查询、只返回指定的顶层字段。
+?include=competition,teacher 时行中的竞赛、教师只保留 id（教师为工号），
+每个竞赛、教师在响应的 included 中出现一次，按类型各用一次 in_bulk 查询。
+?application_status=pending 只返回该状态的申请（教师的待审批队列）。
+"""
+from types import SimpleNamespace
+
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from apps.competitions import status as competition_status
+from apps.competitions.models import Competition
+from apps.competitions.serializers import CompetitionSerializer
+from apps.student_center.models import profile_label
+from apps.teacher_center.models import TeacherProfile
+from apps.teacher_center.serializers import TeacherProfileSerializer
+
+from .models import CompetitionApplication, CompetitionReimbursement
+from .serializers import CompetitionApplicationSerializer
+from utils.compiled_serializer import compile_serializer
+
+FIELDS_QUERY_PARAM = 'fields'
+INCLUDE_QUERY_PARAM = 'include'
+STATUS_QUERY_PARAM = 'application_status'
+
+# 游标分页需要的列，未被请求时也一并查询
+CURSOR_COLUMNS = ('id', 'submission_time')
+
+def _datetime(value, context):
+    """与 DateTimeField 相同：转换到当前时区，ISO 8601，UTC 写作 Z"""
+    return context['datetime'](value)
+
+
+def _file_url(model, name):
+    storage = model._meta.get_field(name).storage
+
+    def convert(value, context):
+        # 与 FileField 相同：空文件为 None，有请求时返回绝对地址
+        if not value:
+            return None
+        url = storage.url(value)
+        request = context['request']
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _converter(model, name):
+    field = model._meta.get_field(name)
+    if isinstance(field, models.DateTimeField):
+        return _datetime
+    if isinstance(field, models.FileField):
+        return _file_url(model, name)
+    return None  # 字符、整数字段的数据库取值即为输出值
+
+
+def _column(lookup, convert=None):
+    if convert is None:
+        return (lookup,), lambda row, context: row[lookup]
+
+    def build(row, context):
+        value = row[lookup]
+        return None if value is None else convert(value, context)
+    return (lookup,), build
+
+
+def _nested(prefix, model, names):
+    """嵌套的模型序列化器：{字段: 值}"""
+    parts = [(name, f'{prefix}__{name}', _converter(model, name)) for name in names]
+
+    def build(row, context):
+        result = {}
+        for name, lookup, convert in parts:
+            value = row[lookup]
+            result[name] = value if value is None or convert is None else convert(value, context)
+        return result
+    return tuple(lookup for _, lookup, _ in parts), build
+
+
+def _competition():
+    names = [name for name in CompetitionSerializer.Meta.fields if name != 'status']
+    columns, build_fields = _nested('competition', Competition, names)
+    boundaries = [f'competition__{field}' for field in competition_status.BOUNDARY_FIELDS]
+
+    def build(row, context):
+        result = build_fields(row, context)
+        # 与 Competition.current_status 相同，规则见 status.compute_status
+        values = {field: row[lookup] for field, lookup in zip(competition_status.BOUNDARY_FIELDS, boundaries)}
+        result['status'] = competition_status.compute_status(
+            SimpleNamespace(status=row['competition__status'], **values), context['now'],
+        )
+        return result
+    return (*columns, *boundaries, 'competition__status'), build
+
+
+def _student():
+    def build(row, context):
+        # StringRelatedField，即 StudentProfile.__str__
+        return profile_label(row['student__student_id'])
+    return ('student__student_id',), build
+
+
+def _reimbursement():
+    # 与 get_reimbursement 相同：金额转为 float，submit_time 不做格式化，发票为相对地址
+    money = {'registration_fee', 'transportation_fee', 'accommodation_fee', 'other_fee', 'total_amount'}
+    names = (
+        'id', 'status', 'registration_fee', 'transportation_fee', 'accommodation_fee', 'other_fee',
+        'other_fee_description', 'total_amount', 'bank_name', 'bank_account', 'account_name',
+        'submit_time', 'comment', 'invoice',
+    )
+    storage = CompetitionReimbursement._meta.get_field('invoice').storage
+    parts = [(name, f'reimbursement__{name}') for name in names]
+
+    def build(row, context):
+        if row['reimbursement__id'] is None:
+            return None
+        result = {}
+        for name, lookup in parts:
+            value = row[lookup]
+            if name in money:
+                value = float(value)
+            elif name == 'invoice':
+                value = storage.url(value) if value else None
+            result[name] = value
+        return result
+    return tuple(lookup for _, lookup in parts), build
+
+
+def _build_fields():
+    model = CompetitionApplication
+    special = {
+        'student': _student(),
+        'competition': _competition(),
+        'teacher': _nested('teacher', model._meta.get_field('teacher').related_model,
+                           TeacherProfileSerializer.Meta.fields),
+        # 外键列保存的就是教师工号（to_field='teacher_id'），不需要联表
+        'teacher_id': _column('teacher_id'),
+        'reimbursement': _reimbursement(),
+    }
+    return {
+        name: special[name] if name in special else _column(name, _converter(model, name))
+        for name in CompetitionApplicationSerializer.Meta.fields
+    }
+
+
+# 顶层字段 -> (需要查询的列, 由一行 values() 结果生成字段值的函数)，顺序与序列化器一致
+FIELDS = _build_fields()
+
+
+# 可以旁加载的关联：字段 -> (行中保留的外键列, included 中的键, 模型, in_bulk 使用的字段, 序列化器)
+SIDELOADS = {
+    'competition': ('competition_id', 'competitions', Competition, 'pk', CompetitionSerializer),
+    # 外键指向教师工号，行中保留的也是工号
+    'teacher': ('teacher_id', 'teachers', TeacherProfile, 'teacher_id', TeacherProfileSerializer),
+}
+
+
+def _parse_names(value, allowed, param):
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise serializers.ValidationError({param: f"未知字段：{', '.join(sorted(unknown))}"})
+    return [name for name in allowed if name in requested]
+
+
+def parse_fields(value):
+    """解析 ?fields= 参数，返回按序列化器顺序排列的字段名；未指定时返回全部字段"""
+    if not value:
+        return list(FIELDS)
+    return _parse_names(value, FIELDS, FIELDS_QUERY_PARAM)
+
+
+def parse_include(value, fields):
+    """解析 ?include= 参数，返回需要旁加载的关联；未在 fields 中的关联忽略"""
+    if not value:
+        return []
+    return [name for name in _parse_names(value, SIDELOADS, INCLUDE_QUERY_PARAM) if name in fields]
+
+
+def filter_status(queryset, value):
+    """按 ?application_status= 筛选，未指定时不筛选"""
+    if not value:
+        return queryset
+    if value not in dict(CompetitionApplication.STATUS_CHOICES):
+        raise serializers.ValidationError({STATUS_QUERY_PARAM: f"未知状态：{value}"})
+    return queryset.filter(application_status=value)
+
+
+def _spec(name, include):
+    if name in include:
+        return _column(SIDELOADS[name][0])
+    return FIELDS[name]
+
+
+def values(queryset, fields, include=()):
+    """只查询 fields 需要的列（外加游标分页用的列），结果为字典；旁加载的关联只查外键列"""
+    columns = dict.fromkeys(CURSOR_COLUMNS)
+    for name in fields:
+        columns.update(dict.fromkeys(_spec(name, include)[0]))
+    return queryset.values(*columns)
+
+
+def render(rows, fields, request=None, include=()):
+    builders = [(name, _spec(name, include)[1]) for name in fields]
+    context = {
+        'request': request,
+        'now': timezone.now(),
+        # 当前时区每次生成列表只取一次，不在每个时间字段上重复查找
+        'datetime': serializers.DateTimeField(default_timezone=timezone.get_current_timezone()).to_representation,
+    }
+    return [{name: build(row, context) for name, build in builders} for row in rows]
+
+
+def included(rows, include, request=None):
+    """rows 引用的关联对象，每种一次 in_bulk 查询，按首次出现的顺序排列"""
+    result = {}
+    for name in include:
+        column, key, model, field_name, serializer_class = SIDELOADS[name]
+        ids = list(dict.fromkeys(row[column] for row in rows))
+        objects = model.objects.in_bulk(ids, field_name=field_name)
+        result[key] = compile_serializer(serializer_class)(
+            [objects[pk] for pk in ids if pk in objects], many=True, context={'request': request},
+        ).data
+    return result
+
+
+class ApplicationRowListMixin:
+    """
+    列表接口使用快速路径，视图的 get_queryset、分页器保持不变。
+    其余接口（详情、审批等）仍使用序列化器。
+    带 include 参数时响应为 {"results": [...], "included": {...}}，分页时另有 next。
+    """
+
+    def list(self, request, *args, **kwargs):
+        fields = parse_fields(request.query_params.get(FIELDS_QUERY_PARAM))
+        include = parse_include(request.query_params.get(INCLUDE_QUERY_PARAM), fields)
+        queryset = filter_status(self.filter_queryset(self.get_queryset()),
+                                 request.query_params.get(STATUS_QUERY_PARAM))
+        queryset = values(queryset, fields, include)
+        page = self.paginate_queryset(queryset)
+        page_rows = page if page is not None else list(queryset)
+        data = render(page_rows, fields, request, include)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        elif include:
+            response = Response({'results': data})
+        else:
+            response = Response(data)
+        if include:
+            response.data['included'] = included(page_rows, include, request)
+        return response
@@ -1,6 +1,9 @@
 # competition_application/serializers.py
+from django.db import transaction
 from rest_framework import serializers
-from .models import CompetitionApplication
+from .models import ApplicationEvent, CompetitionApplication
+from .quotas import reserve_seat
+from .signals import application_transitioned
 from apps.competitions.models import Competition
 from apps.competition_application.models import CompetitionReimbursement
 from apps.competitions.serializers import CompetitionSerializer
@@ -91,7 +94,7 @@ class CompetitionApplicationSerializer(serializers.ModelSerializer):
                     'invoice': obj.reimbursement.invoice.url if obj.reimbursement.invoice else None
                 }
         except Exception as e:
-            print(f"Error getting reimbursement info: {str(e)}")
+            logger.error(f"Error getting reimbursement info: {str(e)}")
             return None
 
 class CompetitionApplicationCreateSerializer(serializers.ModelSerializer):
@@ -126,6 +129,34 @@ class CompetitionApplicationCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"contact_info": "联系方式不能为空"})
         return attrs
 
+    def create(self, validated_data):
+        # 占用名额与创建申请在同一事务中，创建失败时名额随之回滚
+        with transaction.atomic():
+            if not reserve_seat(validated_data['competition'].pk):
+                raise serializers.ValidationError({"competition": "该竞赛申报名额已满"})
+            application = super().create(validated_data)
+            application_transitioned.send(
+                sender=CompetitionApplication,
+                application=application,
+                old_status=None,
+                new_status=application.application_status,
+            )
+            return application
+
+class CompetitionPopularitySerializer(serializers.ModelSerializer):
+    """竞赛的申请数统计，数值来自竞赛上的计数字段"""
+
+    class Meta:
+        model = Competition
+        fields = [
+            'id',
+            'name',
+            'type',
+            'pending_count',
+            'approved_count',
+            'application_count',
+        ]
+
 class ReimbursementSerializer(serializers.ModelSerializer):
     class Meta:
         model = CompetitionReimbursement
@@ -136,4 +167,19 @@ class ReimbursementSerializer(serializers.ModelSerializer):
             'invoice', 'status', 'submit_time', 'update_time', 'comment'
         ]
         read_only_fields = ['id', 'total_amount', 'status', 'submit_time',
-                           'update_time', 'comment']
\ No newline at end of file
+                           'update_time', 'comment']
+class BulkTransitionSerializer(serializers.Serializer):
+    """教师批量审批的请求体"""
+    MAX_IDS = 1000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+    )
+    status = serializers.ChoiceField(choices=['approved', 'rejected'])
+
+class ApplicationEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ApplicationEvent
+        fields = ['id', 'kind', 'old_status', 'new_status', 'created']
@@ -0,0 +1,144 @@
+# apps/competition_application/signals.py
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver, Signal
+
+from decimal import Decimal
+
+from .caching import STUDENT, TEACHER, bump_owner_version
+from .counters import apply_transition, apply_transitions
+from . import events
+from .feed import APPLIED_STATUSES
+from .models import CompetitionApplication, CompetitionReimbursement
+from .quotas import HOLDING_STATUSES, release_seat, release_seats
+from . import rollups
+
+# 申请新建、状态变化或删除后发送，参数为 application、old_status、new_status，
+# 新建时 old_status 为 None，删除时 new_status 为 None。接收方在发送方的事务中执行。
+# 状态必须通过 transitions.transition 修改，直接 save() 不会发送该信号。
+application_transitioned = Signal()
+
+# 批量状态变化（transitions.transition_many）后发送一次，参数为 applications、old_status、new_status，
+# applications 为发生了同样变化的申请列表。接收方应按竞赛、教师合并写入，而不是逐条处理
+applications_transitioned = Signal()
+
+# 流程状态变化后发送，参数为 application、old_status、new_status，由 transitions.finish_process 发送
+process_transitioned = Signal()
+
+# 报销新建、审核或删除后发送，参数为 reimbursement、old_status、new_status，None 的含义同上。
+# 审核必须通过 transitions.review_reimbursement 进行
+reimbursement_transitioned = Signal()
+
+
+@receiver(application_transitioned)
+def update_counters(sender, application, old_status, new_status, **kwargs):
+    apply_transition(application.competition_id, old_status, new_status)
+
+
+@receiver(application_transitioned)
+def release_quota(sender, application, old_status, new_status, **kwargs):
+    # 名额在创建前已占用（quotas.reserve_seat），这里只处理归还
+    if old_status in HOLDING_STATUSES and new_status not in HOLDING_STATUSES:
+        release_seat(application.competition_id)
+
+
+@receiver(application_transitioned)
+def invalidate_owner_caches(sender, application, old_status, new_status, **kwargs):
+    _invalidate_owner_caches([application], old_status, new_status)
+
+
+@receiver(applications_transitioned)
+def update_counters_many(sender, applications, old_status, new_status, **kwargs):
+    apply_transitions([application.competition_id for application in applications], old_status, new_status)
+
+
+@receiver(applications_transitioned)
+def release_quota_many(sender, applications, old_status, new_status, **kwargs):
+    if old_status in HOLDING_STATUSES and new_status not in HOLDING_STATUSES:
+        release_seats([application.competition_id for application in applications])
+
+
+@receiver(applications_transitioned)
+def invalidate_owner_caches_many(sender, applications, old_status, new_status, **kwargs):
+    _invalidate_owner_caches(applications, old_status, new_status)
+
+
+@receiver(applications_transitioned)
+def update_teacher_rollup_many(sender, applications, old_status, new_status, **kwargs):
+    rollups.apply_application_transitions(applications, old_status, new_status)
+
+
+def _invalidate_owner_caches(applications, old_status, new_status):
+    # 新建、删除改变申请总数；撤销改变学生已申请的竞赛集合
+    created_or_deleted = old_status is None or new_status is None
+    if created_or_deleted or (old_status in APPLIED_STATUSES) != (new_status in APPLIED_STATUSES):
+        for student_id in {application.student_id for application in applications}:
+            bump_owner_version(STUDENT, student_id)
+    if created_or_deleted:
+        for teacher_id in {application.teacher_id for application in applications}:
+            bump_owner_version(TEACHER, teacher_id)
+
+
+@receiver(application_transitioned)
+def update_teacher_rollup(sender, application, old_status, new_status, **kwargs):
+    rollups.apply_application_transition(application, old_status, new_status)
+
+
+@receiver(process_transitioned)
+def update_teacher_rollup_process(sender, application, old_status, new_status, **kwargs):
+    rollups.apply_process_transition(application, old_status, new_status)
+
+
+@receiver(reimbursement_transitioned)
+def update_teacher_rollup_reimbursement(sender, reimbursement, old_status, new_status, **kwargs):
+    teacher_id = CompetitionApplication.objects.filter(
+        pk=reimbursement.application_id,
+    ).values_list('teacher_id', flat=True).first()
+    if teacher_id is not None:
+        amount = Decimal(str(reimbursement.total_amount))
+        rollups.apply_reimbursement_transition(teacher_id, amount, old_status, new_status)
+
+
+# 事件记录：删除不记录，申请的事件随申请级联删除
+
+@receiver(application_transitioned)
+def record_application_event(sender, application, old_status, new_status, **kwargs):
+    if new_status is not None:
+        events.record(application.pk, events.APPLICATION, old_status, new_status)
+
+
+@receiver(applications_transitioned)
+def record_application_events(sender, applications, old_status, new_status, **kwargs):
+    events.record_many([application.pk for application in applications], events.APPLICATION, old_status, new_status)
+
+
+@receiver(process_transitioned)
+def record_process_event(sender, application, old_status, new_status, **kwargs):
+    events.record(application.pk, events.PROCESS, old_status, new_status)
+
+
+@receiver(reimbursement_transitioned)
+def record_reimbursement_event(sender, reimbursement, old_status, new_status, **kwargs):
+    if new_status is not None:
+        events.record(reimbursement.application_id, events.REIMBURSEMENT, old_status, new_status)
+
+
+@receiver(post_delete, sender=CompetitionReimbursement)
+def reimbursement_deleted(sender, instance, **kwargs):
+    # 删除申请时报销记录随之级联删除，先于申请本身，此时仍能查到申请的指导教师
+    reimbursement_transitioned.send(
+        sender=CompetitionReimbursement,
+        reimbursement=instance,
+        old_status=instance.status,
+        new_status=None,
+    )
+
+
+@receiver(post_delete, sender=CompetitionApplication)
+def application_deleted(sender, instance, **kwargs):
+    application_transitioned.send(
+        sender=CompetitionApplication,
+        application=instance,
+        old_status=instance.application_status,
+        new_status=None,
+    )
@@ -1,3 +1,1223 @@
-from django.test import TestCase
+# apps/competition_application/tests.py
 
-# Create your tests here.
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.models import F
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import mixins, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APITestCase
+
+from apps.competitions.boundary_index import boundary_index
+from apps.competitions.models import Competition
+from apps.competitions.open_index import open_index
+from apps.competitions.serializers import CompetitionListSerializer, CompetitionSerializer
+from apps.student_center.models import StudentProfile
+from apps.student_center.serializers import StudentProfileSerializer
+from apps.teacher_center.models import TeacherProfile
+from apps.teacher_center.serializers import TeacherProfileSerializer
+
+from .counters import reconcile_counters
+from utils.compiled_serializer import compile_serializer
+from utils.explain_advisor import FILESORT, FULL_SCAN, explain, registered_queries
+from utils.pdf_generator import CompetitionProcessPDF
+from utils.query_budget import QueryBudgetTestMixin, QueryRecorder, query_budget
+
+from .models import (
+    ApplicationEvent, CompetitionApplication, CompetitionQuota, CompetitionReimbursement, TeacherApplicationRollup,
+)
+from .quotas import reconcile_quotas, set_capacity
+from .rollups import ROLLUP_FIELDS, rebuild_rollups
+from .transitions import IllegalTransition, transition
+from . import events, rows
+from .serializers import CompetitionApplicationSerializer, CompetitionPopularitySerializer
+
+CustomUser = get_user_model()
+
+URL = '/api/competition_applications/'
+
+
+def make_teacher(teacher_id='T0001'):
+    user = CustomUser.objects.create_user(
+        username=teacher_id, email=f'{teacher_id}@example.com', password=None,
+        role='teacher', teacher_id=teacher_id,
+    )
+    return user, TeacherProfile.objects.get(user=user)
+
+
+def make_student(student_id):
+    return CustomUser.objects.create_user(
+        username=student_id, email=f'{student_id}@example.com', password=None,
+        role='student', student_id=student_id,
+    )
+
+
+def make_competition(name='测试竞赛', **kwargs):
+    now = timezone.now()
+    defaults = {
+        'link': 'https://example.com',
+        'type': '线上',
+        'reg_time_start': now - timedelta(days=1),
+        'reg_time_end': now + timedelta(days=10),
+    }
+    defaults.update(kwargs)
+    return Competition.objects.create(name=name, **defaults)
+
+
+def submit(client, competition, teacher):
+    return client.post(URL, {
+        'competition': competition.pk,
+        'teacher': teacher.teacher_id,
+        'contact_info': '13800000000',
+    }, format='json')
+
+
+def make_sample_applications(client, teacher):
+    """
+    覆盖各种输出情况的申请：文件字段、报销信息、空值，
+    报名中、已结束和未排期（使用保存的状态）的竞赛。client 需已登录为学生
+    """
+    now = timezone.now()
+    competitions = [
+        make_competition('报名中'),
+        make_competition('已结束', reg_time_start=now - timedelta(days=30), reg_time_end=now - timedelta(days=20),
+                         comp_time_start=now - timedelta(days=10), comp_time_end=now - timedelta(days=9)),
+        make_competition('未排期', reg_time_start=None, reg_time_end=None, status=3, link='', type=''),
+    ]
+    for competition in competitions:
+        submit(client, competition, teacher)
+    first, second, _ = CompetitionApplication.objects.order_by('id')
+    CompetitionApplication.objects.filter(pk=first.pk).update(
+        description='说明', photo='competition_files/photo.jpg', certificate='competition_files/证书.pdf',
+        application_status='approved', process_status='ended',
+    )
+    CompetitionReimbursement.objects.create(
+        application=second, registration_fee='100.50', transportation_fee='20.00',
+        accommodation_fee='0', other_fee='3.30', other_fee_description='打印', total_amount='123.80',
+        bank_name='银行', bank_account='6222000000000000', account_name='学生',
+        invoice='reimbursement_files/invoice.pdf', comment='',
+    )
+    TeacherProfile.objects.filter(pk=teacher.pk).update(name='王老师', department='')
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class CompetitionQuotaTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.competition = make_competition()
+        self.students = [make_student(f'S{i:04d}') for i in range(3)]
+
+    def submit_as(self, user):
+        self.client.force_authenticate(user)
+        return submit(self.client, self.competition, self.teacher)
+
+    def quota(self):
+        return CompetitionQuota.objects.get(competition=self.competition)
+
+    def test_unlimited_without_quota(self):
+        for student in self.students:
+            self.assertEqual(self.submit_as(student).status_code, status.HTTP_201_CREATED)
+        self.assertFalse(CompetitionQuota.objects.exists())
+
+    def test_full_competition_rejects_submission(self):
+        set_capacity(self.competition, 2)
+        self.assertEqual(self.submit_as(self.students[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit_as(self.students[1]).status_code, status.HTTP_201_CREATED)
+        response = self.submit_as(self.students[2])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('competition', response.json())
+        self.assertEqual(self.quota().used, 2)
+        self.assertEqual(CompetitionApplication.objects.count(), 2)
+
+    def test_reject_and_cancel_release_seats(self):
+        set_capacity(self.competition, 2)
+        self.submit_as(self.students[0])
+        self.submit_as(self.students[1])
+        first, second = CompetitionApplication.objects.order_by('id')
+
+        self.client.force_authenticate(self.teacher_user)
+        response = self.client.post(f'{URL}{first.pk}/reject/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 重复拒绝不会再归还名额
+        response = self.client.post(f'{URL}{first.pk}/reject/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.quota().used, 1)
+
+        self.client.force_authenticate(self.students[1])
+        response = self.client.post(f'{URL}{second.pk}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.quota().used, 0)
+
+        self.assertEqual(self.submit_as(self.students[2]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.quota().used, 1)
+
+    def test_deleting_application_releases_seat(self):
+        set_capacity(self.competition, 1)
+        self.submit_as(self.students[0])
+        CompetitionApplication.objects.get().delete()
+        self.assertEqual(self.quota().used, 0)
+
+    def test_set_capacity_counts_existing_applications(self):
+        self.submit_as(self.students[0])
+        self.submit_as(self.students[1])
+        quota = set_capacity(self.competition, 1)
+        self.assertEqual((quota.used, quota.capacity), (2, 1))
+        self.assertEqual(self.submit_as(self.students[2]).status_code, status.HTTP_400_BAD_REQUEST)
+        set_capacity(self.competition, None)
+        self.assertEqual(self.submit_as(self.students[2]).status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationCounterTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.competition = make_competition()
+        self.students = [make_student(f'S{i:04d}') for i in range(4)]
+        for student in self.students:
+            self.client.force_authenticate(student)
+            submit(self.client, self.competition, self.teacher)
+        self.applications = list(CompetitionApplication.objects.order_by('id'))
+
+    def counters(self, competition=None):
+        competition = competition or self.competition
+        competition.refresh_from_db()
+        return competition.pending_count, competition.approved_count, competition.application_count
+
+    def test_counters_follow_transitions(self):
+        self.assertEqual(self.counters(), (4, 0, 4))
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.applications[0].pk}/approve/')
+        self.client.post(f'{URL}{self.applications[1].pk}/reject/')
+        # 已批准的申请不能再拒绝，计数不变
+        response = self.client.post(f'{URL}{self.applications[0].pk}/reject/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(self.students[2])
+        self.client.post(f'{URL}{self.applications[2].pk}/cancel/')
+        self.assertEqual(self.counters(), (1, 1, 4))
+
+        self.applications[0].refresh_from_db()
+        self.applications[0].delete()
+        self.assertEqual(self.counters(), (1, 0, 3))
+
+    def test_saving_competition_keeps_counters(self):
+        stale = Competition.objects.get(pk=self.competition.pk)
+        self.client.force_authenticate(make_student('S9999'))
+        submit(self.client, self.competition, self.teacher)
+        stale.name = '改名后的竞赛'
+        stale.save()
+        self.assertEqual(self.counters(), (5, 0, 5))
+
+    def test_reconcile_repairs_drift(self):
+        other = make_competition('另一个竞赛')
+        set_capacity(self.competition, 10)
+        Competition.objects.filter(pk=self.competition.pk).update(pending_count=0, application_count=9)
+        Competition.objects.filter(pk=other.pk).update(approved_count=3)
+        CompetitionQuota.objects.filter(competition=self.competition).update(used=1)
+
+        self.assertEqual(reconcile_counters(), 2)
+        self.assertEqual(reconcile_quotas(), 1)
+        self.assertEqual(self.counters(), (4, 0, 4))
+        self.assertEqual(self.counters(other), (0, 0, 0))
+        self.assertEqual(CompetitionQuota.objects.get(competition=self.competition).used, 4)
+        self.assertEqual((reconcile_counters(), reconcile_quotas()), (0, 0))
+
+    def test_popularity_ordering(self):
+        quiet = make_competition('冷门竞赛')
+        busy = make_competition('热门竞赛')
+        for student in self.students + [make_student('S9999')]:
+            self.client.force_authenticate(student)
+            submit(self.client, busy, self.teacher)
+
+        response = self.client.get(f'{URL}popularity/')
+        self.assertEqual(
+            [(item['id'], item['application_count']) for item in response.json()],
+            [(busy.pk, 5), (self.competition.pk, 4), (quiet.pk, 0)],
+        )
+
+        names = []
+        # 目录版本使用的时间点索引在进程内第一次请求时加载，不计入每页的查询
+        boundary_index.passed()
+        url = '/api/competitions/?ordering=popular&page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                page = self.client.get(url).json()
+            names.extend(item['name'] for item in page['results'])
+            url = page['next']
+        self.assertEqual(names, ['热门竞赛', '测试竞赛', '冷门竞赛'])
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class TeacherRollupTests(APITestCase):
+    """教师汇总随状态变化增减，且与按申请表重建的结果一致"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.students = [make_student(f'S{i:04d}') for i in range(4)]
+        for student in self.students:
+            self.client.force_authenticate(student)
+            submit(self.client, make_competition(), self.teacher)
+        self.applications = list(CompetitionApplication.objects.order_by('id'))
+
+    def rollup(self):
+        return TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first()
+
+    def assert_rollup(self, **expected):
+        rollup = self.rollup()
+        self.assertEqual({field: rollup[field] for field in expected}, expected)
+        # 增量维护的结果与重建的结果相同
+        rebuild_rollups()
+        self.assertEqual(self.rollup(), rollup)
+
+    def submit_reimbursement(self, index, amount):
+        self.client.force_authenticate(self.students[index])
+        response = self.client.post(f'{URL}{self.applications[index].pk}/reimbursement/', {
+            'registration_fee': amount, 'bank_name': '银行', 'bank_account': '6222000000000000',
+            'account_name': '学生',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_rollup_follows_transitions(self):
+        self.assert_rollup(pending_count=4, ongoing_count=4, ended_count=0)
+
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.applications[0].pk}/approve/')
+        self.client.post(f'{URL}{self.applications[1].pk}/approve/')
+        self.client.post(f'{URL}{self.applications[2].pk}/reject/')
+        self.client.force_authenticate(self.students[3])
+        self.client.post(f'{URL}{self.applications[3].pk}/cancel/')
+        self.assert_rollup(pending_count=0, approved_count=2, rejected_count=1, cancelled_count=1)
+
+        self.submit_reimbursement(0, '120.50')
+        self.submit_reimbursement(1, '30')
+        self.assert_rollup(
+            reimbursement_pending_count=2,
+            reimbursement_requested_amount=Decimal('150.50'),
+            reimbursement_approved_amount=Decimal('0'),
+        )
+
+        self.client.force_authenticate(self.teacher_user)
+        response = self.client.post(f'{URL}{self.applications[0].pk}/reimbursement_review/', {'status': 'approved'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.post(f'{URL}{self.applications[1].pk}/reimbursement_review/', {'status': 'rejected'})
+        response = self.client.post(f'{URL}{self.applications[0].pk}/finish_process/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 重复结束流程不再计数
+        response = self.client.post(f'{URL}{self.applications[0].pk}/finish_process/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assert_rollup(
+            reimbursement_pending_count=0, reimbursement_approved_count=1, reimbursement_rejected_count=1,
+            reimbursement_approved_amount=Decimal('120.50'), ongoing_count=3, ended_count=1,
+        )
+
+        # 删除申请时报销记录随之删除，两者的计数和金额都扣除
+        self.applications[0].refresh_from_db()
+        self.applications[0].delete()
+        self.assert_rollup(
+            approved_count=1, ended_count=0, reimbursement_approved_count=0,
+            reimbursement_requested_amount=Decimal('30'), reimbursement_approved_amount=Decimal('0'),
+        )
+
+    def test_rebuild_repairs_drift(self):
+        TeacherApplicationRollup.objects.filter(teacher=self.teacher).update(pending_count=99, ongoing_count=0)
+        _, other = make_teacher('T0002')
+        TeacherApplicationRollup.objects.create(teacher=other, pending_count=3)
+        call_command('rebuild_teacher_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup()['pending_count'], 4)
+        self.assertEqual(self.rollup()['ongoing_count'], 4)
+        # 已没有申请的教师清零
+        self.assertEqual(TeacherApplicationRollup.objects.get(teacher=other).pending_count, 0)
+
+    def test_dashboard(self):
+        self.client.force_authenticate(self.teacher_user)
+        with QueryRecorder() as queries:
+            response = self.client.get('/api/teacher/dashboard/')
+        self.assertEqual(len(queries), 1)
+        body = response.json()
+        self.assertEqual(body['total'], 4)
+        self.assertEqual(body['application_status']['pending'], 4)
+        self.assertEqual(body['process_status'], {'ongoing': 4, 'ended': 0})
+        self.assertEqual(body['reimbursement_amount'], {'requested': 0.0, 'approved': 0.0})
+
+        _, other = make_teacher('T0002')
+        self.client.force_authenticate(other.user)
+        self.assertEqual(self.client.get('/api/teacher/dashboard/').json()['total'], 0)
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.get('/api/teacher/dashboard/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class BulkTransitionTests(APITestCase):
+    """批量审批：逐条结果，计数、名额、汇总与逐条审批一致，语句数与 id 数量无关"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.competitions = [make_competition('竞赛一'), make_competition('竞赛二')]
+        set_capacity(self.competitions[0], 10)
+        for i in range(6):
+            self.client.force_authenticate(make_student(f'S{i:04d}'))
+            submit(self.client, self.competitions[i % 2], self.teacher)
+        self.applications = list(CompetitionApplication.objects.order_by('id'))
+        self.client.force_authenticate(self.teacher_user)
+
+    def bulk(self, ids, target):
+        return self.client.post(f'{URL}bulk_transition/', {'ids': ids, 'status': target}, format='json')
+
+    def assert_consistent(self):
+        counters = list(Competition.objects.order_by('id').values_list(*Competition.COUNTER_FIELDS))
+        quotas = list(CompetitionQuota.objects.order_by('pk').values_list('used', flat=True))
+        rollup = TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first()
+        self.assertEqual((reconcile_counters(), reconcile_quotas(), rebuild_rollups()), (0, 0, 1))
+        self.assertEqual(list(Competition.objects.order_by('id').values_list(*Competition.COUNTER_FIELDS)), counters)
+        self.assertEqual(list(CompetitionQuota.objects.order_by('pk').values_list('used', flat=True)), quotas)
+        self.assertEqual(
+            TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first(), rollup,
+        )
+
+    def test_outcomes(self):
+        first, second, third = self.applications[:3]
+        self.client.post(f'{URL}{second.pk}/approve/')
+        _, other = make_teacher('T0002')
+        self.client.force_authenticate(make_student('S9999'))
+        submit(self.client, self.competitions[0], other)
+        foreign = CompetitionApplication.objects.get(teacher=other)
+
+        self.client.force_authenticate(self.teacher_user)
+        response = self.bulk([first.pk, second.pk, third.pk, foreign.pk, 999999, first.pk], 'rejected')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'updated': 2,
+            'results': [
+                {'id': first.pk, 'result': 'updated'},
+                {'id': second.pk, 'result': 'not_pending'},
+                {'id': third.pk, 'result': 'updated'},
+                {'id': foreign.pk, 'result': 'not_found'},
+                {'id': 999999, 'result': 'not_found'},
+            ],
+        })
+        self.assertEqual(
+            list(CompetitionApplication.objects.filter(pk__in=[first.pk, third.pk, foreign.pk])
+                 .order_by('id').values_list('application_status', flat=True)),
+            ['rejected', 'rejected', 'pending'],
+        )
+
+    def test_counters_quotas_and_rollup(self):
+        ids = [application.pk for application in self.applications]
+        self.bulk(ids[:4], 'approved')
+        self.bulk(ids, 'rejected')
+        self.competitions[0].refresh_from_db()
+        self.assertEqual(
+            (self.competitions[0].pending_count, self.competitions[0].approved_count), (0, 2),
+        )
+        # 拒绝归还名额，批准保留名额
+        self.assertEqual(CompetitionQuota.objects.get(competition=self.competitions[0]).used, 2)
+        self.assert_consistent()
+
+    def test_query_count_does_not_grow_with_ids(self):
+        def queries_for(ids):
+            with QueryRecorder() as queries:
+                response = self.bulk(ids, 'rejected')
+            self.assertEqual(response.json()['updated'], len(ids))
+            return len(queries)
+
+        ids = [application.pk for application in self.applications]
+        self.assertEqual(queries_for(ids[:2]), queries_for(ids[2:]))
+
+    def test_validation_and_permissions(self):
+        self.assertEqual(self.bulk([], 'approved').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.bulk([self.applications[0].pk], 'cancelled').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.bulk(['x'], 'approved').status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(make_student('S9999'))
+        self.assertEqual(self.bulk([self.applications[0].pk], 'approved').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationStateMachineTests(APITestCase):
+    """状态变化是带条件的两列 UPDATE；读取之后被并发修改时返回 409，不覆盖对方的结果"""
+
+    VIEWSET = 'apps.competition_application.views.CompetitionApplicationViewSet'
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.competition = make_competition()
+        set_capacity(self.competition, 10)
+        self.student = make_student('S0001')
+        self.client.force_authenticate(self.student)
+        submit(self.client, self.competition, self.teacher)
+        self.application = CompetitionApplication.objects.get()
+
+    def assert_consistent(self):
+        self.assertEqual((reconcile_counters(), reconcile_quotas()), (0, 0))
+        rollup = TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first()
+        rebuild_rollups()
+        self.assertEqual(
+            TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first(), rollup,
+        )
+
+    def test_update_writes_only_status_columns(self):
+        with QueryRecorder() as queries:
+            self.assertTrue(transition(self.application, 'approved'))
+        update = next(sql for sql, _ in queries.queries if sql.startswith('UPDATE "competition_application'))
+        self.assertIn('SET "application_status" = %s, "update_time" = %s', update)
+        self.assertIn('"application_status" = %s AND', update.split('WHERE')[1])
+        self.assertEqual(self.application.application_status, 'approved')
+
+    def test_illegal_transitions(self):
+        with self.assertRaises(IllegalTransition):
+            transition(self.application, 'approved', expected='rejected')
+        with self.assertRaises(IllegalTransition):
+            transition(self.application, 'pending')
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.application.pk}/approve/')
+        # 已批准的申请不能再拒绝、撤销
+        self.assertEqual(self.client.post(f'{URL}{self.application.pk}/reject/').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.post(f'{URL}{self.application.pk}/cancel/').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_stale_read_returns_conflict(self):
+        stale = CompetitionApplication.objects.get(pk=self.application.pk)
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.application.pk}/approve/')
+
+        # 视图读到的还是申报中，条件更新不生效
+        with mock.patch(f'{self.VIEWSET}.get_object', return_value=stale):
+            response = self.client.post(f'{URL}{stale.pk}/reject/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        with mock.patch('apps.teacher_center.views.ApproveCompetitionApplicationView.get_object',
+                        return_value=stale):
+            response = self.client.patch(
+                f'/api/teacher/approve-competition-application/{stale.pk}/', {'status': 'rejected'}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.client.force_authenticate(self.student)
+        with mock.patch(f'{self.VIEWSET}.get_object', return_value=stale):
+            response = self.client.post(f'{URL}{stale.pk}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.application_status, 'approved')
+        self.assert_consistent()
+
+    def test_file_upload_keeps_concurrent_status(self):
+        stale = CompetitionApplication.objects.get(pk=self.application.pk)
+        transition(self.application, 'approved')
+        photo = SimpleUploadedFile('photo.jpg', b'jpg')
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root), \
+                mock.patch(f'{self.VIEWSET}.get_object', return_value=stale):
+            response = self.client.post(f'{URL}{stale.pk}/upload_files/', {'photo': photo})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.application_status, 'approved')
+        self.assertTrue(self.application.photo.name.endswith('.jpg'))
+
+    def test_reimbursement_review(self):
+        transition(self.application, 'approved')
+        self.client.post(f'{URL}{self.application.pk}/reimbursement/', {
+            'registration_fee': '10', 'bank_name': '银行', 'bank_account': '6222000000000000', 'account_name': '学生',
+        }, format='json')
+        self.client.force_authenticate(self.teacher_user)
+        stale = CompetitionApplication.objects.select_related('reimbursement').get(pk=self.application.pk)
+        url = f'{URL}{self.application.pk}/reimbursement_review/'
+        self.assertEqual(self.client.post(url, {'status': 'approved'}).status_code, status.HTTP_200_OK)
+        # 已审核的报销不能再改判
+        self.assertEqual(self.client.post(url, {'status': 'rejected'}).status_code, status.HTTP_400_BAD_REQUEST)
+        with mock.patch(f'{self.VIEWSET}.get_object', return_value=stale):
+            self.assertEqual(self.client.post(url, {'status': 'rejected'}).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(CompetitionReimbursement.objects.get().status, 'approved')
+
+        stale = CompetitionApplication.objects.select_related('reimbursement').get(pk=self.application.pk)
+        url = f'{URL}{self.application.pk}/finish_process/'
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        with mock.patch(f'{self.VIEWSET}.get_object', return_value=stale):
+            self.assertEqual(self.client.post(url).status_code, status.HTTP_409_CONFLICT)
+        self.assert_consistent()
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationEventTests(APITestCase):
+    """状态变化写入事件表，时间线、PDF、审核时效从事件表读取"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.client.force_authenticate(self.student)
+        submit(self.client, make_competition(), self.teacher)
+        self.application = CompetitionApplication.objects.get()
+
+    def run_process(self):
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.application.pk}/approve/')
+        self.client.force_authenticate(self.student)
+        self.client.post(f'{URL}{self.application.pk}/reimbursement/', {
+            'registration_fee': '10', 'bank_name': '银行', 'bank_account': '6222000000000000', 'account_name': '学生',
+        }, format='json')
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.application.pk}/reimbursement_review/', {'status': 'approved'})
+        self.client.post(f'{URL}{self.application.pk}/finish_process/')
+
+    def test_timeline(self):
+        self.run_process()
+        with QueryRecorder() as queries:
+            response = self.client.get(f'{URL}{self.application.pk}/timeline/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['kind'], item['old_status'], item['new_status']) for item in response.json()],
+            [
+                ('application', None, 'pending'),
+                ('application', 'pending', 'approved'),
+                ('reimbursement', None, 'pending'),
+                ('reimbursement', 'pending', 'approved'),
+                ('process', 'ongoing', 'ended'),
+            ],
+        )
+        timeline_queries = [sql for sql, _ in queries.queries if 'competition_application_applicationevent' in sql]
+        self.assertEqual(len(timeline_queries), 1)
+        plan = ApplicationEvent.objects.filter(application_id=self.application.pk).order_by('created', 'id').explain()
+        self.assertIn('app_event_timeline_idx', plan)
+
+        self.client.force_authenticate(make_student('S0002'))
+        self.assertEqual(self.client.get(f'{URL}{self.application.pk}/timeline/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_pdf_dates_come_from_events(self):
+        self.run_process()
+        reviewed = timezone.now() - timedelta(days=40)
+        ApplicationEvent.objects.filter(new_status='approved', kind='application').update(created=reviewed)
+        # 之后的任何保存都会改变 update_time，但不影响审核时间
+        CompetitionApplication.objects.filter(pk=self.application.pk).update(description='补充说明')
+        self.application.refresh_from_db()
+        pdf = CompetitionProcessPDF(self.application, events.milestones(events.timeline(self.application.pk)))
+        self.assertEqual(pdf._get_approval_date(), reviewed.strftime('%Y-%m-%d'))
+        self.assertEqual(pdf._get_process_end_date(), timezone.now().strftime('%Y-%m-%d'))
+        self.assertEqual(CompetitionProcessPDF(self.application)._get_approval_date(), '未审批')
+        self.assertTrue(pdf.generate().startswith(b'%PDF'))
+
+    def test_bulk_transition_writes_events_in_one_insert(self):
+        for i in range(2, 6):
+            self.client.force_authenticate(make_student(f'S{i:04d}'))
+            submit(self.client, make_competition(f'竞赛{i}'), self.teacher)
+        ids = list(CompetitionApplication.objects.values_list('id', flat=True))
+        self.client.force_authenticate(self.teacher_user)
+        with QueryRecorder() as queries:
+            self.client.post(f'{URL}bulk_transition/', {'ids': ids, 'status': 'rejected'}, format='json')
+        inserts = [sql for sql, _ in queries.queries
+                   if sql.startswith('INSERT INTO "competition_application_applicationevent"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ApplicationEvent.objects.filter(new_status='rejected').count(), len(ids))
+
+    def test_events_are_append_only(self):
+        event = ApplicationEvent.objects.get()
+        event.new_status = 'approved'
+        with self.assertRaises(ValueError):
+            event.save()
+        # 删除申请后事件保留，仍能按原申请的 id 查到
+        application_id = self.application.pk
+        self.application.delete()
+        self.assertEqual([e.new_status for e in events.timeline(application_id)], ['pending'])
+
+    def test_review_sla(self):
+        self.client.force_authenticate(self.teacher_user)
+        self.client.post(f'{URL}{self.application.pk}/approve/')
+        now = timezone.now()
+        ApplicationEvent.objects.filter(old_status__isnull=True).update(created=now - timedelta(hours=5))
+        durations = events.review_durations(now - timedelta(days=1))
+        self.assertEqual(len(durations), 1)
+        self.assertAlmostEqual(durations[0].total_seconds() / 3600, 5, places=1)
+        self.assertEqual(events.review_durations(now - timedelta(days=1), teacher_id='T0002'), [])
+
+        out = StringIO()
+        call_command('application_review_sla', '--days', '7', stdout=out)
+        self.assertIn('审核 1 条，中位数 5.0 小时', out.getvalue())
+
+    def test_backfill(self):
+        ApplicationEvent.objects.all().delete()
+        CompetitionApplication.objects.filter(pk=self.application.pk).update(
+            application_status='approved', process_status='ended',
+        )
+        out = StringIO()
+        call_command('backfill_application_events', stdout=out)
+        self.assertIn('已为 1 条申请补写事件', out.getvalue())
+        self.assertEqual(
+            [(event.kind, event.new_status) for event in events.timeline(self.application.pk)],
+            [('application', 'pending'), ('application', 'approved'), ('process', 'ended')],
+        )
+        self.assertEqual(events.backfill_events(), 0)
+
+
+class HotQueryPlanTests(APITestCase):
+    """登记的热点查询走索引；迁移与模型一致"""
+
+    def test_registered_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertIn(f'已检查 {len(registered_queries())} 个查询', out.getvalue())
+        self.assertIn('applications.teacher_pending', registered_queries())
+
+    def test_flags_unindexed_query(self):
+        plan, problems = explain(CompetitionApplication.objects.filter(contact_info='x').order_by('description'))
+        self.assertTrue(plan)
+        kinds = {kind for kind, _ in problems}
+        if connection.vendor in ('sqlite', 'mysql'):
+            self.assertEqual(kinds, {FULL_SCAN, FILESORT})
+
+    def test_unknown_name(self):
+        with self.assertRaises(CommandError):
+            call_command('explain_hot_queries', 'applications.nope', stdout=StringIO())
+
+    def test_migrations_match_models(self):
+        call_command('makemigrations', '--check', '--dry-run', stdout=StringIO())
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class OpenToMeFeedTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        open_index.reset()
+        now = timezone.now()
+        _, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.soon = make_competition('即将截止', reg_time_end=now + timedelta(days=2))
+        self.later = make_competition('稍后截止', reg_time_end=now + timedelta(days=5))
+        self.latest = make_competition('最晚截止', reg_time_end=now + timedelta(days=8))
+        # 没有报名截止时间的排在最后
+        self.no_deadline = make_competition('长期开放', reg_time_end=None)
+        make_competition('未排期', reg_time_start=None, reg_time_end=None, status=1)
+        make_competition('尚未开始', reg_time_start=now + timedelta(days=1))
+        make_competition('已截止', reg_time_start=now - timedelta(days=5), reg_time_end=now - timedelta(days=1))
+        make_competition('比赛已开始', comp_time_start=now - timedelta(hours=1))
+        self.client.force_authenticate(self.student)
+        submit(self.client, self.soon, self.teacher)
+
+    def feed_names(self, page_size=2):
+        names = []
+        url = f'{URL}open_to_me/?page_size={page_size}'
+        while url:
+            page = self.client.get(url).json()
+            names.extend(item['name'] for item in page['results'])
+            url = page['next']
+        return names
+
+    def test_open_competitions_not_yet_applied(self):
+        # 未排期的竞赛按保存的状态（报名进行中）处理，没有报名截止时间，排在最后
+        self.assertEqual(self.feed_names(), ['稍后截止', '最晚截止', '长期开放', '未排期'])
+
+    def test_matches_anti_join(self):
+        applied = CompetitionApplication.objects.filter(
+            student__user=self.student,
+        ).exclude(application_status='cancelled').values('competition_id')
+        expected = Competition.objects.open_for_registration().exclude(id__in=applied).order_by(
+            F('reg_time_end').asc(nulls_last=True), 'id',
+        )
+        self.assertEqual(self.feed_names(page_size=1), [c.name for c in expected])
+
+    def test_cancel_returns_competition_to_feed(self):
+        application = CompetitionApplication.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'{URL}{application.pk}/cancel/')
+        self.assertEqual(self.feed_names()[0], '即将截止')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            submit(self.client, self.later, self.teacher)
+        self.assertNotIn('稍后截止', self.feed_names())
+
+    def test_applied_set_is_cached(self):
+        self.feed_names(page_size=10)
+        # 已申请集合和开放集合都不查库，只查询本页竞赛
+        with self.assertNumQueries(1):
+            self.client.get(f'{URL}open_to_me/?page_size=10')
+
+    def test_teachers_are_forbidden(self):
+        self.client.force_authenticate(make_teacher('T0002')[0])
+        response = self.client.get(f'{URL}open_to_me/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationListPaginationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.client.force_authenticate(self.student)
+        for i in range(5):
+            submit(self.client, make_competition(f'竞赛{i}'), self.teacher)
+        # 部分申请提交时间相同，用于验证 id 作为并列排序键
+        moment = timezone.now()
+        ids = list(CompetitionApplication.objects.order_by('id').values_list('id', flat=True))
+        CompetitionApplication.objects.filter(id__in=ids[:3]).update(submission_time=moment)
+        CompetitionApplication.objects.filter(id__in=ids[3:]).update(submission_time=moment - timedelta(hours=1))
+        self.expected = ids
+
+    def walk(self, url):
+        ids = []
+        while url:
+            page = self.client.get(url).json()
+            ids.extend(item['id'] for item in page['results'])
+            url = page['next']
+        return ids
+
+    def test_keyset_pages_cover_all_applications(self):
+        self.assertEqual(self.walk(f'{URL}?page_size=2'), self.expected)
+        self.client.force_authenticate(self.teacher_user)
+        self.assertEqual(self.walk(f'{URL}?page_size=2'), self.expected)
+
+    def test_list_without_params_is_unpaginated(self):
+        response = self.client.get(URL)
+        self.assertEqual([item['id'] for item in response.json()], self.expected)
+
+    def test_no_count_query_unless_total_requested(self):
+        with QueryRecorder() as queries:
+            page = self.client.get(f'{URL}?page_size=2').json()
+        self.assertNotIn('total', page)
+        self.assertFalse([sql for sql, _ in queries.queries if 'COUNT(' in sql.upper()])
+
+    def test_total_is_cached_until_next_write(self):
+        self.assertEqual(self.client.get(f'{URL}?page_size=2&with_total=1').json()['total'], 5)
+        with QueryRecorder() as queries:
+            self.client.get(f'{URL}?page_size=2&with_total=1')
+        self.assertFalse([sql for sql, _ in queries.queries if 'COUNT(' in sql.upper()])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            submit(self.client, make_competition('新竞赛'), self.teacher)
+        self.assertEqual(self.client.get(f'{URL}?page_size=2&with_total=1').json()['total'], 6)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationQueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    """申请相关列表接口的查询数与申请数量无关"""
+
+    def setUp(self):
+        cache.clear()
+        open_index.reset()
+        self.teacher_user, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.created = 0
+        self.add_applications(2)
+
+    def add_applications(self, count):
+        self.client.force_authenticate(self.student)
+        for _ in range(count):
+            self.created += 1
+            submit(self.client, make_competition(f'竞赛{self.created}'), self.teacher)
+            make_competition(f'未申请竞赛{self.created}')
+        # 一半申请带报销记录，覆盖序列化报销信息的路径
+        for application in CompetitionApplication.objects.filter(reimbursement__isnull=True)[::2]:
+            CompetitionReimbursement.objects.create(
+                application=application, registration_fee=100, transportation_fee=0,
+                accommodation_fee=0, other_fee=0, total_amount=100, bank_name='银行',
+                bank_account='6222000000000000', account_name='学生', invoice='reimbursement_files/invoice.pdf',
+            )
+
+    def assert_list_budget(self, user, url, budget):
+        """budget 包含加载用户以及判断学生、教师身份的查询"""
+        def request():
+            # 每次请求重新加载用户，与真实请求一样不复用已缓存的学生、教师资料
+            self.client.force_authenticate(CustomUser.objects.get(pk=user.pk))
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertConstantQueries(request, lambda: self.add_applications(5), budget=budget)
+
+    def test_student_application_list(self):
+        self.assert_list_budget(self.student, URL, budget=4)
+
+    def test_student_application_pages(self):
+        self.assert_list_budget(self.student, f'{URL}?page_size=50&with_total=1', budget=5)
+
+    def test_teacher_application_list(self):
+        self.assert_list_budget(self.teacher_user, URL, budget=3)
+
+    def test_teacher_center_application_list(self):
+        self.assert_list_budget(self.teacher_user, '/api/teacher/applications/?page_size=50', budget=2)
+
+    def test_popularity(self):
+        self.assert_list_budget(self.teacher_user, f'{URL}popularity/?page_size=50', budget=2)
+
+    def test_open_to_me(self):
+        self.assert_list_budget(self.student, f'{URL}open_to_me/?page_size=50', budget=5)
+
+    def test_budget_reports_queries(self):
+        with self.assertRaisesMessage(AssertionError, '超出预算 1 条'):
+            with query_budget(1):
+                list(CompetitionApplication.objects.all())
+                list(CompetitionApplication.objects.all())
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationRowsTests(APITestCase):
+    """列表快速路径的输出与 CompetitionApplicationSerializer 逐字节相同"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.client.force_authenticate(self.student)
+        make_sample_applications(self.client, self.teacher)
+
+    def request(self):
+        return Request(self.client.get(URL).wsgi_request)
+
+    def test_matches_serializer(self):
+        queryset = CompetitionApplication.objects.select_related('student', 'competition', 'teacher', 'reimbursement')
+        request = self.request()
+        expected = CompetitionApplicationSerializer(queryset, many=True, context={'request': request}).data
+        fields = rows.parse_fields(None)
+        actual = rows.render(rows.values(queryset, fields), fields, request)
+        self.assertEqual(actual, expected)
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_list_endpoint_matches_serializer(self):
+        queryset = CompetitionApplication.objects.all()
+        expected = CompetitionApplicationSerializer(queryset, many=True, context={'request': self.request()}).data
+        self.assertEqual(self.client.get(URL).content, JSONRenderer().render(expected))
+
+    def test_sparse_fields(self):
+        full = self.client.get(URL).json()
+        with QueryRecorder() as queries:
+            response = self.client.get(f'{URL}?fields=id,application_status,competition&page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page = response.json()
+        self.assertEqual(page['results'], [
+            {'id': item['id'], 'competition': item['competition'], 'application_status': item['application_status']}
+            for item in full[:2]
+        ])
+        # 未请求的教师、学生、报销信息不联表查询
+        sql = queries.queries[-1][0]
+        self.assertNotIn('teacher_center_teacherprofile', sql)
+        self.assertNotIn('competition_application_competitionreimbursement', sql)
+
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([item['id'] for item in rest['results']], [item['id'] for item in full[2:]])
+        self.assertEqual(list(rest['results'][0]), ['id', 'competition', 'application_status'])
+
+    def test_unknown_field(self):
+        response = self.client.get(f'{URL}?fields=id,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.json()['fields'])
+
+    def test_teacher_center_list(self):
+        self.client.force_authenticate(self.teacher_user)
+        expected = self.client.get(URL).json()
+        response = self.client.get('/api/teacher/applications/?fields=id,student,teacher_id')
+        self.assertEqual(response.json(), [
+            {'id': item['id'], 'student': item['student'], 'teacher_id': item['teacher_id']} for item in expected
+        ])
+
+    def test_status_filter(self):
+        self.client.force_authenticate(self.teacher_user)
+        expected = [item['id'] for item in self.client.get(URL).json() if item['application_status'] == 'pending']
+        for url in (URL, '/api/teacher/applications/'):
+            response = self.client.get(f'{url}?application_status=pending&fields=id,application_status')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([item['id'] for item in response.json()], expected)
+            self.assertEqual({item['application_status'] for item in response.json()}, {'pending'})
+
+        response = self.client.get(f'{URL}?application_status=unknown')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('application_status', response.json())
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationSideloadTests(APITestCase):
+    """include 参数：竞赛、教师在 included 中各出现一次，行中只保留 id"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        _, self.other_teacher = make_teacher('T0002')
+        self.competitions = [make_competition(f'竞赛{i}', description='很长的竞赛介绍' * 50) for i in range(2)]
+        for i in range(6):
+            self.client.force_authenticate(make_student(f'S{i:04d}'))
+            teacher = self.teacher if i % 3 else self.other_teacher
+            submit(self.client, self.competitions[i % 2], teacher)
+        self.client.force_authenticate(self.teacher_user)
+
+    def expand(self, body):
+        """把 included 中的对象代回行中，应与不带 include 的响应相同"""
+        competitions = {item['id']: item for item in body['included'].get('competitions', [])}
+        teachers = {item['teacher_id']: item for item in body['included'].get('teachers', [])}
+        rows = []
+        for item in body['results']:
+            item = dict(item)
+            if competitions:
+                item['competition'] = competitions[item['competition']]
+            if teachers:
+                item['teacher'] = teachers[item['teacher']]
+            rows.append(item)
+        return rows
+
+    def test_included_objects_appear_once(self):
+        embedded = self.client.get(URL).json()
+        with QueryRecorder() as queries:
+            response = self.client.get(f'{URL}?include=competition,teacher')
+        body = response.json()
+        self.assertEqual(len(body['results']), 4)
+        self.assertEqual(len(body['included']['competitions']), 2)
+        self.assertEqual([item['teacher_id'] for item in body['included']['teachers']], ['T0001'])
+        self.assertEqual(self.expand(body), embedded)
+        self.assertLess(len(response.content), len(self.client.get(URL).content))
+        # 列表一次，竞赛、教师各一次 in_bulk
+        self.assertEqual(len(queries), 3)
+
+    def test_paginated_include(self):
+        embedded = self.client.get(URL).json()
+        first = self.client.get(f'{URL}?include=competition&page_size=3').json()
+        self.assertEqual(set(first), {'next', 'results', 'included'})
+        self.assertNotIn('teachers', first['included'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(self.expand(first) + self.expand(second), embedded)
+
+    def test_include_follows_sparse_fields(self):
+        body = self.client.get(f'{URL}?fields=id,competition&include=competition,teacher').json()
+        self.assertEqual(set(body['included']), {'competitions'})
+        self.assertEqual(set(body['results'][0]), {'id', 'competition'})
+
+    def test_unknown_include(self):
+        response = self.client.get(f'{URL}?include=student')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('student', response.json()['include'])
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class CompiledSerializerTests(APITestCase):
+    """编译后的序列化器与原序列化器输出逐字节相同"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.client.force_authenticate(self.student)
+        make_sample_applications(self.client, self.teacher)
+        StudentProfile.objects.filter(user=self.student).update(name='张三', school='某大学', grade='2023')
+
+    def assert_conforms(self, serializer_class, queryset, context):
+        compiled = compile_serializer(serializer_class)
+        expected = serializer_class(queryset, many=True, context=context).data
+        actual = compiled(queryset, many=True, context=context).data
+        self.assertTrue(expected)
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+        for instance in queryset:
+            self.assertEqual(
+                JSONRenderer().render(compiled(instance, context=context).data),
+                JSONRenderer().render(serializer_class(instance, context=context).data),
+            )
+
+    def test_conformance(self):
+        request = Request(self.client.get(URL).wsgi_request)
+        cases = [
+            (CompetitionApplicationSerializer, CompetitionApplication.objects.select_related(
+                'student', 'competition', 'teacher', 'reimbursement')),
+            (CompetitionSerializer, Competition.objects.all()),
+            (CompetitionListSerializer, Competition.objects.all()),
+            (CompetitionPopularitySerializer, Competition.objects.all()),
+            (TeacherProfileSerializer, TeacherProfile.objects.all()),
+            (StudentProfileSerializer, StudentProfile.objects.all()),
+        ]
+        for serializer_class, queryset in cases:
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assert_conforms(serializer_class, queryset, {'request': request})
+                self.assert_conforms(serializer_class, queryset, {})
+
+    def test_compiled_once_per_class(self):
+        self.assertIs(compile_serializer(CompetitionSerializer), compile_serializer(CompetitionSerializer))
+        competitions = list(Competition.objects.all())
+        compile_serializer(CompetitionSerializer)(competitions, many=True).data
+        with mock.patch.object(CompetitionSerializer, 'get_fields') as get_fields:
+            compile_serializer(CompetitionSerializer)(competitions, many=True).data
+        get_fields.assert_not_called()
+
+    def test_overridden_representation_falls_back(self):
+        class Upper(TeacherProfileSerializer):
+            def to_representation(self, instance):
+                return {'name': instance.name.upper()}
+
+        teacher = TeacherProfile.objects.get(pk=self.teacher.pk)
+        self.assertEqual(compile_serializer(Upper)(teacher).data, {'name': teacher.name.upper()})
+
+    def test_read_endpoints(self):
+        application = CompetitionApplication.objects.order_by('id').first()
+        expected = CompetitionApplicationSerializer(
+            application, context={'request': Request(self.client.get(URL).wsgi_request)},
+        ).data
+        self.assertEqual(self.client.get(f'{URL}{application.pk}/').json(), json.loads(JSONRenderer().render(expected)))
+        profile = self.client.get('/api/student/profile/').json()
+        self.assertEqual(profile['name'], '张三')
+
+        # 写请求仍经过原序列化器校验
+        self.client.force_authenticate(self.teacher_user)
+        response = self.client.put('/api/teacher/updateProfile/', {'name': '李老师'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/teacher/profile/').json()['name'], '李老师')
+        response = self.client.post(f'{URL}{application.pk}/approve/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class RepeatedQueryMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        _, self.teacher = make_teacher()
+        self.student = make_student('S0001')
+        self.client.force_authenticate(self.student)
+        for i in range(4):
+            submit(self.client, make_competition(f'竞赛{i}'), self.teacher)
+
+    @override_settings(DETECT_REPEATED_QUERIES=True, REPEATED_QUERY_THRESHOLD=3)
+    def test_reports_n_plus_one_with_stack(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        # 经序列化器输出列表并去掉 select_related，模拟 N+1
+        unrelated = CompetitionApplication.objects.filter(student__user=self.student)
+        viewset = 'apps.competition_application.views.CompetitionApplicationViewSet'
+        with mock.patch(f'{viewset}.get_queryset', return_value=unrelated), \
+                mock.patch(f'{viewset}.list', mixins.ListModelMixin.list):
+            with self.assertLogs('utils.query_budget', level='WARNING') as logs:
+                client.get(URL)
+        output = '\n'.join(logs.output)
+        self.assertIn('执行了 4 次', output)
+        self.assertIn('FROM "competitions_competition"', output)
+        self.assertIn('tests.py', output)
+
+    @override_settings(DETECT_REPEATED_QUERIES=True)
+    def test_quiet_for_constant_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        with self.assertNoLogs('utils.query_budget', level='WARNING'):
+            client.get(URL)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class CompetitionQuotaConcurrencyTests(TransactionTestCase):
+    """多线程同时提交申请，验证名额不会超出"""
+
+    THREADS = 64
+    CAPACITY = 10
+
+    def setUp(self):
+        cache.clear()
+        _, self.teacher = make_teacher()
+        self.competition = make_competition()
+        self.students = [make_student(f'S{i:04d}') for i in range(self.THREADS)]
+        set_capacity(self.competition, self.CAPACITY)
+
+    def test_concurrent_submissions_never_oversubscribe(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('内存 SQLite 不支持多连接并发写入')
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def worker(student):
+            client = APIClient()
+            client.force_authenticate(student)
+            try:
+                barrier.wait()
+                results.append(submit(client, self.competition, self.teacher).status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(student,)) for student in self.students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(status.HTTP_201_CREATED), self.CAPACITY)
+        self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), self.THREADS - self.CAPACITY)
+        self.assertEqual(CompetitionApplication.objects.count(), self.CAPACITY)
+        self.assertEqual(CompetitionQuota.objects.get(competition=self.competition).used, self.CAPACITY)
+        self.competition.refresh_from_db()
+        self.assertEqual(self.competition.application_count, self.CAPACITY)
+        self.assertEqual(self.competition.pending_count, self.CAPACITY)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class ApplicationTransitionConcurrencyTests(TransactionTestCase):
+    """多线程同时审批、拒绝、撤销、批量审批同一批申请，每条申请只变化一次，计数与名额一致"""
+
+    THREADS = 32
+    APPLICATIONS = 4
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.teacher = make_teacher()
+        self.competition = make_competition()
+        set_capacity(self.competition, self.APPLICATIONS)
+        self.students = [make_student(f'S{i:04d}') for i in range(self.APPLICATIONS)]
+        client = APIClient()
+        for student in self.students:
+            client.force_authenticate(student)
+            submit(client, self.competition, self.teacher)
+        self.applications = list(CompetitionApplication.objects.order_by('id').select_related('student__user'))
+
+    def test_each_application_transitions_once(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('内存 SQLite 不支持多连接并发写入')
+        barrier = threading.Barrier(self.THREADS)
+        ids = [application.pk for application in self.applications]
+        successes = []
+        statuses = []
+
+        def worker(n):
+            client = APIClient()
+            application = self.applications[n % self.APPLICATIONS]
+            action = ('approve', 'reject', 'cancel', 'bulk')[n // self.APPLICATIONS % 4]
+            client.force_authenticate(application.student.user if action == 'cancel' else self.teacher_user)
+            try:
+                barrier.wait()
+                if action == 'bulk':
+                    response = client.post(f'{URL}bulk_transition/', {'ids': ids, 'status': 'rejected'},
+                                           format='json')
+                    successes.extend(item['id'] for item in response.json()['results']
+                                     if item['result'] == 'updated')
+                else:
+                    response = client.post(f'{URL}{application.pk}/{action}/')
+                    if response.status_code == status.HTTP_200_OK:
+                        successes.append(application.pk)
+                statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 每条申请恰好被一个请求修改，其余请求得到 409（已被并发处理）或 400（读到时已不在申报中）
+        self.assertEqual(sorted(successes), ids)
+        self.assertLessEqual(set(statuses), {status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST,
+                                             status.HTTP_409_CONFLICT})
+        self.assertFalse(CompetitionApplication.objects.filter(application_status='pending').exists())
+        self.assertEqual((reconcile_counters(), reconcile_quotas()), (0, 0))
+        rollup = TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first()
+        rebuild_rollups()
+        self.assertEqual(
+            TeacherApplicationRollup.objects.filter(teacher=self.teacher).values(*ROLLUP_FIELDS).first(), rollup,
+        )
@@ -0,0 +1,169 @@
+# apps/competition_application/transitions.py
+"""
+申请、流程、报销的状态机。
+
+合法的状态变化在下面的表中定义，每次变化都是一条带条件的
+UPDATE ... SET 状态=新状态, update_time=... WHERE id=... AND 状态=原状态，
+只写这两列，不经过 save()。条件不满足（已被并发修改）时函数返回 False，
+视图据此返回 409；不在表中的变化抛出 IllegalTransition。
+计数、名额、汇总等由各 *_transitioned 信号的接收方在同一事务中调整。
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CompetitionApplication, CompetitionReimbursement
+from .signals import (
+    application_transitioned, applications_transitioned, process_transitioned, reimbursement_transitioned,
+)
+
+# 合法的状态变化：当前状态 -> 可以变为的状态
+APPLICATION_TRANSITIONS = {
+    'pending': ('approved', 'rejected', 'cancelled'),
+}
+PROCESS_TRANSITIONS = {
+    'ongoing': ('ended',),
+}
+REIMBURSEMENT_TRANSITIONS = {
+    'pending': ('approved', 'rejected'),
+}
+
+
+class IllegalTransition(ValueError):
+    """请求的状态变化不在状态机中"""
+
+
+def can_transition(transitions, old_status, new_status):
+    return new_status in transitions.get(old_status, ())
+
+
+def _check(transitions, old_status, new_status):
+    if not can_transition(transitions, old_status, new_status):
+        raise IllegalTransition(f'不能从 {old_status} 变为 {new_status}')
+
+
+# transition_many 每条申请的处理结果
+UPDATED = 'updated'
+NOT_PENDING = 'not_pending'
+NOT_FOUND = 'not_found'
+
+
+def transition(application, new_status, expected='pending'):
+    """
+    把状态为 expected 的申请改为 new_status，成功返回 True；
+    申请已不是 expected（例如被并发审批或撤销）时不做修改并返回 False。
+    状态用条件更新修改，名额和计数在同一事务中由 application_transitioned 的接收方调整，
+    同一申请被并发处理时只生效一次。
+    """
+    _check(APPLICATION_TRANSITIONS, expected, new_status)
+    with transaction.atomic():
+        updated = CompetitionApplication.objects.filter(
+            pk=application.pk,
+            application_status=expected,
+        ).update(application_status=new_status, update_time=timezone.now())
+        if not updated:
+            return False
+        application_transitioned.send(
+            sender=CompetitionApplication,
+            application=application,
+            old_status=expected,
+            new_status=new_status,
+        )
+    application.refresh_from_db(fields=['application_status', 'update_time'])
+    return True
+
+
+def transition_many(ids, new_status, teacher_id, expected='pending'):
+    """
+    批量版本：把 teacher_id 名下、状态为 expected 的申请改为 new_status，返回 {id: 结果}。
+    结果为 UPDATED、NOT_PENDING（状态已不是 expected）或 NOT_FOUND（不存在或不属于该教师）。
+    在一个事务中用一条条件 UPDATE 修改，计数、名额、汇总由 applications_transitioned
+    的接收方按竞赛、教师合并调整，语句数与 ids 的数量无关。
+    """
+    _check(APPLICATION_TRANSITIONS, expected, new_status)
+    ids = list(dict.fromkeys(ids))
+    stamp = timezone.now()
+    with transaction.atomic():
+        # 先写后读：条件 UPDATE 取得行锁（SQLite 为写锁），之后按本次写入的时间区分哪些申请是这里修改的，
+        # 不在 UPDATE 之前读取状态，避免读锁升级为写锁时与并发的审批互相等待
+        CompetitionApplication.objects.filter(
+            pk__in=ids, teacher_id=teacher_id, application_status=expected,
+        ).update(application_status=new_status, update_time=stamp)
+        applications = {
+            application.pk: application
+            for application in CompetitionApplication.objects.filter(pk__in=ids, teacher_id=teacher_id).only(
+                'id', 'competition', 'student', 'teacher', 'process_status', 'application_status', 'update_time',
+            )
+        }
+        changed = [
+            application for application in applications.values()
+            if application.application_status == new_status and application.update_time == stamp
+        ]
+        if changed:
+            applications_transitioned.send(
+                sender=CompetitionApplication,
+                applications=changed,
+                old_status=expected,
+                new_status=new_status,
+            )
+    changed_ids = {application.pk for application in changed}
+    return {
+        pk: UPDATED if pk in changed_ids else NOT_PENDING if pk in applications else NOT_FOUND
+        for pk in ids
+    }
+
+
+def finish_process(application):
+    """
+    结束申请的流程，成功返回 True；流程已结束（包括被并发结束）时返回 False。
+    """
+    with transaction.atomic():
+        updated = CompetitionApplication.objects.filter(
+            pk=application.pk,
+            process_status='ongoing',
+        ).update(process_status='ended', update_time=timezone.now())
+        if not updated:
+            return False
+        process_transitioned.send(
+            sender=CompetitionApplication,
+            application=application,
+            old_status='ongoing',
+            new_status='ended',
+        )
+    application.refresh_from_db(fields=['process_status', 'update_time'])
+    return True
+
+
+def create_reimbursement(**fields):
+    """创建报销记录，教师汇总在同一事务中更新"""
+    with transaction.atomic():
+        reimbursement = CompetitionReimbursement.objects.create(**fields)
+        reimbursement_transitioned.send(
+            sender=CompetitionReimbursement,
+            reimbursement=reimbursement,
+            old_status=None,
+            new_status=reimbursement.status,
+        )
+    return reimbursement
+
+
+def review_reimbursement(reimbursement, new_status, comment=''):
+    """
+    审核待审核的报销，成功返回 True；读取之后已被并发审核时不做修改并返回 False。
+    """
+    old_status = reimbursement.status
+    _check(REIMBURSEMENT_TRANSITIONS, old_status, new_status)
+    with transaction.atomic():
+        updated = CompetitionReimbursement.objects.filter(
+            pk=reimbursement.pk,
+            status=old_status,
+        ).update(status=new_status, comment=comment, update_time=timezone.now())
+        if not updated:
+            return False
+        reimbursement_transitioned.send(
+            sender=CompetitionReimbursement,
+            reimbursement=reimbursement,
+            old_status=old_status,
+            new_status=new_status,
+        )
+    reimbursement.refresh_from_db(fields=['status', 'comment', 'update_time'])
+    return True
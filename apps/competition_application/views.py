@@ -1,11 +1,25 @@
 from rest_framework import viewsets, permissions, status, serializers, generics # 添加 serializers
 from .models import CompetitionApplication, CompetitionReimbursement
-from .serializers import CompetitionApplicationSerializer, CompetitionApplicationCreateSerializer,ReimbursementSerializer
+from .serializers import CompetitionApplicationSerializer, CompetitionApplicationCreateSerializer,ReimbursementSerializer, CompetitionPopularitySerializer, BulkTransitionSerializer, ApplicationEventSerializer
 from .permissions import IsOwnerOrTeacherAssigned
+from .transitions import (
+    APPLICATION_TRANSITIONS, REIMBURSEMENT_TRANSITIONS, can_transition,
+    create_reimbursement, finish_process, review_reimbursement, transition, transition_many,
+)
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.views import APIView
 from apps.student_center.models import StudentProfile
+from apps.competitions.models import Competition
+from apps.competitions.open_index import open_index
+from apps.competitions.pagination import CompetitionCursorPagination, CompetitionPopularityPagination
+from apps.competitions.serializers import CompetitionListSerializer
+from .caching import STUDENT, TEACHER, cached_for_owner
+from . import events
+from .feed import applied_competition_ids
+from .pagination import ApplicationCursorPagination
+from .rows import STATUS_QUERY_PARAM, ApplicationRowListMixin
+from utils.compiled_serializer import CompiledReadMixin, compile_serializer
 from utils.pdf_generator import CompetitionProcessPDF
 from rest_framework.decorators import action
 from django.http import FileResponse
@@ -18,14 +32,19 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
-class CompetitionApplicationViewSet(viewsets.ModelViewSet):
+# 读取之后申请已被并发处理（审批、撤销）时的提示，对应 409
+APPLICATION_CONFLICT = '申请已被他人处理，请刷新后重试'
+
+class CompetitionApplicationViewSet(ApplicationRowListMixin, CompiledReadMixin, viewsets.ModelViewSet):
     """
     提供学生的竞赛申请列表和创建、删除功能
     教师可以查看和审核分配给自己的申请
+    列表不经过序列化器，由 rows 模块直接生成，支持 ?fields= 只返回部分字段
     """
     queryset = CompetitionApplication.objects.all()
     serializer_class = CompetitionApplicationSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrTeacherAssigned]
+    pagination_class = ApplicationCursorPagination  # 带 page_size/cursor 参数时启用游标分页
 
     def get_serializer_class(self):
         if self.action in ['create']:
@@ -34,26 +53,33 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        logger.info(f"Getting queryset for user: {user}")
 
         if hasattr(user, 'teacher_profile'):
             # 教师只能看到分配给自己的申请
-            queryset = CompetitionApplication.objects.filter(
+            return CompetitionApplication.objects.filter(
                 teacher__teacher_id=user.teacher_id
-            ).select_related('student', 'competition', 'teacher')
-            logger.info(f"Teacher queryset count: {queryset.count()}")
-            return queryset
+            ).select_related('student', 'competition', 'teacher', 'reimbursement')
 
         if hasattr(user, 'student_profile'):
             # 学生只能看到自己的申请
-            queryset = CompetitionApplication.objects.filter(
+            return CompetitionApplication.objects.filter(
                 student=user.student_profile
-            ).select_related('competition', 'teacher')
-            logger.info(f"Student queryset count: {queryset.count()}")
-            return queryset
+            ).select_related('student', 'competition', 'teacher', 'reimbursement')
 
         return CompetitionApplication.objects.none()
 
+    def get_approximate_total(self, queryset):
+        """分页时附带的申请总数，按教师或学生缓存"""
+        user = self.request.user
+        if self.request.query_params.get(STATUS_QUERY_PARAM):
+            # 状态变化不递增缓存版本，按状态筛选时直接计数（走教师、学生的索引）
+            return queryset.count()
+        if hasattr(user, 'teacher_profile'):
+            return cached_for_owner(TEACHER, user.teacher_id, 'total', queryset.count)
+        if hasattr(user, 'student_profile'):
+            return cached_for_owner(STUDENT, user.student_profile.pk, 'total', queryset.count)
+        return 0
+
     def perform_create(self, serializer):
         user = self.request.user
         try:
@@ -62,6 +88,40 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
         except StudentProfile.DoesNotExist:
             raise serializers.ValidationError({"detail": "未找到学生信息。"})
 
+    @action(detail=False, methods=['get'])
+    def popularity(self, request):
+        """
+        各竞赛的申报中、已批准和全部申请数，按全部申请数从多到少排序。
+        读取竞赛上的计数字段，不对申请表做聚合；不带分页参数时返回第一页
+        """
+        queryset = Competition.objects.only('id', 'name', 'type', *Competition.COUNTER_FIELDS)
+        paginator = CompetitionPopularityPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        if page is None:
+            page = queryset.order_by('-application_count', 'id')[:paginator.page_size]
+            return Response(compile_serializer(CompetitionPopularitySerializer)(page, many=True).data)
+        return paginator.get_paginated_response(compile_serializer(CompetitionPopularitySerializer)(page, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='open_to_me')
+    def open_to_me(self, request):
+        """
+        报名进行中、当前学生尚未申请的竞赛，按报名截止时间排序，游标分页。
+        开放集合来自进程内索引，已申请集合来自缓存，不对申请表做反连接查询
+        """
+        if not hasattr(request.user, 'student_profile'):
+            return Response(
+                {'detail': '只有学生可以查看'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        applied = applied_competition_ids(request.user.student_profile.pk)
+        paginator = CompetitionCursorPagination()
+        page = paginator.paginate_index(
+            request,
+            lambda position, limit: open_index.open_ids(after=position, exclude=applied, limit=limit),
+            queryset=Competition.objects.defer('description'),
+        )
+        return paginator.get_paginated_response(compile_serializer(CompetitionListSerializer)(page, many=True).data)
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """
@@ -72,20 +132,23 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
             application = self.get_object()
 
             # 检查申请状态
-            if application.application_status != 'pending':
+            if not can_transition(APPLICATION_TRANSITIONS, application.application_status, 'approved'):
                 return Response(
                     {'detail': '只能审批处于申报中的申请'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # 更新状态
-            application.application_status = 'approved'
-            application.save()
+            # 更新状态，期间被撤销或已被审批时不再修改
+            if not transition(application, 'approved'):
+                return Response(
+                    {'detail': APPLICATION_CONFLICT},
+                    status=status.HTTP_409_CONFLICT
+                )
             logger.info(f"Application {pk} approved successfully")
 
             return Response({
                 'detail': '申请已通过',
-                'data': self.get_serializer(application).data
+                'data': self.get_read_serializer(application).data
             })
 
         except Exception as e:
@@ -101,7 +164,7 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
         拒绝竞赛申请
         """
         application = self.get_object()
-        if application.application_status != 'pending':
+        if not can_transition(APPLICATION_TRANSITIONS, application.application_status, 'rejected'):
             return Response(
                 {'detail': '只能审核申报中的申请。'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -114,14 +177,40 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        application.application_status = 'rejected'
-        application.save()
+        if not transition(application, 'rejected'):
+            return Response(
+                {'detail': APPLICATION_CONFLICT},
+                status=status.HTTP_409_CONFLICT
+            )
 
         return Response({
             'status': 'rejected',
             'detail': '申请已被拒绝'
         }, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], url_path='bulk_transition')
+    def bulk_transition(self, request):
+        """
+        教师批量审批：{"ids": [...], "status": "approved" | "rejected"}。
+        在一个事务中用一条条件 UPDATE 处理全部申报中的申请，返回每个 id 的处理结果：
+        updated（已修改）、not_pending（已不是申报中）、not_found（不存在或不属于当前教师）
+        """
+        if not hasattr(request.user, 'teacher_profile'):
+            return Response(
+                {'detail': '只有指导教师可以审批申请。'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        outcomes = transition_many(ids, serializer.validated_data['status'], request.user.teacher_id)
+        logger.info(f"Bulk {serializer.validated_data['status']} by {request.user.teacher_id}: "
+                    f"{len(ids)} requested")
+        return Response({
+            'updated': sum(1 for result in outcomes.values() if result == 'updated'),
+            'results': [{'id': pk, 'result': result} for pk, result in outcomes.items()],
+        })
+
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """
@@ -137,14 +226,17 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            if application.application_status != 'pending':
+            if not can_transition(APPLICATION_TRANSITIONS, application.application_status, 'cancelled'):
                 return Response(
                     {"detail": "只能撤销申报中的申请"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            application.application_status = 'cancelled'
-            application.save()
+            if not transition(application, 'cancelled'):
+                return Response(
+                    {"detail": APPLICATION_CONFLICT},
+                    status=status.HTTP_409_CONFLICT
+                )
 
             return Response({
                 "detail": "申请已成功撤销",
@@ -165,7 +257,10 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
             application.summary = request.FILES['summary']
         if request.FILES.get('certificate'):
             application.certificate = request.FILES['certificate']
-        application.save()
+        # 只写文件列，不覆盖并发修改的状态
+        application.save(update_fields=[
+            name for name in ('photo', 'summary', 'certificate') if request.FILES.get(name)
+        ] + ['update_time'])
         return Response({'detail': '文件上传成功'})
 
     @action(detail=True, methods=['post'])
@@ -202,8 +297,8 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                     float(reimbursement_data['other_fee'])
             )
 
-            # 创建报销记录
-            reimbursement = CompetitionReimbursement.objects.create(**reimbursement_data)
+            # 创建报销记录，同时计入教师汇总
+            reimbursement = create_reimbursement(**reimbursement_data)
 
             # 处理发票文件
             if 'invoice' in request.FILES:
@@ -232,7 +327,7 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                 # 更新数据库中的文件路径
                 relative_path = os.path.relpath(invoice_path, settings.MEDIA_ROOT)
                 reimbursement.invoice = relative_path
-                reimbursement.save()
+                reimbursement.save(update_fields=['invoice', 'update_time'])
 
             return Response({
                 'detail': '报销申请提交成功',
@@ -267,11 +362,19 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            reimbursement.status = status_input
-            reimbursement.comment = comment
-            reimbursement.save()
+            if not can_transition(REIMBURSEMENT_TRANSITIONS, reimbursement.status, status_input):
+                return Response(
+                    {'detail': '只能审核待审核的报销申请'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if not review_reimbursement(reimbursement, status_input, comment):
+                return Response(
+                    {'detail': '报销申请已被其他人审核，请刷新后重试'},
+                    status=status.HTTP_409_CONFLICT
+                )
 
-            serializer = self.get_serializer(application)
+            serializer = self.get_read_serializer(application)
             return Response(serializer.data)
 
         except Exception as e:
@@ -349,12 +452,15 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # 更新流程状态
-            application.process_status = 'ended'
-            application.save()
+            # 条件更新流程状态，并发结束时只生效一次
+            if not finish_process(application):
+                return Response(
+                    {'detail': '流程已被他人结束，请刷新后重试'},
+                    status=status.HTTP_409_CONFLICT
+                )
 
             # 返回更新后的数据
-            serializer = self.get_serializer(application)
+            serializer = self.get_read_serializer(application)
             return Response({
                 'detail': '流程已成功结束',
                 'data': serializer.data
@@ -366,6 +472,12 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=True, methods=['get'], url_path='timeline')
+    def timeline(self, request, pk=None):
+        """申请的状态变化记录，按发生顺序排列"""
+        application = self.get_object()
+        return Response(compile_serializer(ApplicationEventSerializer)(events.timeline(application.pk), many=True).data)
+
     @action(detail=True, methods=['get'])
     def generate_pdf(self, request, pk=None):
         """生成流程PDF"""
@@ -398,7 +510,7 @@ class CompetitionApplicationViewSet(viewsets.ModelViewSet):
                         )
 
                 # 生成PDF
-                pdf_generator = CompetitionProcessPDF(application)
+                pdf_generator = CompetitionProcessPDF(application, events.milestones(events.timeline(application.pk)))
                 pdf_content = pdf_generator.generate()
 
                 if not pdf_content:
@@ -498,8 +610,10 @@ class UploadFilesView(APIView):
                 application.certificate = f'competition_files/application_{application.id}/certificate_{application.id}.pdf'
                 uploaded_files.append('证书')
 
-            # 保存文件路径到数据库
-            application.save()
+            # 保存文件路径到数据库，只写文件列，不覆盖并发修改的状态
+            application.save(update_fields=[
+                name for name in ('photo', 'summary', 'certificate') if name in request.FILES
+            ] + ['update_time'])
 
             return Response({
                 'detail': f'成功上传: {", ".join(uploaded_files)}',
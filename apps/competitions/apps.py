@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CompetitionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.competitions"
+
+    def ready(self):
+        import apps.competitions.signals  # 注册信号
+        import apps.competitions.search  # 注册检索索引
+        import apps.competitions.autocomplete  # 注册输入联想索引
+        import apps.competitions.facets  # 注册分面计数索引
+        import apps.competitions.calendar_index  # 注册日历区间索引
+        import apps.competitions.open_index  # 注册报名进行中竞赛的索引
+        import apps.competitions.hot_queries  # 登记热点查询（explain_hot_queries）
@@ -0,0 +1,140 @@
+# apps/competitions/autocomplete.py
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .indexing import CatalogIndex, register
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:  # 未安装 pypinyin 时不支持拼音首字母补全
+    lazy_pinyin = None
+
+# 匹配类型，数值越小越相关
+RANK_NAME_PREFIX = 0
+RANK_PINYIN_PREFIX = 1
+RANK_INFIX = 2
+
+# 名称中间片段的最小长度，过短的片段没有补全价值
+MIN_INFIX_LENGTH = 2
+# 大于任何字符，prefix + KEY_END 是以 prefix 开头的键的上界
+KEY_END = '\U0010ffff'
+
+def normalize(text):
+    return ''.join((text or '').lower().split())
+
+
+def pinyin_initials(text):
+    """返回拼音首字母，例如 “网络安全CTF” -> “wlaqctf”"""
+    if lazy_pinyin is None or not text:
+        return ''
+    return normalize(''.join(lazy_pinyin(text, style=Style.FIRST_LETTER)))
+
+
+class CompetitionAutocomplete(CatalogIndex):
+    """
+    竞赛名称输入联想。
+
+    所有补全键（名称、拼音首字母、名称中间片段）归一化后排序存放在列表中，
+    前缀查询用 bisect 定位区间。每个键的排序得分（匹配类型、名称长度、
+    报名截止时间）与查询无关，建索引时预先算成整数名次，
+    查询时对区间内的名次排序后取前 N 个不同的竞赛。
+    竞赛变更只标记为脏，下一次查询时才重建列表。
+    """
+    fields = ('id', 'name', 'reg_time_end')
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.rows = {}
+        self._dirty = True
+        self._keys = []
+        self._doc_ids = array('q')
+        self._scores = {}
+
+    def add(self, row):
+        self.rows[row['id']] = (row['name'] or '', row['reg_time_end'])
+        self._dirty = True
+
+    def discard(self, pk):
+        if self.rows.pop(pk, None) is not None:
+            self._dirty = True
+
+    def _recency(self, doc_id):
+        reg_time_end = self.rows[doc_id][1]
+        return reg_time_end.timestamp() if reg_time_end else float('-inf')
+
+    def _build_arrays(self):
+        """生成排序后的补全键列表，以及每种排序下各个键的名次"""
+        entries = []  # (补全键, 匹配类型, 竞赛 id)
+        for doc_id, (name, _) in self.rows.items():
+            key = normalize(name)
+            if not key:
+                continue
+            entries.append((key, RANK_NAME_PREFIX, doc_id))
+            initials = pinyin_initials(name)
+            if initials and initials != key:
+                entries.append((initials, RANK_PINYIN_PREFIX, doc_id))
+            for offset in range(1, len(key) - MIN_INFIX_LENGTH + 1):
+                entries.append((key[offset:], RANK_INFIX, doc_id))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._doc_ids = array('q', (doc_id for _, _, doc_id in entries))
+
+        recency = {doc_id: self._recency(doc_id) for doc_id in self.rows}
+        sort_keys = {
+            'relevance': lambda i: (
+                entries[i][1], len(self.rows[entries[i][2]][0]), -recency[entries[i][2]], entries[i][2],
+            ),
+            'recent': lambda i: (-recency[entries[i][2]], entries[i][2]),
+        }
+        self._scores = {}
+        for name, sort_key in sort_keys.items():
+            # score[i] 为第 i 个键在该排序下的名次，position[名次] 反查键的下标
+            position = array('q', sorted(range(len(entries)), key=sort_key))
+            score = array('q', bytes(8 * len(entries)))
+            for rank_no, i in enumerate(position):
+                score[i] = rank_no
+            self._scores[name] = (score, position)
+        self._dirty = False
+
+    def _prefix_range(self, prefix):
+        """二分查找以 prefix 开头的补全键所在的区间 [start, end)"""
+        return bisect_left(self._keys, prefix), bisect_right(self._keys, prefix + KEY_END)
+
+    def _top(self, order, start, end, limit):
+        """
+        在 [start, end) 区间内按得分从小到大取出前 limit 个不同的竞赛。
+        名次是互不相同的整数，区间内的名次整体排序（C 实现），再依次反查竞赛并去重
+        """
+        score, position = self._scores[order]
+        seen, result = set(), []
+        for rank_no in sorted(score[start:end]):
+            doc_id = self._doc_ids[position[rank_no]]
+            if doc_id not in seen:
+                seen.add(doc_id)
+                result.append(doc_id)
+                if len(result) == limit:
+                    break
+        return result
+
+    def suggest(self, query, limit=10, order='relevance'):
+        """
+        返回前缀匹配的竞赛 [{'id': ..., 'name': ...}, ...]。
+        order 为 relevance 时按匹配类型、名称长度排序，recent 时按报名截止时间倒序。
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        with self._lock:
+            if self._dirty:
+                self._build_arrays()
+            start, end = self._prefix_range(prefix)
+            top = self._top(order, start, end, limit)
+            return [{'id': doc_id, 'name': self.rows[doc_id][0]} for doc_id in top]
+
+
+autocomplete_index = register(CompetitionAutocomplete())
@@ -0,0 +1,50 @@
+# apps/competitions/boundary_index.py
+
+from bisect import bisect_right
+
+from django.utils import timezone
+
+from . import status as competition_status
+from .indexing import CatalogIndex, register
+
+
+class StatusBoundaryIndex(CatalogIndex):
+    """
+    所有竞赛的状态时间点（报名开始、报名截止、比赛开始、比赛结束）。
+    竞赛状态按当前时间推导，没有写入时也会随时间变化；
+    “已到达的时间点个数” 在任一竞赛跨过时间点时加一，与变更序号一起作为目录版本。
+    竞赛变更只标记为脏，下一次查询时重新排序。
+    """
+    fields = ('id', *competition_status.BOUNDARY_FIELDS)
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self._stamps = {}    # 竞赛 id -> 时间点时间戳元组
+        self._order = None   # 全部时间点，升序
+
+    def add(self, row):
+        stamps = tuple(
+            row[field].timestamp() for field in competition_status.BOUNDARY_FIELDS if row[field] is not None
+        )
+        if stamps:
+            self._stamps[row['id']] = stamps
+            self._order = None
+
+    def discard(self, pk):
+        if self._stamps.pop(pk, None) is not None:
+            self._order = None
+
+    def passed(self, now=None):
+        """now 时刻已到达的时间点个数"""
+        self.ensure_fresh()
+        now = (now or timezone.now()).timestamp()
+        with self._lock:
+            if self._order is None:
+                self._order = sorted(stamp for stamps in self._stamps.values() for stamp in stamps)
+            return bisect_right(self._order, now)
+
+
+boundary_index = register(StatusBoundaryIndex())
@@ -0,0 +1,116 @@
+# apps/competitions/caching.py
+
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from utils.swr_cache import StaleWhileRevalidateCache
+
+from .boundary_index import boundary_index
+from .changes import current_seq
+
+# 竞赛目录在导入或编辑竞赛时变化，此外竞赛状态由当前时间推导，
+# 任一竞赛跨过报名、比赛的时间点时输出中的 status 也会变化。
+# 目录版本号由变更日志的序号（见 changes.py）和已到达的时间点个数组成，
+# 两者任一变化时旧版本的缓存条目和 ETag 随之过期。
+# 过期条目在重新计算完成前仍会返回给其他请求，见 utils/swr_cache.py。
+catalog_cache = StaleWhileRevalidateCache('catalog')
+
+
+def catalog_version():
+    return f'{current_seq()}.{boundary_index.passed()}'
+
+
+def _request_key(request):
+    """
+    同一协议、主机、路径、查询参数和 Accept 的请求共享一个缓存条目；
+    分页响应中的 next 链接是绝对地址，不同主机或协议的内容不能混用
+    """
+    query = sorted(request.GET.lists())
+    return f"{request.scheme}://{request.get_host()}{request.path}|{query}|{request.META.get('HTTP_ACCEPT', '')}"
+
+
+def _etag(version, request_key):
+    """
+    由目录版本号和请求计算强 ETag，
+    同一版本下同一请求的响应内容必然相同
+    """
+    return '"{}"'.format(hashlib.sha1(f'{version}|{request_key}'.encode('utf-8')).hexdigest())
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def _finish(response, etag):
+    response['ETag'] = etag
+    # 每次都向服务器确认，内容未变时得到 304
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def cached_catalog_response(request, compute):
+    """
+    返回目录接口的缓存响应。
+
+    If-None-Match 与当前 ETag 一致时直接返回 304，不查库也不序列化；
+    否则从缓存取响应内容，缓存过期时只有一个进程调用 compute() 重新生成，
+    其余请求暂时返回旧内容（附带旧内容自己的 ETag）。
+    """
+    version = catalog_version()
+    request_key = _request_key(request)
+    etag = _etag(version, request_key)
+    if _etag_matches(request, etag):
+        return _finish(HttpResponseNotModified(), etag)
+
+    rendered = []
+
+    def render():
+        response = compute()
+        if hasattr(response, 'render'):
+            response.render()
+        rendered.append(response)
+        if response.status_code != 200 or getattr(response, 'streaming', False):
+            return None
+        return response.content, response['Content-Type'], etag
+
+    cached = catalog_cache.get(request_key, render, version=version)
+    if rendered:
+        # 本次请求负责了重新计算，直接返回生成的响应
+        response = rendered[-1]
+        return _finish(response, etag) if cached is not None else response
+    content, content_type, served_etag = cached
+    if served_etag != etag and _etag_matches(request, served_etag):
+        return _finish(HttpResponseNotModified(), served_etag)
+    return _finish(HttpResponse(content, content_type=content_type), served_etag)
+
+
+def cache_catalog(view_func):
+    """用于函数视图的目录缓存装饰器，只缓存 GET / HEAD 请求"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_func(request, *args, **kwargs)
+        return cached_catalog_response(request, lambda: view_func(request, *args, **kwargs))
+    return wrapper
+
+
+class CatalogCacheMixin:
+    """
+    用于目录 ViewSet 的缓存：GET 请求在进入 DRF 之前检查 ETag 和缓存，
+    只适用于不区分用户的公开接口
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        return cached_catalog_response(
+            request,
+            lambda: super(CatalogCacheMixin, self).dispatch(request, *args, **kwargs),
+        )
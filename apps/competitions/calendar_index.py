@@ -0,0 +1,140 @@
+# apps/competitions/calendar_index.py
+
+from array import array
+
+from .indexing import CatalogIndex, register
+
+# 日历中的两类时间段：时间段名称 -> (开始字段, 结束字段)
+WINDOWS = {
+    'registration': ('reg_time_start', 'reg_time_end'),
+    'competition': ('comp_time_start', 'comp_time_end'),
+}
+KIND_CODES = {kind: code for code, kind in enumerate(WINDOWS)}
+KINDS = list(WINDOWS)
+
+
+def _stamp(value):
+    return value.timestamp() if value is not None else None
+
+
+class _IntervalTree:
+    """
+    静态区间树：区间按起点排序后存放在数组中，把数组看作隐式的平衡二叉搜索树
+    （区间 [lo, hi) 的根为中点），每个节点额外记录子树内的最大终点。
+    重叠查询时跳过最大终点早于查询起点的子树，以及起点晚于查询终点的右子树，
+    复杂度 O(log n + k)。
+    """
+
+    def __init__(self, intervals):
+        intervals.sort()
+        self.starts = array('d', (interval[0] for interval in intervals))
+        self.ends = array('d', (interval[1] for interval in intervals))
+        self.payloads = [interval[2:] for interval in intervals]
+        self.max_ends = array('d', self.ends)
+        self._augment(0, len(intervals))
+
+    def _augment(self, lo, hi):
+        # 后序遍历计算子树最大终点；树高为 log n，递归深度有限
+        if lo >= hi:
+            return float('-inf')
+        mid = (lo + hi) // 2
+        best = max(self.ends[mid], self._augment(lo, mid), self._augment(mid + 1, hi))
+        self.max_ends[mid] = best
+        return best
+
+    def overlapping(self, start, end):
+        """返回与 [start, end) 重叠（起点 < end 且终点 >= start）的区间下标"""
+        found = []
+        starts, ends, max_ends = self.starts, self.ends, self.max_ends
+        stack = [(0, len(starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if max_ends[mid] < start:
+                continue
+            stack.append((lo, mid))
+            if starts[mid] < end:
+                if ends[mid] >= start:
+                    found.append(mid)
+                stack.append((mid + 1, hi))
+        return found
+
+
+class CompetitionCalendarIndex(CatalogIndex):
+    """
+    竞赛日历索引：报名时间段和比赛时间段放在同一棵区间树中。
+    只有一端时间的时间段按时间点处理，两端都为空的不进入日历。
+    竞赛变更只标记为脏，下一次查询时重建区间树。
+    """
+    fields = ('id', 'name', 'link', 'type', 'status', *(field for pair in WINDOWS.values() for field in pair))
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.rows = {}
+        self._tree = None
+
+    def add(self, row):
+        self.rows[row['id']] = row
+        self._tree = None
+
+    def discard(self, pk):
+        if self.rows.pop(pk, None) is not None:
+            self._tree = None
+
+    def _build_tree(self):
+        intervals = []
+        for doc_id, row in self.rows.items():
+            for kind, (start_field, end_field) in WINDOWS.items():
+                start, end = _stamp(row[start_field]), _stamp(row[end_field])
+                if start is None and end is None:
+                    continue
+                start = end if start is None else start
+                end = start if end is None else end
+                intervals.append((start, max(start, end), doc_id, KIND_CODES[kind]))
+        self._tree = _IntervalTree(intervals)
+
+    def overlapping(self, start, end, kinds=None):
+        """
+        返回时间段与 [start, end) 重叠的竞赛，按最早重叠时间段的起点排序：
+        [{'id', 'name', 'type', 'status', 时间字段..., 'windows': [时间段名称]}, ...]
+        kinds 限定时间段类型，默认两类都包含。
+        """
+        wanted = 0
+        for kind in kinds or KINDS:
+            wanted |= 1 << KIND_CODES[kind]
+        self.ensure_fresh()
+        with self._lock:
+            if self._tree is None:
+                self._build_tree()
+            tree = self._tree
+            starts, payloads = tree.starts, tree.payloads
+            matches = {}  # 竞赛 id -> [最早重叠起点, 重叠时间段的位掩码]
+            for i in tree.overlapping(start.timestamp(), end.timestamp()):
+                doc_id, code = payloads[i]
+                bit = 1 << code
+                if not wanted & bit:
+                    continue
+                match = matches.get(doc_id)
+                if match is None:
+                    matches[doc_id] = [starts[i], bit]
+                else:
+                    match[0] = min(match[0], starts[i])
+                    match[1] |= bit
+
+            rows = self.rows
+            windows = {
+                mask: [kind for kind in KINDS if mask & (1 << KIND_CODES[kind])]
+                for mask in range(1, 1 << len(KINDS))
+            }
+            return [
+                dict(rows[doc_id], windows=windows[mask])
+                for doc_id, (_, mask) in sorted(matches.items(), key=lambda item: (item[1][0], item[0]))
+            ]
+
+
+calendar_index = register(CompetitionCalendarIndex())
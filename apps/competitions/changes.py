@@ -0,0 +1,54 @@
+# apps/competitions/changes.py
+
+from django.core.cache import cache
+
+# 竞赛目录变更日志。
+# 每次写入 Competition 都会递增一个全局序号，并记录该序号对应的竞赛 id，
+# 各进程内的索引通过比较序号增量同步，而不必重新加载整张表。
+# 多进程部署时依赖共享缓存（见 settings.CACHES）。
+SEQ_KEY = 'competitions:change_seq'
+ENTRY_KEY = 'competitions:change:{}'
+JOURNAL_TTL = 24 * 60 * 60
+
+# 一次回放的最大条目数，超过后直接全量重建更划算
+MAX_REPLAY = 500
+
+
+def current_seq():
+    """获取当前最新的变更序号"""
+    return cache.get(SEQ_KEY, 0)
+
+
+def record_change(ids):
+    """
+    记录一批竞赛的变更（新增、修改或删除），返回新的序号
+    """
+    ids = sorted(set(ids))
+    if not ids:
+        return current_seq()
+    cache.add(SEQ_KEY, 0, None)
+    seq = cache.incr(SEQ_KEY)
+    cache.set(ENTRY_KEY.format(seq), ids, JOURNAL_TTL)
+    return seq
+
+
+def changes_since(seq):
+    """
+    返回 (最新序号, 自 seq 之后变更过的竞赛 id 集合)。
+    日志已过期、缓存被清空或积压过多时 id 集合为 None，调用方应全量重建。
+    """
+    latest = current_seq()
+    if latest == seq:
+        return latest, set()
+    if latest < seq or latest - seq > MAX_REPLAY:
+        return latest, None
+
+    keys = [ENTRY_KEY.format(n) for n in range(seq + 1, latest + 1)]
+    entries = cache.get_many(keys)
+    if len(entries) != len(keys):
+        return latest, None
+
+    changed = set()
+    for ids in entries.values():
+        changed.update(ids)
+    return latest, changed
@@ -0,0 +1,199 @@
+# apps/competitions/facets.py
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils import timezone
+
+from . import status as competition_status
+from .indexing import CatalogIndex, register
+from .models import Competition
+
+# 可按时间窗口筛选的字段：查询参数前缀 -> 模型字段
+DATE_WINDOWS = {
+    'reg_end': 'reg_time_end',
+    'comp_start': 'comp_time_start',
+}
+
+STATUS_LABELS = dict(Competition.STATUS_CHOICES)
+
+
+class FacetQuery:
+    """
+    一次分面筛选的条件。types / statuses 为 None 表示不限，
+    windows 为 {模型字段: (起始, 截止)}，起始包含、截止不包含，任一端可为 None。
+    状态按 now 时刻计算（status.status_q），不使用保存的 status 字段
+    """
+
+    def __init__(self, types=None, statuses=None, windows=None, now=None):
+        self.types = types
+        self.statuses = statuses
+        self.windows = windows or {}
+        self.now = now or timezone.now()
+
+    def __bool__(self):
+        return self.types is not None or self.statuses is not None or bool(self.windows)
+
+    def apply(self, queryset):
+        """把条件应用到 ORM 查询，与分面计数的口径一致"""
+        if self.types is not None:
+            queryset = queryset.filter(type__in=self.types)
+        if self.statuses is not None:
+            queryset = queryset.filter(reduce(
+                or_, [competition_status.status_q(status, self.now) for status in self.statuses], Q(pk__in=[]),
+            ))
+        for field, (start, end) in self.windows.items():
+            if start is not None:
+                queryset = queryset.filter(**{f'{field}__gte': start})
+            if end is not None:
+                queryset = queryset.filter(**{f'{field}__lt': end})
+        return queryset
+
+
+class CompetitionFacetIndex(CatalogIndex):
+    """
+    竞赛分面计数的位图索引。
+
+    每个竞赛占用一个槽位，按类型维护整数位图；
+    四个状态时间点各维护按时间排序的 (时间戳, 槽位) 数组，时间窗口用二分查找定位。
+    计数时对位图求与再数 1 的个数，不需要对整张表做 GROUP BY。
+    状态位图在查询时由时间点数组按 now 推导，与 status.compute_status 一致，
+    不依赖 status_engine 是否已经推进；未排期的竞赛按保存的 status 计入。
+    """
+    fields = ('id', 'type', 'status', *competition_status.BOUNDARY_FIELDS)
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self._slots = {}                      # 竞赛 id -> 槽位
+        self._rows = {}                       # 槽位 -> (类型, 未排期时保存的状态, {字段: 时间戳})
+        self._free = []
+        self._size = 0
+        self.all_bits = 0
+        self.scheduled_bits = 0
+        self.type_bits = defaultdict(int)
+        self.unscheduled_bits = defaultdict(int)  # 未排期竞赛：保存的状态 -> 位图
+        self.dates = {field: [] for field in competition_status.BOUNDARY_FIELDS}
+        self._status_cache = None             # (各时间点已到达的条目数, {状态: 位图})
+
+    def add(self, row):
+        slot = self._free.pop() if self._free else self._size
+        self._size = max(self._size, slot + 1)
+        bit = 1 << slot
+        self._slots[row['id']] = slot
+        self.all_bits |= bit
+        self.type_bits[row['type'] or ''] |= bit
+        stamps = {}
+        for field in competition_status.BOUNDARY_FIELDS:
+            if row[field] is not None:
+                stamps[field] = row[field].timestamp()
+                insort(self.dates[field], (stamps[field], slot))
+        stored = None
+        if stamps:
+            self.scheduled_bits |= bit
+        else:
+            stored = row['status']
+            self.unscheduled_bits[stored] |= bit
+        self._rows[slot] = (row['type'] or '', stored, stamps)
+        self._status_cache = None
+
+    def discard(self, pk):
+        slot = self._slots.pop(pk, None)
+        if slot is None:
+            return
+        type_, stored, stamps = self._rows.pop(slot)
+        mask = ~(1 << slot)
+        self.all_bits &= mask
+        self.scheduled_bits &= mask
+        bitmaps = [(self.type_bits, type_)]
+        if not stamps:
+            bitmaps.append((self.unscheduled_bits, stored))
+        for bitmap, key in bitmaps:
+            bitmap[key] &= mask
+            if not bitmap[key]:
+                del bitmap[key]
+        for field, stamp in stamps.items():
+            entries = self.dates[field]
+            del entries[bisect_left(entries, (stamp, slot))]
+        self._free.append(slot)
+        self._status_cache = None
+
+    def _slot_bits(self, entries):
+        # 先在字节数组中置位再整体转换，避免逐个对大整数做或运算
+        buffer = bytearray((self._size + 7) // 8)
+        for _, slot in entries:
+            buffer[slot >> 3] |= 1 << (slot & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def _window_bits(self, field, start, end):
+        entries = self.dates[field]
+        lo = 0 if start is None else bisect_left(entries, (start.timestamp(), -1))
+        hi = len(entries) if end is None else bisect_left(entries, (end.timestamp(), -1))
+        return self._slot_bits(entries[lo:hi])
+
+    def _status_bits(self, now):
+        """
+        now 时刻各状态的位图。按优先级依次取 “该时间点已到达” 的槽位，减去更高优先级已认领的；
+        只有任一时间点被跨过或索引变化后才重新计算
+        """
+        stamp = now.timestamp()
+        passed = tuple(
+            bisect_right(self.dates[field], (stamp, float('inf'))) for field in competition_status.BOUNDARY_FIELDS
+        )
+        if self._status_cache is None or self._status_cache[0] != passed:
+            by_status = defaultdict(int, self.unscheduled_bits)
+            decided = 0
+            for (status, field), count in zip(competition_status.BOUNDARIES, passed):
+                reached = self._slot_bits(self.dates[field][:count]) & ~decided
+                by_status[status] |= reached
+                decided |= reached
+            by_status[competition_status.NOT_STARTED] |= self.scheduled_bits & ~decided
+            self._status_cache = (passed, {status: bits for status, bits in by_status.items() if bits})
+        return self._status_cache[1]
+
+    def _union(self, bitmaps, keys):
+        bits = 0
+        for key in keys:
+            bits |= bitmaps.get(key, 0)
+        return bits
+
+    def facets(self, query):
+        """
+        返回 {'total': 命中数, 'type': {类型: 数量}, 'status': {状态: 数量}}。
+        某一维的计数应用除该维以外的全部条件，前端据此显示切换选项后的结果数。
+        """
+        self.ensure_fresh()
+        with self._lock:
+            status_bits = self._status_bits(query.now)
+            base = self.all_bits
+            for field, (start, end) in query.windows.items():
+                base &= self._window_bits(field, start, end)
+            type_mask = base if query.types is None else self._union(self.type_bits, query.types)
+            status_mask = base if query.statuses is None else self._union(status_bits, query.statuses)
+
+            type_counts = {}
+            for type_, bits in self.type_bits.items():
+                count = (bits & base & status_mask).bit_count()
+                if count:
+                    type_counts[type_] = count
+            status_counts = {}
+            for status, bits in status_bits.items():
+                count = (bits & base & type_mask).bit_count()
+                if count:
+                    status_counts[status] = count
+            return {
+                'total': (base & type_mask & status_mask).bit_count(),
+                'type': dict(sorted(type_counts.items(), key=lambda item: (-item[1], item[0]))),
+                'status': {
+                    status: {'label': STATUS_LABELS.get(status, ''), 'count': count}
+                    for status, count in sorted(status_counts.items())
+                },
+            }
+
+
+facet_index = register(CompetitionFacetIndex())
@@ -0,0 +1,84 @@
+# apps/competitions/filters.py
+
+from datetime import datetime, time
+
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from .facets import DATE_WINDOWS, FacetQuery
+from .search import search_index
+
+
+class CompetitionSearchFilter(filters.SearchFilter):
+    """
+    用全文检索索引代替 name__icontains，覆盖名称、类型和描述。
+    结果注解 search_rank（在检索结果中的名次，0 为最相关），
+    查询集没有指定排序时按相关度排序
+    """
+    max_results = 1000
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        ids = search_index.match_ids(' '.join(terms), limit=self.max_results)
+        # 没有命中时同样注解，按相关度分页时排序字段总是存在
+        rank = Case(*(When(id=pk, then=Value(i)) for i, pk in enumerate(ids)), output_field=IntegerField())
+        queryset = queryset.filter(id__in=ids).annotate(search_rank=rank)
+        if not queryset.query.order_by:
+            queryset = queryset.order_by('search_rank', 'id')
+        return queryset
+
+
+def _split(params, name):
+    """支持 ?type=a&type=b 和 ?type=a,b 两种写法"""
+    values = []
+    for value in params.getlist(name):
+        values.extend(part.strip() for part in value.split(',') if part.strip())
+    return values or None
+
+
+def parse_moment(name, value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: '无效的日期，应为 YYYY-MM-DD 或 ISO 8601 时间。'})
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.get_current_timezone())
+    return moment
+
+
+def parse_facet_query(params):
+    """
+    从查询参数解析分面筛选条件：
+    type、status 可多选；{reg_end,comp_start}_after 为起始（包含），_before 为截止（不包含）
+    """
+    statuses = _split(params, 'status')
+    if statuses is not None:
+        try:
+            statuses = [int(status) for status in statuses]
+        except ValueError:
+            raise ValidationError({'status': '状态应为整数。'})
+
+    windows = {}
+    for prefix, field in DATE_WINDOWS.items():
+        after, before = params.get(f'{prefix}_after'), params.get(f'{prefix}_before')
+        if after or before:
+            windows[field] = (
+                parse_moment(f'{prefix}_after', after) if after else None,
+                parse_moment(f'{prefix}_before', before) if before else None,
+            )
+    return FacetQuery(types=_split(params, 'type'), statuses=statuses, windows=windows)
+
+
+class CompetitionFacetFilter(filters.BaseFilterBackend):
+    """按类型、状态和时间窗口筛选，口径与分面计数（facets.py）一致"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = parse_facet_query(request.query_params)
+        return query.apply(queryset) if query else queryset
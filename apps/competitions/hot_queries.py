@@ -0,0 +1,40 @@
+# apps/competitions/hot_queries.py
+"""
+请求路径上的竞赛查询，由 explain_hot_queries 命令检查执行计划。
+查询形状与接口相同（列表不加载 description，按分页器的排序和游标条件），参数为示例值。
+"""
+from django.utils import timezone
+
+from utils.explain_advisor import hot_query
+
+from .models import Competition
+from .pagination import CompetitionCursorPagination, CompetitionPopularityPagination
+
+
+def _list():
+    return Competition.objects.defer('description')
+
+
+@hot_query('competitions.list')
+def competition_list():
+    return CompetitionCursorPagination().page_queryset(_list())
+
+
+@hot_query('competitions.list_next_page')
+def competition_list_next_page():
+    return CompetitionCursorPagination().page_queryset(_list(), (timezone.now(), 1))
+
+
+@hot_query('competitions.open')
+def competition_open():
+    return CompetitionCursorPagination().page_queryset(_list().open_for_registration())
+
+
+@hot_query('competitions.popular')
+def competition_popular():
+    return CompetitionPopularityPagination().page_queryset(_list())
+
+
+@hot_query('competitions.popular_next_page')
+def competition_popular_next_page():
+    return CompetitionPopularityPagination().page_queryset(_list(), (10, 1))
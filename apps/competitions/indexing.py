@@ -0,0 +1,116 @@
+# apps/competitions/indexing.py
+
+import threading
+
+from .changes import changes_since, current_seq
+from .models import Competition
+from .snapshot import current_snapshot
+
+_registry = []
+
+
+def register(index):
+    """注册进程内索引，模型写入信号会同步到所有已注册的索引"""
+    _registry.append(index)
+    return index
+
+
+def registered_indexes():
+    return list(_registry)
+
+
+class CatalogIndex:
+    """
+    进程内的竞赛目录索引基类。
+
+    第一次查询时全量加载；之后每次查询前通过变更日志
+    （见 changes.py）只重新读取变更过的竞赛。有最新的目录快照（见 snapshot.py）时
+    从快照读取，不查数据库。
+    子类实现 clear / add / discard 三个方法维护自己的数据结构。
+    """
+    fields = ('id', 'name')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._seq = 0
+
+    @property
+    def is_built(self):
+        return self._built
+
+    def clear(self):
+        raise NotImplementedError
+
+    def add(self, row):
+        raise NotImplementedError
+
+    def discard(self, pk):
+        raise NotImplementedError
+
+    def ensure_fresh(self):
+        """查询前调用，保证索引与数据库一致"""
+        with self._lock:
+            if not self._built:
+                self.rebuild()
+                return
+            seq, changed = changes_since(self._seq)
+            if changed is None:
+                self.rebuild()
+            elif changed:
+                self.refresh(changed, snapshot=current_snapshot())
+                self._seq = seq
+            else:
+                self._seq = seq
+
+    def rebuild(self):
+        with self._lock:
+            snapshot = current_snapshot()
+            if snapshot is not None:
+                seq, rows = snapshot.version, snapshot.rows(self.fields)
+            else:
+                # 先读序号再加载数据，加载期间的变更会在下次查询时回放
+                seq = current_seq()
+                rows = Competition.objects.values(*self.fields).iterator(chunk_size=2000)
+            self.clear()
+            for row in rows:
+                self.add(row)
+            self._seq = seq
+            self._built = True
+
+    def refresh(self, ids, snapshot=None):
+        """
+        重新读取指定竞赛，已不存在的从索引中删除。
+        snapshot 必须已包含这些变更，写入信号中调用时不传，直接读数据库
+        """
+        with self._lock:
+            if snapshot is not None:
+                rows = snapshot.rows(self.fields, ids)
+            else:
+                rows = Competition.objects.filter(id__in=ids).values(*self.fields)
+            found = {row['id']: row for row in rows}
+            for pk in ids:
+                self.discard(pk)
+                if pk in found:
+                    self.add(found[pk])
+
+    def apply_instance(self, instance):
+        """模型保存后立即更新本进程的索引"""
+        with self._lock:
+            if not self._built:
+                return
+            row = {field: getattr(instance, field) for field in self.fields}
+            self.discard(instance.pk)
+            self.add(row)
+
+    def apply_delete(self, pk):
+        with self._lock:
+            if self._built:
+                self.discard(pk)
+
+    def reset(self):
+        """丢弃已加载的数据，下次查询时重新加载"""
+        with self._lock:
+            self.clear()
+            self._built = False
+            self._seq = 0
@@ -0,0 +1,563 @@
+# apps/competitions/ingestion.py
+
+import asyncio
+import codecs
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import requests
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .sync import sync_competitions
+
+logger = logging.getLogger(__name__)
+
+# 竞赛数据导入：并发抓取多个数据源，经各自的适配器转换为统一格式，
+# 按数据源优先级去重合并后一次性同步到数据库（见 sync.py）。
+# 数据源在 settings.COMPETITION_FEEDS 中配置，入口为 import_competitions.py。
+
+REQUEST_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+# 同时抓取的数据源数量上限，也是连接池大小
+MAX_CONCURRENT_FEEDS = 8
+# 重试间隔（秒），每次重试翻倍
+RETRY_BACKOFF = 1.0
+
+# 定义状态映射
+STATUS_MAPPING = {
+    "报名未开始": 0,
+    "报名进行中": 1,
+    "报名已结束": 2,
+    "比赛进行中": 3,
+    "比赛已结束": 4,
+    "已经结束": 4,
+    3: 3,  # 数字格式直接使用
+    # 根据需要添加其他状态映射
+}
+
+
+def load_feed_state(filename):
+    """
+    读取上次抓取记录，不存在或损坏时返回空字典。
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as state_file:
+            return json.load(state_file)
+    except (IOError, json.JSONDecodeError):
+        return {}
+
+
+def save_feed_state(state, filename):
+    """
+    先写临时文件再替换，避免中途失败留下损坏的记录。
+    """
+    tmp_filename = f'{filename}.tmp'
+    with open(tmp_filename, 'w', encoding='utf-8') as state_file:
+        json.dump(state, state_file, ensure_ascii=False)
+    os.replace(tmp_filename, filename)
+
+
+def make_session(pool_size=MAX_CONCURRENT_FEEDS):
+    """
+    创建共享的 HTTP 会话，同一主机的连接在多次请求之间复用。
+    重试由 fetch_with_retries 按数据源控制，这里不开启 urllib3 的重试。
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _abort(response, aborted):
+    """总时限已到：关闭连接，正在阻塞的读取随之结束"""
+    aborted.set()
+    # 响应开始后套接字只由响应对象持有，复制其描述符后关闭连接的读写两端；
+    # 不支持时（例如 Windows）在下一块数据到达后停止
+    try:
+        with socket.socket(fileno=os.dup(response.raw.fileno())) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except (OSError, ValueError):
+        pass
+
+
+def fetch_feed(session, url, state, filename, timeout=REQUEST_TIMEOUT, cancelled=None):
+    """
+    条件请求数据源，并把响应内容边下载边写入本地文件、计算 SHA-256。
+    数据源返回 304 时返回 None，否则返回新的抓取记录（etag、last_modified、sha256）。
+    timeout 为连接、等待响应和下载的总时限，超过时抛出 requests.Timeout；
+    下载完成时 cancelled 已被设置（调用方已放弃本次抓取）则丢弃内容，不替换文件。
+    """
+    deadline = time.monotonic() + timeout
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        digest = hashlib.sha256()
+        # 每次下载使用独立的临时文件，只有完整下载且未被放弃的一次才替换数据源文件
+        fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(filename) or '.', suffix='.tmp')
+        # requests 的 timeout 只限制单次读取，数据源持续慢速发送时由定时器在总时限到达时断开
+        aborted = threading.Event()
+        watchdog = threading.Timer(max(deadline - time.monotonic(), 0), _abort, (response, aborted))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            try:
+                with os.fdopen(fd, 'wb') as json_file:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if aborted.is_set():
+                            break
+                        digest.update(chunk)
+                        json_file.write(chunk)
+            except requests.RequestException as exc:
+                if aborted.is_set():
+                    raise requests.Timeout(f'下载超过 {timeout} 秒') from exc
+                raise
+            finally:
+                watchdog.cancel()
+            # 断开后的读取可能表现为正常结束，内容并不完整
+            if aborted.is_set():
+                raise requests.Timeout(f'下载超过 {timeout} 秒')
+            if cancelled is not None and cancelled.is_set():
+                os.unlink(tmp_filename)
+                return None
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            if os.path.exists(tmp_filename):
+                os.unlink(tmp_filename)
+            raise
+
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'sha256': digest.hexdigest(),
+    }
+
+
+_SEPARATOR_RE = re.compile(r'[\s,]*')
+_WHITESPACE_RE = re.compile(r'\s*')
+
+
+def iter_feed_items(filename, chunk_size=CHUNK_SIZE, path=('data', 'result')):
+    """
+    流式解析本地 JSON 文件中 path 指向的数组（默认 data.result）的每一项。
+    沿 path 逐层进入对象，路径以外的键值整体跳过，其他位置同名的数组不会被误认；
+    每次只在内存中保留当前读到的一段内容，不构造整份数据。
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    label = '.'.join(path)
+    buffer = ''
+    eof = False
+
+    with open(filename, 'rb') as json_file:
+        def read_more():
+            nonlocal buffer, eof
+            chunk = json_file.read(chunk_size)
+            eof = not chunk
+            buffer += utf8.decode(chunk, final=eof)
+            return not eof
+
+        def skip(pos):
+            """跳过空白，返回下一个字符的位置"""
+            while True:
+                pos = _WHITESPACE_RE.match(buffer, pos).end()
+                if pos < len(buffer):
+                    return pos
+                if not read_more():
+                    raise ValueError(f"JSON 数据不完整：没有读到 {label} 数组。")
+
+        def expect(pos, char):
+            pos = skip(pos)
+            if buffer[pos] != char:
+                raise ValueError(f"JSON 数据格式不符：{label} 路径上应为 {char!r}。")
+            return pos + 1
+
+        def decode(pos):
+            """解析 pos 处的一个值；值恰好在已读内容的末尾结束时可能被截断（如数字），读取更多后重试"""
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not read_more():
+                        raise
+                    continue
+                if end < len(buffer) or not read_more():
+                    return value, end
+
+        # 定位 {"data": {"result": [
+        pos = 0
+        for name in path:
+            pos = expect(pos, '{')
+            while True:
+                pos = skip(pos)
+                if buffer[pos] == '}':
+                    logger.warning(f"数据中没有找到 {label} 数组。")
+                    return
+                key, pos = decode(pos)
+                pos = expect(pos, ':')
+                if key == name:
+                    break
+                _, pos = decode(skip(pos))
+                pos = skip(pos)
+                if buffer[pos] == ',':
+                    pos += 1
+                buffer, pos = buffer[pos:], 0
+        pos = expect(pos, '[')
+        buffer = buffer[pos:]
+
+        # 逐项解析，内容不完整时继续读取
+        pos = 0
+        while True:
+            pos = _SEPARATOR_RE.match(buffer, pos).end()
+            if pos >= len(buffer):
+                if not read_more():
+                    raise ValueError(f"JSON 数据不完整：{label} 数组没有结束。")
+                continue
+            if buffer[pos] == ']':
+                return
+            item, end = decode(pos)
+            yield item
+            buffer = buffer[end:]
+            pos = 0
+
+
+_DATETIME_PATTERNS = [
+    re.compile(r'^(\d{4})年(\d{1,2})月(\d{1,2})日 (\d{1,2}):(\d{1,2})(?::(\d{1,2}))?$'),
+    re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2})(?::(\d{1,2}))?$'),
+]
+
+
+def parse_datetime(date_str):
+    """
+    将字符串日期转换为当前时区的 aware datetime 对象。
+    支持 “2024年01月01日 08:00[:00]” 和 “2024-01-01 08:00[:00]” 两种格式，
+    使用预编译的正则匹配，同一时区下相同的字符串只解析一次。
+    """
+    if not isinstance(date_str, str):
+        return None
+    return _parse_datetime(date_str, timezone.get_current_timezone())
+
+
+@lru_cache(maxsize=4096)
+def _parse_datetime(date_str, tz):
+    # 结果与时区有关，时区是缓存键的一部分
+    for pattern in _DATETIME_PATTERNS:
+        match = pattern.match(date_str.strip())
+        if not match:
+            continue
+        try:
+            naive_dt = datetime(*(int(part) for part in match.groups(default='0')))
+        except ValueError:
+            break
+        return timezone.make_aware(naive_dt, tz)
+    logger.warning(f"无法解析日期字符串: {date_str}")
+    return None
+
+
+def map_status(status):
+    """
+    将状态字符串或整数映射为预定义的整数状态。
+    """
+    return STATUS_MAPPING.get(status, 0)  # 默认使用 0
+
+
+_adapters = {}
+
+
+def register_adapter(name):
+    """注册数据源适配器，settings.COMPETITION_FEEDS 中按名称引用"""
+    def decorator(cls):
+        _adapters[name] = cls
+        return cls
+    return decorator
+
+
+def get_adapter(name):
+    try:
+        return _adapters[name]()
+    except KeyError:
+        raise ValueError(f"未知的数据源适配器: {name}")
+
+
+class FeedAdapter:
+    """
+    数据源适配器：从本地文件中逐条读出原始记录，并转换为 sync_competitions 使用的字典。
+    子类实现 normalize，返回 None 表示跳过该记录。
+    """
+    result_path = ('data', 'result')
+
+    def normalize(self, event):
+        raise NotImplementedError
+
+    def records(self, filename):
+        for event in iter_feed_items(filename, path=self.result_path):
+            record = self.normalize(event)
+            if record is not None:
+                yield record
+
+
+@register_adapter('hello_ctftime')
+class HelloCTFtimeAdapter(FeedAdapter):
+    """Hello-CTFtime 格式：data.result 数组，中文状态和两种日期格式"""
+
+    def normalize(self, event):
+        name = event.get('name')
+        link = event.get('link')
+        competition_type = event.get('type')
+        readmore = event.get('readmore')  # 用于描述
+        status = map_status(event.get('status', 0))
+
+        # 解析时间
+        reg_time_start = parse_datetime(event.get('reg_time_start'))
+        reg_time_end = parse_datetime(event.get('reg_time_end'))
+        comp_time_start = parse_datetime(event.get('comp_time_start'))
+        comp_time_end = parse_datetime(event.get('comp_time_end'))
+
+        # 检查必填字段
+        if not all([name, link, competition_type, readmore, reg_time_start, reg_time_end, comp_time_start, comp_time_end]):
+            logger.warning(f"缺少必要字段，跳过比赛: {name}")
+            return None
+
+        return {
+            'name': name,
+            'link': link,
+            'type': competition_type,
+            'reg_time_start': reg_time_start,
+            'reg_time_end': reg_time_end,
+            'comp_time_start': comp_time_start,
+            'comp_time_end': comp_time_end,
+            'description': readmore,  # 使用 readmore 作为描述
+            'status': status,
+        }
+
+
+class FeedConfig:
+    """
+    一个数据源的配置。多个数据源包含同一竞赛时，配置中靠前的数据源优先。
+    timeout 为单次抓取（含下载）的总时限，retries 为失败后的重试次数。
+    """
+
+    def __init__(self, name, url, adapter='hello_ctftime', timeout=REQUEST_TIMEOUT, retries=2):
+        self.name = name
+        self.url = url
+        self.adapter = get_adapter(adapter)
+        self.timeout = timeout
+        self.retries = retries
+
+    @classmethod
+    def from_settings(cls, entries):
+        return [cls(**entry) for entry in entries]
+
+    def __repr__(self):
+        return f'<FeedConfig {self.name}>'
+
+
+class FeedOutcome:
+    """单个数据源的抓取结果"""
+    FETCHED = 'fetched'            # 内容有变化
+    NOT_MODIFIED = 'not_modified'  # 304
+    UNCHANGED = 'unchanged'        # 内容哈希与上次相同
+    FAILED = 'failed'
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.status = None
+        self.fetched = None
+        self.attempts = 0
+        self.elapsed_ms = 0.0
+        self.error = None
+        self.records = []
+
+    def as_dict(self):
+        return {
+            'feed': self.feed.name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'records': len(self.records),
+            'elapsed_ms': round(self.elapsed_ms, 1),
+            'error': self.error,
+        }
+
+
+class IngestionReport:
+    """一次导入的结果：各数据源的抓取结果、合并统计和同步统计"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.merged = 0
+        self.duplicates = 0
+        self.sync = None
+        self.elapsed_ms = 0.0
+
+    @property
+    def failed(self):
+        return [outcome for outcome in self.outcomes if outcome.status == FeedOutcome.FAILED]
+
+    def as_dict(self):
+        return {
+            'feeds': [outcome.as_dict() for outcome in self.outcomes],
+            'merged': self.merged,
+            'duplicates': self.duplicates,
+            'sync': self.sync.as_dict() if self.sync else None,
+            'elapsed_ms': round(self.elapsed_ms, 1),
+        }
+
+    def __str__(self):
+        feeds = '，'.join(f"{o.feed.name}: {o.status}" for o in self.outcomes)
+        sync = str(self.sync) if self.sync else '未同步'
+        return f"{feeds}；合并 {self.merged} 条（重复 {self.duplicates} 条）；{sync}"
+
+
+def _retryable(exc):
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else 0
+        return status >= 500 or status == 429
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+async def fetch_with_retries(session, feed, state, filename, outcome):
+    """
+    抓取一个数据源，超时或可重试的错误按指数退避重试。
+    总时限由 fetch_feed 在线程内执行，每次尝试结束后才开始下一次，
+    不会留下仍在下载、之后再覆盖数据源文件的线程
+    """
+    while True:
+        outcome.attempts += 1
+        cancelled = threading.Event()
+        try:
+            return await asyncio.to_thread(fetch_feed, session, feed.url, state, filename, feed.timeout, cancelled)
+        except asyncio.CancelledError:
+            # 任务被取消时线程仍会跑完本次下载，但不再替换文件
+            cancelled.set()
+            raise
+        except Exception as exc:
+            if outcome.attempts > feed.retries or not _retryable(exc):
+                raise
+            delay = RETRY_BACKOFF * 2 ** (outcome.attempts - 1)
+            logger.warning(f"数据源 {feed.name} 第 {outcome.attempts} 次抓取失败（{exc!r}），{delay:.1f} 秒后重试")
+            await asyncio.sleep(delay)
+
+
+def feed_filename(directory, feed):
+    return os.path.join(directory, f'feed-{feed.name}.json')
+
+
+async def collect(feeds, states, directory, session):
+    """
+    并发抓取所有数据源；只要有一个数据源内容变化，就解析所有已下载的数据源
+    （未变化的使用上次下载的文件），以便按优先级正确合并。
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FEEDS)
+
+    async def fetch(feed):
+        outcome = FeedOutcome(feed)
+        state = states.get(feed.name, {})
+        started = time.perf_counter()
+        async with semaphore:
+            try:
+                fetched = await fetch_with_retries(session, feed, state, feed_filename(directory, feed), outcome)
+            except Exception as exc:
+                outcome.status = FeedOutcome.FAILED
+                outcome.error = repr(exc)
+                logger.error(f"数据源 {feed.name} 抓取失败: {exc!r}")
+            else:
+                if fetched is None:
+                    outcome.status = FeedOutcome.NOT_MODIFIED
+                elif fetched['sha256'] == state.get('sha256'):
+                    outcome.status = FeedOutcome.UNCHANGED
+                    outcome.fetched = fetched
+                else:
+                    outcome.status = FeedOutcome.FETCHED
+                    outcome.fetched = fetched
+        outcome.elapsed_ms = (time.perf_counter() - started) * 1000
+        return outcome
+
+    outcomes = await asyncio.gather(*(fetch(feed) for feed in feeds))
+    if not any(outcome.status == FeedOutcome.FETCHED for outcome in outcomes):
+        return outcomes
+
+    async def parse(outcome):
+        filename = feed_filename(directory, outcome.feed)
+        if os.path.exists(filename):
+            outcome.records = await asyncio.to_thread(lambda: list(outcome.feed.adapter.records(filename)))
+
+    await asyncio.gather(*(parse(outcome) for outcome in outcomes))
+    return outcomes
+
+
+def _merge_key(name):
+    return ''.join(name.split()).lower()
+
+
+def merge_records(outcomes):
+    """
+    合并各数据源的记录，按名称（忽略空白和大小写）去重。
+    不同数据源之间以配置中靠前的为准，同一数据源内以后出现的为准。
+    返回 (合并后的记录列表, 重复条数)。
+    """
+    merged, owners, duplicates = {}, {}, 0
+    for outcome in outcomes:
+        for record in outcome.records:
+            key = _merge_key(record['name'])
+            owner = owners.get(key)
+            if owner is not None:
+                duplicates += 1
+                if owner != outcome.feed.name:
+                    continue
+            merged[key] = record
+            owners[key] = outcome.feed.name
+    return list(merged.values()), duplicates
+
+
+def run_ingestion(feeds, directory, state_filename, session=None):
+    """
+    执行一次导入，返回 IngestionReport。
+    数据库写入在事件循环结束后同步执行；同步成功后才保存各数据源的抓取记录，
+    失败的数据源保留原记录，下次重新抓取。
+    """
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    states = load_feed_state(state_filename)
+    own_session = session is None
+    session = session or make_session(min(len(feeds), MAX_CONCURRENT_FEEDS) or 1)
+    try:
+        outcomes = asyncio.run(collect(feeds, states, directory, session))
+    finally:
+        if own_session:
+            session.close()
+
+    report = IngestionReport(outcomes)
+    if any(outcome.status == FeedOutcome.FETCHED for outcome in outcomes):
+        records, report.duplicates = merge_records(outcomes)
+        report.merged = len(records)
+        if records:
+            report.sync = sync_competitions(records)
+        else:
+            logger.warning("没有找到任何比赛数据。")
+
+    for outcome in outcomes:
+        if outcome.fetched is not None:
+            states[outcome.feed.name] = outcome.fetched
+    save_feed_state(states, state_filename)
+
+    report.elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"竞赛数据导入完成: {report}")
+    return report
@@ -0,0 +1,26 @@
+# apps/competitions/management/commands/advance_competition_status.py
+
+from django.core.management.base import BaseCommand
+
+from apps.competitions.models import Competition
+from apps.competitions.status_engine import advance_statuses
+
+
+class Command(BaseCommand):
+    help = '按报名/比赛时间推进竞赛状态（建议每分钟由定时任务执行一次）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='忽略上次推进时间，校对所有竞赛的状态',
+        )
+
+    def handle(self, *args, **options):
+        result = advance_statuses(full=options['full'])
+        labels = dict(Competition.STATUS_CHOICES)
+        for status, count in sorted(result['changed'].items()):
+            self.stdout.write(f"{labels[status]}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"完成（{'全量校对' if result['full'] else '增量推进'}），耗时 {result['elapsed_ms']:.1f}ms"
+        ))
@@ -0,0 +1,27 @@
+# apps/competitions/management/commands/cache_stats.py
+
+from django.core.management.base import BaseCommand
+
+from utils.swr_cache import all_stats, registered_caches
+
+
+class Command(BaseCommand):
+    help = '查看热点接口缓存的命中（hit）、旧值（stale）、未命中（miss）次数'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='输出后清零计数',
+        )
+
+    def handle(self, *args, **options):
+        for name, stats in all_stats().items():
+            total = sum(stats.values())
+            ratio = (stats['hit'] + stats['stale']) / total if total else 0.0
+            self.stdout.write(
+                f"{name}: hit={stats['hit']} stale={stats['stale']} miss={stats['miss']} "
+                f"命中率={ratio:.1%}"
+            )
+            if options['reset']:
+                registered_caches()[name].reset_stats()
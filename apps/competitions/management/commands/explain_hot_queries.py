@@ -0,0 +1,44 @@
+# apps/competitions/management/commands/explain_hot_queries.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.explain_advisor import PROBLEM_LABELS, advise, registered_queries
+
+
+class Command(BaseCommand):
+    help = '对登记的热点查询执行 EXPLAIN，发现全表扫描、额外排序或临时表时以非零状态退出'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='只检查这些查询，省略时检查全部')
+        parser.add_argument('--database', default=None, help='使用的数据库别名，默认按路由选择')
+        parser.add_argument('--plan', action='store_true', help='同时输出每个查询的执行计划')
+        parser.add_argument('--list', action='store_true', help='只列出登记的查询')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, (_, allow) in registered_queries().items():
+                allowed = f"（允许：{'、'.join(PROBLEM_LABELS[kind] for kind in sorted(allow))}）" if allow else ''
+                self.stdout.write(f"{name}{allowed}")
+            return
+        try:
+            report = advise(options['names'] or None, using=options['database'])
+        except KeyError as e:
+            raise CommandError(f"未登记的查询：{e.args[0]}")
+
+        flagged = 0
+        for name, result in report.items():
+            if result['problems']:
+                flagged += 1
+                self.stdout.write(self.style.ERROR(f"✗ {name}"))
+                for kind, detail in result['problems']:
+                    self.stdout.write(f"    {PROBLEM_LABELS[kind]}: {detail}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {name}"))
+            for kind, detail in result['allowed']:
+                self.stdout.write(f"    {PROBLEM_LABELS[kind]}（已允许）: {detail}")
+            if options['plan']:
+                for line in result['plan']:
+                    self.stdout.write(f"    | {line}")
+        if flagged:
+            raise CommandError(f"{flagged} 个查询的执行计划需要检查")
+        self.stdout.write(f"已检查 {len(report)} 个查询")
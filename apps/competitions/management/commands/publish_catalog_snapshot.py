@@ -0,0 +1,15 @@
+# apps/competitions/management/commands/publish_catalog_snapshot.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.competitions.snapshot import publish_snapshot, snapshot_path
+
+
+class Command(BaseCommand):
+    help = '生成竞赛目录快照（部署后或缓存清空后执行一次，之后由竞赛写入自动发布）'
+
+    def handle(self, *args, **options):
+        if not snapshot_path():
+            raise CommandError('未配置 CATALOG_SNAPSHOT_PATH')
+        version = publish_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"已发布快照 {snapshot_path()}，版本 {version}"))
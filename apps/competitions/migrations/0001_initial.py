@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Competition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='无标题', max_length=255)),
+                ('link', models.URLField(blank=True, max_length=500)),
+                ('type', models.CharField(blank=True, max_length=100)),
+                ('reg_time_start', models.DateTimeField(blank=True, null=True)),
+                ('reg_time_end', models.DateTimeField(blank=True, null=True)),
+                ('comp_time_start', models.DateTimeField(blank=True, null=True)),
+                ('comp_time_end', models.DateTimeField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('status', models.IntegerField(choices=[(0, '报名未开始'), (1, '报名进行中'), (2, '报名已结束'), (3, '比赛进行中'), (4, '比赛已结束')], default=0)),
+                ('application_count', models.IntegerField(default=0, editable=False)),
+                ('pending_count', models.IntegerField(default=0, editable=False)),
+                ('approved_count', models.IntegerField(default=0, editable=False)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['reg_time_start'], name='comp_reg_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['reg_time_end'], name='comp_reg_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['comp_time_start'], name='comp_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['comp_time_end'], name='comp_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['type', 'reg_time_end'], name='comp_type_reg_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['status', 'reg_time_end'], name='comp_status_reg_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['-application_count', 'id'], name='comp_popularity_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_tick', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
@@ -1,6 +1,35 @@
 # apps/competitions/models.py
 
 from django.db import models
+from django.db.models import Case, F, IntegerField, When
+from django.utils import timezone
+
+from . import status as competition_status
+
+
+class CompetitionQuerySet(models.QuerySet):
+
+    def in_status(self, status, now=None):
+        """筛选在 now 时刻处于指定状态的竞赛，条件由时间字段推导"""
+        return self.filter(competition_status.status_q(status, now or timezone.now()))
+
+    def open_for_registration(self, now=None):
+        """当前报名进行中的竞赛"""
+        return self.in_status(competition_status.REGISTRATION_OPEN, now)
+
+    def with_computed_status(self, now=None):
+        """附加 computed_status 字段：按时间计算出的实时状态，规则见 status.compute_status"""
+        now = now or timezone.now()
+        return self.annotate(computed_status=Case(
+            When(competition_status.unscheduled_q(), then=F('status')),
+            *[
+                When(competition_status.status_q(status, now), then=status)
+                for status, _ in competition_status.BOUNDARIES
+            ],
+            default=competition_status.NOT_STARTED,
+            output_field=IntegerField(),
+        ))
+
 
 class Competition(models.Model):
     STATUS_CHOICES = [
@@ -19,7 +48,55 @@ class Competition(models.Model):
     comp_time_start = models.DateTimeField(null=True, blank=True)
     comp_time_end = models.DateTimeField(null=True, blank=True)
     description = models.TextField(blank=True)  # 新增描述字段
-    status = models.IntegerField(choices=STATUS_CHOICES, default=0)
+    status = models.IntegerField(choices=STATUS_CHOICES, default=0)  # 由 status_engine 按时间增量更新
+    # 申请计数，由 competition_application.counters 用 F() 原子增减，reconcile_application_counters 修正偏差
+    application_count = models.IntegerField(default=0, editable=False)
+    pending_count = models.IntegerField(default=0, editable=False)
+    approved_count = models.IntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ('application_count', 'pending_count', 'approved_count')
+
+    objects = CompetitionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # 状态由这四个时间字段上的范围条件推导
+            models.Index(fields=['reg_time_start'], name='comp_reg_start_idx'),
+            models.Index(fields=['reg_time_end'], name='comp_reg_end_idx'),
+            models.Index(fields=['comp_time_start'], name='comp_start_idx'),
+            models.Index(fields=['comp_time_end'], name='comp_end_idx'),
+            # 按类型、状态筛选后仍按报名截止时间分页
+            models.Index(fields=['type', 'reg_time_end'], name='comp_type_reg_end_idx'),
+            models.Index(fields=['status', 'reg_time_end'], name='comp_status_reg_end_idx'),
+            # 按申请数排序（热门竞赛）
+            models.Index(fields=['-application_count', 'id'], name='comp_popularity_idx'),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    def save(self, *args, **kwargs):
+        # 计数只由条件更新维护，整行保存时不写回，避免用旧值覆盖并发的增减
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def current_status(self):
+        """
+        按时间计算的实时状态；四个时间都为空时使用保存的状态
+        """
+        return competition_status.compute_status(self, timezone.now())
+
+
+class StatusTick(models.Model):
+    """
+    status_engine 上一次推进状态的时间。只有一行（pk=1），
+    每次定时任务都是新进程，记录放在数据库中才能在各次运行之间共享
+    """
+    last_tick = models.DateTimeField(null=True)
+
+    SINGLETON_PK = 1
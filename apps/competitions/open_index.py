@@ -0,0 +1,98 @@
+# apps/competitions/open_index.py
+
+from bisect import bisect_right
+
+from django.utils import timezone
+
+from . import status as competition_status
+from .indexing import CatalogIndex, register
+
+INFINITY = float('inf')
+
+# 到达后报名不再进行的时间点：报名截止、比赛开始、比赛结束
+CLOSING_FIELDS = ('reg_time_end', 'comp_time_start', 'comp_time_end')
+
+
+def _stamp(value, default):
+    return value.timestamp() if value is not None else default
+
+
+def open_window(row):
+    """
+    竞赛处于报名进行中的时间区间 [开放, 关闭)，与 Competition.objects.open_for_registration() 的口径一致；
+    任何时刻都不会处于报名进行中的竞赛返回 None。未排期的竞赛按保存的状态，见 status.compute_status
+    """
+    if not any(row[field] is not None for field in competition_status.BOUNDARY_FIELDS):
+        return (-INFINITY, INFINITY) if row['status'] == competition_status.REGISTRATION_OPEN else None
+    if row['reg_time_start'] is None:
+        return None
+    opens = row['reg_time_start'].timestamp()
+    closes = min(_stamp(row[field], INFINITY) for field in CLOSING_FIELDS)
+    if closes <= opens:
+        return None
+    return opens, closes
+
+
+class OpenRegistrationIndex(CatalogIndex):
+    """
+    可能处于报名进行中的竞赛，及每个竞赛开放、关闭的时间。
+    是否开放在查询时按当前时间判断，索引内容只随竞赛写入变化，不需要随时间刷新。
+    顺序与目录分页一致：按报名截止时间升序，空值在后，id 为并列时的排序键。
+    竞赛变更只标记为脏，下一次查询时重新排序。
+    """
+    fields = ('id', 'status', *competition_status.BOUNDARY_FIELDS)
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self._windows = {}   # 竞赛 id -> (开放时间戳, 关闭时间戳, 排序键)
+        self._order = None   # 按排序键排好序的 [(报名截止时间戳, id)]
+
+    def add(self, row):
+        window = open_window(row)
+        if window is None:
+            return
+        key = (_stamp(row['reg_time_end'], INFINITY), row['id'])
+        self._windows[row['id']] = (*window, key)
+        self._order = None
+
+    def discard(self, pk):
+        if self._windows.pop(pk, None) is not None:
+            self._order = None
+
+    def _sorted(self):
+        if self._order is None:
+            self._order = sorted(entry[2] for entry in self._windows.values())
+        return self._order
+
+    def open_ids(self, now=None, after=None, exclude=frozenset(), limit=None):
+        """
+        按目录顺序返回 now 时刻报名进行中的竞赛 id，跳过 exclude 中的竞赛。
+        after 为分页游标 (报名截止时间, id)，只返回位于其后的竞赛。
+        """
+        self.ensure_fresh()
+        now = (now or timezone.now()).timestamp()
+        with self._lock:
+            order = self._sorted()
+            # 报名截止时间已过的一定已关闭，直接跳过
+            start = bisect_right(order, (now, INFINITY))
+            if after is not None:
+                value, tie = after
+                start = max(start, bisect_right(order, (_stamp(value, INFINITY), tie)))
+            found = []
+            windows = self._windows
+            for i in range(start, len(order)):
+                pk = order[i][1]
+                if pk in exclude:
+                    continue
+                opens, closes, _ = windows[pk]
+                if opens <= now < closes:
+                    found.append(pk)
+                    if limit is not None and len(found) >= limit:
+                        break
+            return found
+
+
+open_index = register(OpenRegistrationIndex())
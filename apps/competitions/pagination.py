@@ -0,0 +1,79 @@
+# apps/competitions/pagination.py
+
+from types import SimpleNamespace
+
+from django.db import models
+
+from utils.pagination import KeysetPagination
+
+from .models import Competition
+
+
+class CompetitionCursorPagination(KeysetPagination):
+    """
+    竞赛目录分页：按报名截止时间排序，id 作为并列时的唯一排序键
+    """
+    ordering = ('reg_time_end', 'id')
+    page_size = 20
+    max_page_size = 100
+
+    def paginate_snapshot(self, snapshot, request):
+        """
+        在目录快照上分页，返回本页竞赛在快照中的下标；不需要分页时返回 None。
+        游标格式与数据库分页相同，两条路径可以交替翻页。
+        """
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = Competition
+
+        position = self.decode_cursor(request)
+        start = 0 if position is None else snapshot.order_after(*position)
+        positions = snapshot.order[start:start + self.page_size + 1]
+        self.has_next = len(positions) > self.page_size
+        positions = list(positions[:self.page_size])
+        self.page = [SimpleNamespace(**snapshot.order_position(i)) for i in positions]
+        return positions
+
+    def paginate_index(self, request, select, queryset=None):
+        """
+        在进程内索引上分页，总是分页。select(position, limit) 按目录顺序
+        返回位于游标 position 之后的至多 limit 个竞赛 id，本页竞赛一次查询取出。
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = Competition
+
+        ids = select(self.decode_cursor(request), self.page_size + 1)
+        self.has_next = len(ids) > self.page_size
+        ids = ids[:self.page_size]
+        competitions = (queryset if queryset is not None else Competition.objects.all()).in_bulk(ids)
+        self.page = [competitions[pk] for pk in ids if pk in competitions]
+        return self.page
+
+
+class CompetitionPopularityPagination(KeysetPagination):
+    """
+    按申请数从多到少排序（热门竞赛），申请数来自竞赛上的计数字段，不需要聚合查询
+    """
+    ordering = ('-application_count', 'id')
+    page_size = 20
+    max_page_size = 100
+
+
+class CompetitionSearchPagination(KeysetPagination):
+    """
+    带检索词时按相关度分页：search_rank 为竞赛在检索结果中的名次（见 CompetitionSearchFilter），
+    每页请求重新检索，游标记录上一页最后一个竞赛的名次
+    """
+    ordering = ('search_rank', 'id')
+    page_size = 20
+    max_page_size = 100
+
+    def get_cursor_field(self, name):
+        if name == 'search_rank':
+            return models.IntegerField()
+        return super().get_cursor_field(name)
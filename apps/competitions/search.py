@@ -0,0 +1,263 @@
+# apps/competitions/search.py
+
+import heapq
+import math
+import re
+from collections import defaultdict
+
+from django.utils.html import escape
+
+from .indexing import CatalogIndex, register
+
+# 汉字（含扩展 A 区和兼容区）连续片段，或小写字母数字组成的单词
+_TOKEN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9]+')
+
+# 各字段在 BM25 词频中的权重
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'type': 2.0,
+    'description': 1.0,
+}
+
+SNIPPET_LENGTH = 80
+
+
+def _is_cjk(char):
+    # 分词正则只会匹配到汉字或 ASCII 字母数字
+    return not char.isascii()
+
+
+def tokenize(text):
+    """
+    分词：汉字按相邻两字切分（bigram），单个汉字保留为一个词；
+    字母数字按单词切分并转为小写。
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer((text or '').lower()):
+        run = match.group()
+        if _is_cjk(run[0]) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class CompetitionSearchIndex(CatalogIndex):
+    """
+    竞赛全文检索的倒排索引，使用 BM25 打分。
+
+    name / type / description 三个字段按 FIELD_WEIGHTS 加权合并词频。
+    查询单个汉字时，通过 “字 -> 包含该字的 bigram” 映射展开查询。
+    """
+    fields = ('id', 'name', 'type', 'description')
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.postings = defaultdict(dict)      # term -> {doc_id: 加权词频}
+        self.doc_terms = {}                    # doc_id -> {term: 加权词频}
+        self.doc_lengths = {}
+        self.documents = {}                    # doc_id -> 原始字段，用于高亮
+        self.char_terms = defaultdict(set)     # 汉字 -> 包含它的 bigram
+        self.total_length = 0.0
+
+    def add(self, row):
+        doc_id = row['id']
+        terms = defaultdict(float)
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(row.get(field)):
+                terms[token] += weight
+                length += weight
+
+        for term, tf in terms.items():
+            if term not in self.postings:
+                self._index_term_chars(term)
+            self.postings[term][doc_id] = tf
+        self.doc_terms[doc_id] = dict(terms)
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        self.documents[doc_id] = {field: row.get(field) or '' for field in FIELD_WEIGHTS}
+        self.documents[doc_id]['id'] = doc_id
+
+    def discard(self, pk):
+        terms = self.doc_terms.pop(pk, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(pk, None)
+            if not posting:
+                del self.postings[term]
+                self._unindex_term_chars(term)
+        self.total_length -= self.doc_lengths.pop(pk, 0.0)
+        self.documents.pop(pk, None)
+
+    def _index_term_chars(self, term):
+        if len(term) == 2 and _is_cjk(term[0]):
+            for char in term:
+                self.char_terms[char].add(term)
+
+    def _unindex_term_chars(self, term):
+        if len(term) == 2 and _is_cjk(term[0]):
+            for char in term:
+                self.char_terms[char].discard(term)
+                if not self.char_terms[char]:
+                    del self.char_terms[char]
+
+    def _query_groups(self, query):
+        """
+        把查询拆成若干组，组内为 “或”，组间为 “与”。
+        单个汉字展开为所有包含它的 bigram。
+        """
+        groups = []
+        for token in dict.fromkeys(tokenize(query)):
+            if len(token) == 1 and _is_cjk(token):
+                groups.append({token} | self.char_terms.get(token, set()))
+            else:
+                groups.append({token})
+        return groups
+
+    def _idf(self, term):
+        n = len(self.doc_lengths)
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query, limit=20):
+        """
+        返回按相关度排序的前 limit 条结果：[(doc_id, score), ...]。
+        优先返回包含全部查询词的竞赛，没有时退化为任一词命中。
+        """
+        self.ensure_fresh()
+        with self._lock:
+            groups = self._query_groups(query)
+            if not groups or not self.doc_lengths:
+                return []
+
+            # 每组命中的文档集合，从最小的开始求交集
+            group_docs = []
+            for group in groups:
+                docs = set()
+                for term in group:
+                    docs.update(self.postings.get(term, ()))
+                group_docs.append(docs)
+            group_docs.sort(key=len)
+            candidates = set(group_docs[0])
+            for docs in group_docs[1:]:
+                if not candidates:
+                    break
+                candidates &= docs
+            if not candidates:
+                # 没有同时命中所有词的结果，按任一词命中打分
+                candidates = set().union(*group_docs)
+
+            avg_length = self.total_length / len(self.doc_lengths)
+            k1, b = self.k1, self.b
+            scores = dict.fromkeys(candidates, 0.0)
+            for term in set().union(*groups):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = self._idf(term) * (k1 + 1)
+                # 候选集较小时按候选集查词频，否则遍历倒排表
+                if len(candidates) < len(posting):
+                    matches = ((doc_id, posting[doc_id]) for doc_id in candidates if doc_id in posting)
+                else:
+                    matches = ((doc_id, tf) for doc_id, tf in posting.items() if doc_id in scores)
+                for doc_id, tf in matches:
+                    norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf / (tf + norm)
+
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def results(self, query, limit=20):
+        """
+        返回可直接输出的检索结果，包含得分与高亮片段
+        """
+        with self._lock:
+            return [
+                {
+                    'id': doc_id,
+                    'name': self.documents[doc_id]['name'],
+                    'type': self.documents[doc_id]['type'],
+                    'score': round(score, 4),
+                    'highlight': self.highlight(doc_id, query),
+                }
+                for doc_id, score in self.search(query, limit=limit)
+            ]
+
+    def match_ids(self, query, limit=1000):
+        """返回命中的竞赛 id 列表（按相关度排序），供 ORM 过滤使用"""
+        return [doc_id for doc_id, _ in self.search(query, limit=limit)]
+
+    def highlight(self, doc_id, query):
+        """
+        返回各字段的高亮片段，命中部分用 <em></em> 包裹，其余内容已做 HTML 转义
+        """
+        document = self.documents.get(doc_id)
+        if document is None:
+            return {}
+        needles = set()
+        for group in self._query_groups(query):
+            needles.update(group)
+        return {
+            'name': _mark(document['name'], needles),
+            'type': _mark(document['type'], needles),
+            'description': _mark(document['description'], needles, snippet=True),
+        }
+
+
+def _mark(text, needles, snippet=False):
+    if not text:
+        return ''
+    lowered = text.lower()
+    spans = []
+    for needle in needles:
+        start = lowered.find(needle)
+        while start != -1:
+            spans.append((start, start + len(needle)))
+            start = lowered.find(needle, start + 1)
+    if not spans:
+        return escape(text[:SNIPPET_LENGTH]) if snippet else escape(text)
+
+    # 合并重叠的命中区间
+    spans.sort()
+    merged = [list(spans[0])]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    begin, finish = 0, len(text)
+    if snippet:
+        begin = max(0, merged[0][0] - SNIPPET_LENGTH // 4)
+        finish = min(len(text), begin + SNIPPET_LENGTH)
+
+    parts = []
+    cursor = begin
+    for start, end in merged:
+        if end <= begin or start >= finish:
+            continue
+        start, end = max(start, begin), min(end, finish)
+        parts.append(escape(text[cursor:start]))
+        parts.append('<em>' + escape(text[start:end]) + '</em>')
+        cursor = end
+    parts.append(escape(text[cursor:finish]))
+
+    result = ''.join(parts)
+    if snippet:
+        if begin > 0:
+            result = '…' + result
+        if finish < len(text):
+            result += '…'
+    return result
+
+
+search_index = register(CompetitionSearchIndex())
@@ -4,6 +4,9 @@ from rest_framework import serializers
 from .models import Competition
 
 class CompetitionSerializer(serializers.ModelSerializer):
+    # 状态按报名/比赛时间实时计算，不依赖保存的 status 是否已推进
+    status = serializers.IntegerField(source='current_status', read_only=True)
+
     class Meta:
         model = Competition
         fields = [
@@ -17,4 +20,15 @@ class CompetitionSerializer(serializers.ModelSerializer):
             'comp_time_end',
             'description',
             'status',
+        ]
+
+
+class CompetitionListSerializer(CompetitionSerializer):
+    """
+    目录列表使用的精简表示，不包含 description，详情接口才返回完整内容
+    """
+    class Meta(CompetitionSerializer.Meta):
+        fields = [
+            field for field in CompetitionSerializer.Meta.fields
+            if field != 'description'
         ]
\ No newline at end of file
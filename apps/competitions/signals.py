@@ -0,0 +1,68 @@
+# apps/competitions/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+from .models import Competition
+from .changes import record_change
+from .indexing import registered_indexes
+from .snapshot import publish_snapshot_safely
+
+# 批量写入（bulk_create / bulk_update / QuerySet.update）不会触发 post_save，
+# 执行批量写入的代码需要手动发送该信号，ids 为受影响的竞赛 id 列表
+catalog_changed = Signal()
+
+
+def _scheduled_commit(connection):
+    """当前事务中已登记的提交回调，没有时返回 None"""
+    for _, func, _ in connection.run_on_commit:
+        # 已执行过的回调（测试中 captureOnCommitCallbacks 执行后仍留在列表里）不再合并
+        if getattr(func, 'catalog_ids', None) is not None and not func.done:
+            return func
+    return None
+
+
+def _record_on_commit(ids):
+    # 事务提交后再写变更日志并发布目录快照，避免其他进程读到未提交的数据。
+    # 同一事务中的多次写入合并到一个回调：一条变更日志、一次快照发布。
+    # 回调登记在连接的 run_on_commit 中，提交或回滚后随之清空，不需要另外重置标记
+    connection = transaction.get_connection()
+    scheduled = _scheduled_commit(connection) if connection.in_atomic_block else None
+    if scheduled is not None:
+        scheduled.catalog_ids.update(ids)
+        return
+
+    def commit():
+        commit.done = True
+        record_change(commit.catalog_ids)
+        publish_snapshot_safely()
+
+    commit.catalog_ids = set(ids)
+    commit.done = False
+    transaction.on_commit(commit)
+
+
+@receiver(post_save, sender=Competition)
+def competition_saved(sender, instance, **kwargs):
+    """
+    竞赛保存后同步本进程的索引，并记录变更供其他进程增量同步
+    """
+    for index in registered_indexes():
+        index.apply_instance(instance)
+    _record_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=Competition)
+def competition_deleted(sender, instance, **kwargs):
+    for index in registered_indexes():
+        index.apply_delete(instance.pk)
+    _record_on_commit([instance.pk])
+
+
+@receiver(catalog_changed)
+def competitions_bulk_changed(sender, ids, **kwargs):
+    ids = list(ids)
+    for index in registered_indexes():
+        if index.is_built:
+            index.refresh(ids)
+    _record_on_commit(ids)
@@ -0,0 +1,329 @@
+# apps/competitions/snapshot.py
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import status as competition_status
+from .changes import current_seq
+from .models import Competition
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# 竞赛目录快照：每次竞赛写入提交后，把全部竞赛编码成一个不可变文件，
+# 各工作进程以只读 mmap 映射同一个文件，列表、详情和检索索引直接从中读取，
+# 不再各自查库和序列化。文件版本号即变更日志序号，与 current_seq() 一致时才使用。
+#
+# 文件格式：MAGIC | 头部长度(uint32) | 头部 JSON | 按 8 字节对齐的各列数据。
+# 定长列为 array 数组；变长列为 offsets(uint64, n+1) 加 UTF-8 数据两段。
+MAGIC = b'CPSNAP01'
+_HEADER = struct.Struct('<8sI')
+
+DATETIME_FIELDS = ('reg_time_start', 'reg_time_end', 'comp_time_start', 'comp_time_end')
+TEXT_FIELDS = ('name', 'link', 'type', 'description')
+ROW_FIELDS = ('id', *TEXT_FIELDS, 'status', *DATETIME_FIELDS)
+
+# 时间以 UTC 微秒整数保存，空值用最小值表示
+NULL_TIME = -(1 << 63)
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+def _micros(value):
+    if value is None:
+        return NULL_TIME
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros):
+    if micros == NULL_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def _render(data):
+    return JSONRenderer().render(data)
+
+
+class CatalogSnapshot:
+    """
+    只读的目录快照。对象本身不可变，文件被新版本替换后，
+    已映射的旧文件仍然有效，直到不再被引用。
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.inode = os.fstat(snapshot_file.fileno()).st_ino
+        self.path = path
+        view = memoryview(self._mmap)
+        magic, header_length = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f'不是竞赛目录快照文件: {path}')
+        header = json.loads(bytes(view[_HEADER.size:_HEADER.size + header_length]))
+        self.version = header['version']
+        self.database = header['database']
+        self.count = header['count']
+        base = _align(_HEADER.size + header_length)
+        self._columns = {
+            name: view[base + offset:base + offset + length].cast(typecode)
+            for name, (typecode, offset, length) in header['columns'].items()
+        }
+        self.ids = self._columns['id']
+        self.order = self._columns['reg_end_order']
+
+    # 读取
+
+    def _bytes(self, column, i):
+        offsets = self._columns[f'{column}.offsets']
+        return self._columns[f'{column}.data'][offsets[i]:offsets[i + 1]]
+
+    def _text(self, column, i):
+        return bytes(self._bytes(column, i)).decode('utf-8')
+
+    def position(self, pk):
+        """竞赛 id 在快照中的位置，不存在时返回 None"""
+        i = bisect_left(self.ids, pk)
+        if i < self.count and self.ids[i] == pk:
+            return i
+        return None
+
+    def row(self, i, fields=ROW_FIELDS):
+        row = {}
+        for field in fields:
+            if field in TEXT_FIELDS:
+                row[field] = self._text(field, i)
+            elif field in DATETIME_FIELDS:
+                row[field] = _datetime(self._columns[field][i])
+            else:
+                row[field] = self._columns[field][i]
+        return row
+
+    def rows(self, fields=ROW_FIELDS, ids=None):
+        """按 id 顺序返回竞赛行，ids 不为空时只返回其中存在的竞赛"""
+        if ids is None:
+            positions = range(self.count)
+        else:
+            positions = [self.position(pk) for pk in sorted(ids)]
+        for i in positions:
+            if i is not None:
+                yield self.row(i, fields)
+
+    def current_status(self, i, now):
+        """status.compute_status 在快照列上的实现：按时间推导，四个时间都为空时使用保存的状态"""
+        scheduled = False
+        for status, field in competition_status.BOUNDARIES:
+            value = self._columns[field][i]
+            if value != NULL_TIME:
+                scheduled = True
+                if value <= now:
+                    return status
+        return competition_status.NOT_STARTED if scheduled else self._columns['status'][i]
+
+    def _item(self, i, now, detail=False):
+        parts = [self._bytes('list_json', i)]
+        if detail:
+            parts.append(self._bytes('description_json', i))
+        parts.append(b',"status":%d}' % self.current_status(i, now))
+        return b''.join(parts)
+
+    def list_json(self, positions=None):
+        """列表接口的 JSON（与 CompetitionListSerializer 的输出逐字节一致）"""
+        now = _micros(timezone.now())
+        if positions is None:
+            positions = range(self.count)
+        return b'[' + b','.join(self._item(i, now) for i in positions) + b']'
+
+    def detail_json(self, pk):
+        """详情接口的 JSON，竞赛不存在时返回 None"""
+        i = self.position(pk)
+        if i is None:
+            return None
+        return self._item(i, _micros(timezone.now()), detail=True)
+
+    def _order_key(self, i):
+        reg_time_end = self._columns['reg_time_end'][i]
+        # 与分页一致：报名截止时间为空的排在最后
+        return (reg_time_end == NULL_TIME, reg_time_end, self.ids[i])
+
+    def order_after(self, value, tie):
+        """按 (reg_time_end, id) 排序时，位于游标 (value, tie) 之后的第一个下标"""
+        target = (value is None, _micros(value) if value is not None else NULL_TIME, tie)
+        return bisect_right(self.order, target, key=self._order_key)
+
+    def order_position(self, i):
+        return {'id': self.ids[i], 'reg_time_end': _datetime(self._columns['reg_time_end'][i])}
+
+
+# 写入
+
+def _encode(version, database, rows, list_fragments, description_fragments):
+    count = len(rows)
+    columns = {
+        'id': array('q', (row['id'] for row in rows)),
+        'status': array('b', (row['status'] for row in rows)),
+    }
+    for field in DATETIME_FIELDS:
+        columns[field] = array('q', (_micros(row[field]) for row in rows))
+    reg_time_end = columns['reg_time_end']
+    columns['reg_end_order'] = array('I', sorted(
+        range(count), key=lambda i: (reg_time_end[i] == NULL_TIME, reg_time_end[i], rows[i]['id'])
+    ))
+
+    variable = {field: [(row[field] or '').encode('utf-8') for row in rows] for field in TEXT_FIELDS}
+    variable['list_json'] = list_fragments
+    variable['description_json'] = description_fragments
+    for name, values in variable.items():
+        offsets = array('Q', [0])
+        for value in values:
+            offsets.append(offsets[-1] + len(value))
+        columns[f'{name}.offsets'] = offsets
+        columns[f'{name}.data'] = b''.join(values)
+
+    layout, sections, offset = {}, [], 0
+    for name, data in columns.items():
+        raw = data.tobytes() if isinstance(data, array) else data
+        typecode = data.typecode if isinstance(data, array) else 'B'
+        layout[name] = [typecode, offset, len(raw)]
+        padding = _align(len(raw)) - len(raw)
+        sections.append(raw + b'\0' * padding)
+        offset += len(raw) + padding
+
+    header = json.dumps({
+        'version': version,
+        'database': database,
+        'count': count,
+        'columns': layout,
+    }).encode('utf-8')
+    prefix = _HEADER.pack(MAGIC, len(header)) + header
+    return [prefix + b'\0' * (_align(len(prefix)) - len(prefix))] + sections
+
+
+def _read_version(path):
+    try:
+        with open(path, 'rb') as snapshot_file:
+            magic, header_length = _HEADER.unpack(snapshot_file.read(_HEADER.size))
+            if magic != MAGIC:
+                return None
+            return json.loads(snapshot_file.read(header_length))['version']
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def snapshot_path():
+    return getattr(settings, 'CATALOG_SNAPSHOT_PATH', None)
+
+
+@contextmanager
+def _exclusive_lock(path):
+    """跨进程的排他锁，Unix 使用 flock，Windows 锁定锁文件的第一个字节"""
+    with open(path, 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+            return
+        # LK_LOCK 在锁被占用时重试约 10 秒，仍拿不到时抛出 OSError
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def publish_snapshot(path=None):
+    """
+    生成并发布当前目录的快照，返回快照版本号；未配置快照路径时返回 None。
+    先写临时文件再原子替换；多个进程同时发布时，不会用旧版本覆盖新版本。
+    """
+    from .serializers import CompetitionListSerializer
+    from utils.compiled_serializer import compile_serializer
+
+    path = path or snapshot_path()
+    if not path:
+        return None
+    # 先读序号再加载数据，与 CatalogIndex.rebuild 相同
+    version = current_seq()
+    competitions = list(Competition.objects.order_by('id'))
+    rows = [{field: getattr(c, field) for field in ROW_FIELDS} for c in competitions]
+    list_fragments, description_fragments = [], []
+    for item, competition in zip(compile_serializer(CompetitionListSerializer)(competitions, many=True).data, competitions):
+        item.pop('status')
+        list_fragments.append(_render(item)[:-1])
+        description_fragments.append(b',' + _render({'description': competition.description})[1:-1])
+    sections = _encode(version, connection.settings_dict['NAME'], rows, list_fragments, description_fragments)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with _exclusive_lock(f'{path}.lock'):
+        existing = _read_version(path)
+        if existing is not None and existing > version:
+            return existing
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.writelines(sections)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    logger.info(f"竞赛目录快照已发布: 版本 {version}，{len(rows)} 条竞赛")
+    return version
+
+
+def publish_snapshot_safely():
+    """写入信号中调用，快照失败只记录日志，不影响写入本身"""
+    try:
+        publish_snapshot()
+    except Exception:
+        logger.exception("发布竞赛目录快照失败")
+
+
+_current = None
+_open_lock = threading.Lock()
+
+
+def current_snapshot():
+    """
+    返回与当前目录版本一致的快照，没有时返回 None（调用方回退到数据库）。
+    进程内缓存已映射的快照，文件被替换后才重新打开。
+    """
+    global _current
+    path = snapshot_path()
+    if not path:
+        return None
+    version = current_seq()
+    snapshot = _current
+    if snapshot is None or snapshot.path != path or snapshot.version != version:
+        with _open_lock:
+            snapshot = _current
+            try:
+                if snapshot is None or snapshot.path != path or os.stat(path).st_ino != snapshot.inode:
+                    snapshot = _current = CatalogSnapshot(path)
+            except (OSError, ValueError, struct.error):
+                return None
+    if snapshot.version != version or snapshot.database != connection.settings_dict['NAME']:
+        # 新版本尚未发布完成，或快照来自其他数据库
+        return None
+    return snapshot
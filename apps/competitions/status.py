@@ -0,0 +1,83 @@
+# apps/competitions/status.py
+
+from django.db.models import Q
+
+# 竞赛状态，与 Competition.STATUS_CHOICES 一致
+NOT_STARTED = 0       # 报名未开始
+REGISTRATION_OPEN = 1  # 报名进行中
+REGISTRATION_CLOSED = 2  # 报名已结束
+IN_PROGRESS = 3       # 比赛进行中
+FINISHED = 4          # 比赛已结束
+
+# 状态由四个时间点决定，按优先级从高到低：
+# 比赛结束时间已过 -> 比赛已结束；比赛开始时间已过 -> 比赛进行中；
+# 报名截止时间已过 -> 报名已结束；报名开始时间已过 -> 报名进行中；否则报名未开始。
+# 时间为空视为 “尚未到达”；四个时间都为空（未排期）时沿用保存的 status。
+# 显示（compute_status）和筛选（status_q）都按这一条规则，其他模块不要另写。
+BOUNDARIES = [
+    (FINISHED, 'comp_time_end'),
+    (IN_PROGRESS, 'comp_time_start'),
+    (REGISTRATION_CLOSED, 'reg_time_end'),
+    (REGISTRATION_OPEN, 'reg_time_start'),
+]
+BOUNDARY_FIELDS = [field for _, field in BOUNDARIES]
+
+
+def is_scheduled(competition):
+    return any(getattr(competition, field) is not None for field in BOUNDARY_FIELDS)
+
+
+def compute_status(competition, now):
+    """竞赛在 now 时刻的状态；competition 为有四个时间字段和 status 的对象"""
+    if not is_scheduled(competition):
+        return competition.status
+    for status, field in BOUNDARIES:
+        value = getattr(competition, field)
+        if value is not None and value <= now:
+            return status
+    return NOT_STARTED
+
+
+def _passed(field, now):
+    return Q(**{f'{field}__lte': now})
+
+
+def _not_passed(field, now):
+    return Q(**{f'{field}__gt': now}) | Q(**{f'{field}__isnull': True})
+
+
+def status_q(status, now):
+    """
+    返回 “在 now 时刻处于 status 状态” 的查询条件，与 compute_status 一致。
+    已排期的竞赛为时间字段上的范围条件，可以使用对应字段的索引；未排期的按保存的 status
+    """
+    condition = Q()
+    for boundary_status, field in BOUNDARIES:
+        if boundary_status == status:
+            condition &= _passed(field, now)
+            break
+        condition &= _not_passed(field, now)
+    else:
+        condition &= has_schedule_q()  # NOT_STARTED：已排期且所有时间点都未到达
+    return condition | (unscheduled_q() & Q(status=status))
+
+
+def has_schedule_q():
+    """至少设置了一个时间点的竞赛"""
+    condition = Q()
+    for field in BOUNDARY_FIELDS:
+        condition |= Q(**{f'{field}__isnull': False})
+    return condition
+
+
+def unscheduled_q():
+    """四个时间都为空的竞赛，状态沿用保存的 status"""
+    return Q(**{f'{field}__isnull': True for field in BOUNDARY_FIELDS})
+
+
+def crossed_q(since, now):
+    """返回 (since, now] 期间有任一时间点到达的竞赛的查询条件"""
+    condition = Q()
+    for field in BOUNDARY_FIELDS:
+        condition |= Q(**{f'{field}__gt': since, f'{field}__lte': now})
+    return condition
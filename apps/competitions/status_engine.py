@@ -0,0 +1,58 @@
+# apps/competitions/status_engine.py
+
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Competition, StatusTick
+from .signals import catalog_changed
+from .status import BOUNDARIES, NOT_STARTED, crossed_q, has_schedule_q, status_q
+
+logger = logging.getLogger(__name__)
+
+ALL_STATUSES = [status for status, _ in BOUNDARIES] + [NOT_STARTED]
+
+
+def advance_statuses(now=None, full=False):
+    """
+    把保存的 status 字段推进到 now 时刻。
+
+    默认只处理自上次推进以来有时间点到达的竞赛（时间字段上的范围查询），
+    每个目标状态一条 UPDATE，且只更新状态确实变化的行。
+    full=True 或没有上次推进记录时，校对所有设置了时间的竞赛。
+    返回 {'changed': {状态: 行数}, 'full': bool, 'elapsed_ms': float}。
+    """
+    started = time.perf_counter()
+    now = now or timezone.now()
+    changed = {}
+    changed_ids = []
+    with transaction.atomic():
+        # 上一次推进的时间保存在单行表中；行锁使并发的推进依次执行
+        tick, _ = StatusTick.objects.select_for_update().get_or_create(pk=StatusTick.SINGLETON_PK)
+        since = None if full else tick.last_tick
+        if since is not None and since >= now:
+            return {'changed': {}, 'full': False, 'elapsed_ms': 0.0}
+
+        scope = has_schedule_q() if since is None else crossed_q(since, now)
+        for status in ALL_STATUSES:
+            ids = list(
+                Competition.objects.filter(scope & status_q(status, now))
+                .exclude(status=status)
+                .values_list('id', flat=True)
+            )
+            if not ids:
+                continue
+            Competition.objects.filter(id__in=ids).update(status=status)
+            changed[status] = len(ids)
+            changed_ids.extend(ids)
+
+        if changed_ids:
+            catalog_changed.send(sender=Competition, ids=changed_ids)
+
+        tick.last_tick = now
+        tick.save(update_fields=['last_tick'])
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"竞赛状态推进完成: {changed}，全量校对: {since is None}，耗时 {elapsed_ms:.1f}ms")
+    return {'changed': changed, 'full': since is None, 'elapsed_ms': elapsed_ms}
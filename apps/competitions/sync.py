@@ -0,0 +1,157 @@
+# apps/competitions/sync.py
+
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from types import SimpleNamespace
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Competition
+from .signals import catalog_changed
+from .status import compute_status
+
+logger = logging.getLogger(__name__)
+
+# 由数据源同步的字段，name 作为匹配键
+SYNC_FIELDS = [
+    'link',
+    'type',
+    'reg_time_start',
+    'reg_time_end',
+    'comp_time_start',
+    'comp_time_end',
+    'description',
+]
+
+# 实际写入的字段：status 不信任数据源，按同步的时间字段推导（见 _derive_status）
+STORED_FIELDS = [*SYNC_FIELDS, 'status']
+
+
+class SyncReport:
+    """一次同步的统计结果"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.elapsed_ms = 0.0
+
+    @property
+    def total(self):
+        return self.created + self.updated + self.unchanged
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'elapsed_ms': round(self.elapsed_ms, 1),
+        }
+
+    def __str__(self):
+        return (f"新增 {self.created} 条，更新 {self.updated} 条，"
+                f"未变化 {self.unchanged} 条，耗时 {self.elapsed_ms:.1f}ms")
+
+
+def _normalize(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def fingerprint(values):
+    """同步字段的内容哈希，用于判断数据是否变化"""
+    payload = json.dumps(
+        [_normalize(values.get(field)) for field in STORED_FIELDS],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _derive_status(values, fallback, now):
+    """
+    按同步来的时间字段计算 now 时刻的状态，与 status_engine 写入的结果一致。
+    数据源的 status 只在竞赛没有任何时间字段时作为 fallback 使用
+    """
+    return compute_status(SimpleNamespace(status=fallback, **values), now)
+
+
+def sync_competitions(records, batch_size=1000, update_batch_size=200):
+    """
+    按名称把一批竞赛记录同步到数据库。
+
+    records 中每条记录是包含 name 和 SYNC_FIELDS 的字典，同名记录以最后一条为准。
+    status 由时间字段推导；没有时间字段的竞赛，新建时使用记录中的 status，已有的保留原状态。
+    已有竞赛一次查询全部加载，逐条比较内容哈希：新竞赛一次 bulk_create，
+    内容变化的竞赛按变化的字段分组 bulk_update（通常只有一组），
+    未变化的不写库，全部在同一个事务中完成。
+    bulk_update 为每行每个字段生成一个 CASE 分支，因此只更新变化的字段，并使用较小的批量。
+    """
+    started = time.perf_counter()
+    now = timezone.now()
+    report = SyncReport()
+
+    incoming = {}
+    for record in records:
+        incoming[record['name']] = record
+
+    existing = {}
+    for row in Competition.objects.values('id', 'name', *STORED_FIELDS).order_by('id').iterator(chunk_size=5000):
+        # 历史数据中可能存在同名竞赛，以最早的一条为准
+        existing.setdefault(row['name'], row)
+
+    to_create = []
+    to_update = defaultdict(list)  # 变化的字段 -> 竞赛列表
+    for name, record in incoming.items():
+        values = {field: record.get(field) for field in SYNC_FIELDS}
+        current = existing.get(name)
+        fallback = (record.get('status') or 0) if current is None else current['status']
+        values['status'] = _derive_status(values, fallback, now)
+        if current is None:
+            to_create.append(Competition(name=name, **values))
+        elif fingerprint(current) != fingerprint(values):
+            changed_fields = tuple(
+                field for field in STORED_FIELDS
+                if _normalize(current[field]) != _normalize(values[field])
+            )
+            to_update[changed_fields].append(Competition(id=current['id'], name=name, **values))
+        else:
+            report.unchanged += 1
+
+    if to_create or to_update:
+        with transaction.atomic():
+            _write(to_create, to_update, batch_size, update_batch_size)
+
+    report.created = len(to_create)
+    report.updated = sum(len(group) for group in to_update.values())
+    report.elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"竞赛同步完成: {report}")
+    return report
+
+
+def _write(to_create, to_update, batch_size, update_batch_size):
+    if to_create:
+        Competition.objects.bulk_create(to_create, batch_size=batch_size)
+    changed_ids = []
+    for fields, competitions in to_update.items():
+        # 只更新确实变化的字段，一般情况下所有变化行属于同一组
+        Competition.objects.bulk_update(competitions, fields, batch_size=update_batch_size)
+        changed_ids.extend(competition.id for competition in competitions)
+
+    created_ids = [competition.pk for competition in to_create if competition.pk is not None]
+    if len(created_ids) != len(to_create):
+        # MySQL 的 bulk_create 不会回填主键，按名称查回新建竞赛的 id
+        created_ids = list(
+            Competition.objects.filter(name__in=[c.name for c in to_create])
+            .values_list('id', flat=True)
+        )
+    changed_ids.extend(created_ids)
+    # 批量写入不会触发 post_save，手动通知索引和变更日志
+    catalog_changed.send(sender=Competition, ids=changed_ids)
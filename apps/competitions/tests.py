@@ -1,3 +1,1197 @@
-from django.test import TestCase
+# apps/competitions/tests.py
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from utils.query_budget import QueryBudgetTestMixin
+from utils.swr_cache import StaleWhileRevalidateCache
+
+from . import ingestion
+from .autocomplete import autocomplete_index, normalize, pinyin_initials
+from .caching import catalog_cache
+from .calendar_index import calendar_index
+from .changes import changes_since, current_seq, record_change
+from .facets import FacetQuery, facet_index
+from .models import Competition, StatusTick
+from .search import search_index, tokenize
+from .snapshot import CatalogSnapshot, current_snapshot, publish_snapshot
+from .status import compute_status
+from .status_engine import advance_statuses
+from .sync import sync_competitions
+
+
+def make_competition(name, days=0, **kwargs):
+    """创建测试用竞赛，days 为报名截止时间相对今天的偏移"""
+    now = timezone.now()
+    defaults = {
+        'link': 'https://example.com',
+        'type': '线上',
+        'reg_time_start': now - timedelta(days=10),
+        'reg_time_end': now + timedelta(days=days),
+        'comp_time_start': now + timedelta(days=days + 1),
+        'comp_time_end': now + timedelta(days=days + 2),
+        'description': f'{name} 的详细介绍',
+    }
+    defaults.update(kwargs)
+    return Competition.objects.create(name=name, **defaults)
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class CatalogTestCase(APITestCase):
+    """
+    目录接口有响应缓存和变更日志，每个用例开始前清空缓存；
+    默认不发布目录快照，快照相关用例自行指定临时路径
+    """
+
+    def setUp(self):
+        cache.clear()
+
+
+class CompetitionCatalogPaginationTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # 部分竞赛报名截止时间相同，用于验证 id 作为并列排序键
+        for i in range(7):
+            make_competition(f'竞赛{i}', days=i // 2)
+
+    def _walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_unpaginated_list_keeps_old_shape(self):
+        response = self.client.get('/api/competitions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 7)
+
+    def test_pages_cover_catalog_in_order(self):
+        seen = self._walk('/api/competitions/?page_size=3')
+        expected = list(
+            Competition.objects.order_by('reg_time_end', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_cursor_is_stable_across_inserts(self):
+        first = self.client.get('/api/competitions/?page_size=3')
+        first_ids = [item['id'] for item in first.data['results']]
+
+        # 翻页过程中导入了新的竞赛，包括排在已读页之前的
+        make_competition('新竞赛-早', days=-5)
+        make_competition('新竞赛-晚', days=30)
+
+        rest = self._walk(first.data['next'])
+        self.assertFalse(set(first_ids) & set(rest))
+        self.assertEqual(len(first_ids) + len(rest), 8)
+
+    def test_list_omits_description_detail_includes_it(self):
+        competition = Competition.objects.first()
+        listing = self.client.get('/api/competitions/?page_size=2')
+        self.assertNotIn('description', listing.data['results'][0])
+
+        detail = self.client.get(f'/api/competitions/{competition.id}/')
+        self.assertEqual(detail.data['description'], competition.description)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/competitions/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CompetitionSearchTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        search_index.reset()
+        self.web = make_competition('全国大学生网络安全竞赛', type='CTF',
+                                    description='面向高校的信息安全夺旗赛')
+        self.math = make_competition('数学建模挑战赛', type='建模',
+                                     description='包含网络优化相关题目')
+        self.robot = make_competition('机器人大赛', type='线下', description='智能机器人设计')
+
+    def test_tokenize_uses_cjk_bigrams(self):
+        self.assertEqual(tokenize('网络安全 CTF2024'), ['网络', '络安', '安全', 'ctf2024'])
+
+    def test_ranks_name_match_above_description_match(self):
+        response = self.client.get('/api/competitions/search/', {'query': '网络'})
+        ids = [item['id'] for item in response.json()]
+        self.assertEqual(ids, [self.web.id, self.math.id])
+
+    def test_searches_type_and_description(self):
+        ids = [item['id'] for item in search_index.results('夺旗')]
+        self.assertEqual(ids, [self.web.id])
+        ids = [item['id'] for item in search_index.results('ctf')]
+        self.assertEqual(ids, [self.web.id])
+
+    def test_single_character_query(self):
+        ids = {item['id'] for item in search_index.results('赛')}
+        self.assertEqual(ids, {self.web.id, self.math.id, self.robot.id})
+
+    def test_highlight_marks_matches(self):
+        result = search_index.results('网络安全', limit=1)[0]
+        self.assertEqual(result['highlight']['name'], '全国大学生<em>网络安全</em>竞赛')
+
+    def test_limit_is_respected(self):
+        response = self.client.get('/api/competitions/search/', {'query': '赛', 'limit': 2})
+        self.assertEqual(len(response.json()), 2)
+
+    def test_index_follows_saves_and_deletes(self):
+        search_index.ensure_fresh()
+        self.robot.name = '机器人网络挑战'
+        self.robot.save()
+        self.assertIn(self.robot.id, search_index.match_ids('网络'))
+
+        self.web.delete()
+        self.assertNotIn(self.web.id, search_index.match_ids('网络'))
+
+    def test_index_replays_changes_from_other_processes(self):
+        search_index.ensure_fresh()
+        # 模拟导入脚本在其他进程中批量写入：本进程没有收到 post_save
+        Competition.objects.filter(pk=self.robot.pk).update(name='网络机器人')
+        record_change([self.robot.pk])
+        self.assertIn(self.robot.id, search_index.match_ids('网络'))
+
+    def test_viewset_search_param_uses_index(self):
+        response = self.client.get('/api/competitions/', {'search': '建模'})
+        self.assertEqual([item['id'] for item in response.data], [self.math.id])
+
+    def test_viewset_search_keeps_relevance_order(self):
+        # 最相关的竞赛 id 最大，按 id 或默认排序时会排在最后
+        best = make_competition('网络优化大赛', type='线上', description='网络优化')
+        ranked = search_index.match_ids('网络优化')
+        self.assertEqual(ranked, [best.id, self.math.id])
+
+        response = self.client.get('/api/competitions/', {'search': '网络优化'})
+        self.assertEqual([item['id'] for item in response.data], ranked)
+
+        ids = []
+        page = self.client.get('/api/competitions/', {'search': '网络优化', 'page_size': 1}).json()
+        while True:
+            ids.extend(item['id'] for item in page['results'])
+            if not page['next']:
+                break
+            page = self.client.get(page['next']).json()
+        self.assertEqual(ids, ranked)
+
+        response = self.client.get('/api/competitions/', {'search': '不存在的词', 'page_size': 1})
+        self.assertEqual(response.json()['results'], [])
+
+
+class CompetitionAutocompleteTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        autocomplete_index.reset()
+        self.ctf = make_competition('网络安全CTF挑战赛', days=3)
+        self.cup = make_competition('网络技术大赛', days=10)
+        self.math = make_competition('全国数学建模竞赛', days=1)
+
+    def _suggest(self, query, **params):
+        response = self.client.get('/api/competitions/autocomplete/', {'query': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.json()]
+
+    def test_prefix_match(self):
+        self.assertEqual(self._suggest('网络'), [self.cup.id, self.ctf.id])
+
+    def test_infix_match_ranks_after_prefix(self):
+        make_competition('数学之美', days=0)
+        ids = self._suggest('数学')
+        self.assertEqual(ids[1:], [self.math.id])
+
+    def test_recent_order(self):
+        self.assertEqual(self._suggest('网络', order='recent'), [self.cup.id, self.ctf.id])
+        self.assertEqual(self._suggest('网', order='recent', limit=1), [self.cup.id])
+
+    def test_case_insensitive(self):
+        self.assertEqual(self._suggest('ctf'), [self.ctf.id])
+
+    @skipIf(pinyin_initials('网络') == '', '未安装 pypinyin')
+    def test_pinyin_initials(self):
+        self.assertEqual(self._suggest('qgsx'), [self.math.id])
+
+    def test_rebuilds_after_changes(self):
+        self.assertEqual(self._suggest('网络技术'), [self.cup.id])
+        self.cup.name = '程序设计大赛'
+        self.cup.save()
+        self.assertEqual(self._suggest('网络技术'), [])
+        self.assertEqual(self._suggest('程序'), [self.cup.id])
+
+    def test_repeated_and_nested_names(self):
+        # 互为前缀、内容重复的名称，每个竞赛只返回一次；同名时报名截止晚的在前
+        first = make_competition('网络', days=1)
+        second = make_competition('网络', days=2)
+        longer = make_competition('网络网络', days=5)
+        ids = self._suggest('网络', limit=10)
+        self.assertEqual(ids[:2], [second.id, first.id])
+        self.assertEqual(sorted(ids), sorted({first.id, second.id, longer.id, self.cup.id, self.ctf.id}))
+        self.assertEqual(self._suggest('络网'), [longer.id])
+
+
+class CompetitionStatusTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+
+    def _make(self, name, reg_start, reg_end, comp_start, comp_end, stored=0):
+        day = timedelta(days=1)
+        return Competition.objects.create(
+            name=name,
+            reg_time_start=self.now + reg_start * day,
+            reg_time_end=self.now + reg_end * day,
+            comp_time_start=self.now + comp_start * day,
+            comp_time_end=self.now + comp_end * day,
+            status=stored,
+        )
+
+    def test_status_query_matches_python_computation(self):
+        competitions = [
+            self._make('未开始', 1, 2, 3, 4),
+            self._make('报名中', -1, 2, 3, 4),
+            self._make('报名结束', -2, -1, 3, 4),
+            self._make('比赛中', -3, -2, -1, 4),
+            self._make('已结束', -4, -3, -2, -1),
+        ]
+        for expected, competition in enumerate(competitions):
+            self.assertEqual(compute_status(competition, self.now), expected)
+            ids = list(Competition.objects.in_status(expected, self.now).values_list('id', flat=True))
+            self.assertEqual(ids, [competition.id])
+
+        annotated = dict(Competition.objects.with_computed_status(self.now)
+                         .values_list('id', 'computed_status'))
+        self.assertEqual(annotated, {c.id: n for n, c in enumerate(competitions)})
+
+    def test_open_endpoint(self):
+        open_now = self._make('报名中', -1, 2, 3, 4)
+        self._make('报名结束', -2, -1, 3, 4)
+        response = self.client.get('/api/competitions/open/')
+        self.assertEqual([item['id'] for item in response.data], [open_now.id])
+        self.assertEqual(response.data[0]['status'], 1)
+
+    def test_advance_only_touches_crossed_rows(self):
+        soon = self._make('即将开始报名', 1, 3, 5, 6, stored=0)
+        later = self._make('报名中', -1, 3, 5, 6, stored=1)
+        stale = self._make('状态未更新', -1, 3, 5, 6, stored=0)
+
+        first = advance_statuses(now=self.now)
+        self.assertTrue(first['full'])
+        self.assertEqual(first['changed'], {1: 1})
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 1)
+
+        # 两天后：只有 soon 跨过了报名开始时间
+        result = advance_statuses(now=self.now + timedelta(days=2))
+        self.assertFalse(result['full'])
+        self.assertEqual(result['changed'], {1: 1})
+        soon.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual((soon.status, later.status), (1, 1))
+
+        # 再过两天：三者都跨过了报名截止时间
+        result = advance_statuses(now=self.now + timedelta(days=4))
+        self.assertEqual(result['changed'], {2: 3})
+
+    def test_last_tick_survives_cache_loss(self):
+        # 每次定时任务都是新进程，本地缓存不会保留；上次推进时间要从数据库读取
+        self._make('即将开始报名', 1, 3, 5, 6)
+        self.assertTrue(advance_statuses(now=self.now)['full'])
+        cache.clear()
+        result = advance_statuses(now=self.now + timedelta(days=2))
+        self.assertFalse(result['full'])
+        self.assertEqual(result['changed'], {1: 1})
+        self.assertEqual(StatusTick.objects.get().last_tick, self.now + timedelta(days=2))
+
+    def test_unscheduled_competition_keeps_stored_status(self):
+        competition = Competition.objects.create(name='无时间', status=3)
+        advance_statuses(now=self.now, full=True)
+        competition.refresh_from_db()
+        self.assertEqual(competition.status, 3)
+        self.assertEqual(competition.current_status, 3)
+        # 显示和筛选使用同一条规则
+        self.assertEqual(list(Competition.objects.in_status(3, self.now)), [competition])
+        self.assertFalse(Competition.objects.in_status(0, self.now).exists())
+        self.assertEqual(
+            Competition.objects.with_computed_status(self.now).get(pk=competition.pk).computed_status, 3,
+        )
+
+
+class CompetitionFacetTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        facet_index.reset()
+        self.ctf = make_competition('网络安全赛', type='CTF', status=1, days=3)
+        make_competition('夺旗赛', type='CTF', status=2, days=-3)
+        make_competition('数学建模', type='建模', status=1, days=10)
+        make_competition('机器人', type='线下', status=4, days=-30)
+        make_competition('无日期', type='线下', status=0, reg_time_end=None, comp_time_start=None)
+
+    def _group_by(self, query, field):
+        queryset = query.apply(Competition.objects.with_computed_status(query.now))
+        rows = queryset.values(field).annotate(n=Count('id'))
+        return {row[field]: row['n'] for row in rows}
+
+    def test_counts_match_group_by(self):
+        soon = timezone.now() + timedelta(days=5)
+        queries = [
+            FacetQuery(),
+            FacetQuery(types=['CTF']),
+            FacetQuery(statuses=[1, 2]),
+            FacetQuery(windows={'reg_time_end': (None, soon)}),
+            FacetQuery(types=['线下'], windows={'reg_time_end': (timezone.now(), None)}),
+        ]
+        for query in queries:
+            facets = facet_index.facets(query)
+            # 每一维的计数不应用该维自身的条件
+            by_type = self._group_by(
+                FacetQuery(statuses=query.statuses, windows=query.windows, now=query.now), 'type',
+            )
+            by_status = self._group_by(
+                FacetQuery(types=query.types, windows=query.windows, now=query.now), 'computed_status',
+            )
+            self.assertEqual(facets['type'], by_type)
+            self.assertEqual({s: v['count'] for s, v in facets['status'].items()}, by_status)
+            self.assertEqual(facets['total'], query.apply(Competition.objects.all()).count())
+
+    def test_saves_update_counts_incrementally(self):
+        facet_index.ensure_fresh()
+        with mock.patch.object(facet_index, 'rebuild') as rebuild:
+            self.ctf.type = '建模'
+            self.ctf.save()
+            facets = facet_index.facets(FacetQuery())
+            self.ctf.delete()
+            after_delete = facet_index.facets(FacetQuery())
+        rebuild.assert_not_called()
+        self.assertEqual(facets['type'], {'建模': 2, '线下': 2, 'CTF': 1})
+        self.assertEqual(after_delete['type'], {'线下': 2, 'CTF': 1, '建模': 1})
+
+    def test_importer_sync_updates_counts(self):
+        facet_index.ensure_fresh()
+        sync_competitions([
+            {'name': f'导入赛{i}', 'type': 'CTF', 'status': 0, 'link': '', 'description': ''}
+            for i in range(3)
+        ])
+        self.assertEqual(facet_index.facets(FacetQuery(types=['CTF']))['total'], 5)
+
+    def test_list_filters_by_type_status_and_window(self):
+        response = self.client.get('/api/competitions/', {'type': 'CTF,建模', 'status': '1'})
+        self.assertEqual(len(response.data), 2)
+
+        today = timezone.localdate()
+        response = self.client.get('/api/competitions/', {
+            'reg_end_after': today.isoformat(),
+            'reg_end_before': (today + timedelta(days=7)).isoformat(),
+        })
+        self.assertEqual([item['id'] for item in response.data], [self.ctf.id])
+
+    def test_facets_endpoint(self):
+        response = self.client.get('/api/competitions/facets/', {'type': 'CTF'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['total'], 2)
+        # 夺旗赛保存的状态为 2，但按时间已经结束
+        self.assertEqual(data['status'], {'1': {'label': '报名进行中', 'count': 1},
+                                          '4': {'label': '比赛已结束', 'count': 1}})
+
+    def test_status_follows_the_clock(self):
+        facet_index.ensure_fresh()
+        later = timezone.now() + timedelta(days=4)
+        with mock.patch.object(facet_index, 'rebuild') as rebuild:
+            facets = facet_index.facets(FacetQuery(types=['CTF'], now=later))
+        rebuild.assert_not_called()
+        # 四天后网络安全赛的报名截止、比赛开始时间都已到达，没有任何写入
+        self.assertEqual({s: v['count'] for s, v in facets['status'].items()}, {3: 1, 4: 1})
+        ids = FacetQuery(statuses=[3], now=later).apply(Competition.objects.all()).values_list('id', flat=True)
+        self.assertEqual(list(ids), [self.ctf.id])
+
+        unscheduled = make_competition('未排期', type='CTF', status=2, reg_time_start=None, reg_time_end=None,
+                                       comp_time_start=None, comp_time_end=None)
+        facets = facet_index.facets(FacetQuery(statuses=[2]))
+        self.assertEqual(facets['total'], 1)
+        unscheduled.delete()
+        self.assertEqual(facet_index.facets(FacetQuery(statuses=[2]))['total'], 0)
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/competitions/', {'reg_end_after': '明天'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/competitions/facets/', {'status': 'open'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompetitionCalendarTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        calendar_index.reset()
+        self.base = timezone.make_aware(datetime(2024, 5, 1), timezone.get_current_timezone())
+
+    def at(self, days):
+        return self.base + timedelta(days=days)
+
+    def make(self, name, reg, comp):
+        return make_competition(
+            name,
+            reg_time_start=reg[0] if reg[0] is None else self.at(reg[0]),
+            reg_time_end=reg[1] if reg[1] is None else self.at(reg[1]),
+            comp_time_start=comp[0] if comp[0] is None else self.at(comp[0]),
+            comp_time_end=comp[1] if comp[1] is None else self.at(comp[1]),
+        )
+
+    def test_matches_brute_force_overlap(self):
+        rng = random.Random(7)
+        for i in range(300):
+            reg_start = rng.randint(-60, 60)
+            comp_start = reg_start + rng.randint(1, 30)
+            self.make(f'竞赛{i}', (reg_start, reg_start + rng.randint(0, 20)),
+                      (comp_start, comp_start + rng.randint(0, 3)))
+
+        for _ in range(30):
+            start = self.at(rng.randint(-70, 70))
+            end = start + timedelta(days=rng.randint(1, 31))
+            expected = set(Competition.objects.filter(
+                Q(reg_time_start__lt=end, reg_time_end__gte=start)
+                | Q(comp_time_start__lt=end, comp_time_end__gte=start)
+            ).values_list('id', flat=True))
+            found = {row['id'] for row in calendar_index.overlapping(start, end)}
+            self.assertEqual(found, expected)
+
+    def test_calendar_endpoint(self):
+        registering = self.make('报名中', (-10, 3), (10, 12))
+        competing = self.make('比赛中', (-30, -20), (5, 9))
+        self.make('已结束', (-60, -50), (-40, -39))
+        deadline_only = self.make('只有截止时间', (None, 2), (None, None))
+
+        response = self.client.get('/api/competitions/calendar/', {
+            'start': '2024-05-01', 'end': '2024-05-08',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = {item['id']: item['windows'] for item in response.json()}
+        self.assertEqual(data, {
+            registering.id: ['registration'],
+            competing.id: ['competition'],
+            deadline_only.id: ['registration'],
+        })
+        # 按最早重叠时间段的起点排序，字段与列表接口一致
+        first = response.json()[0]
+        self.assertEqual(first['id'], registering.id)
+        self.assertIn('link', first)
+
+        response = self.client.get('/api/competitions/calendar/', {
+            'start': '2024-05-01', 'end': '2024-05-08', 'kind': 'competition',
+        })
+        self.assertEqual([item['id'] for item in response.json()], [competing.id])
+
+    def test_index_follows_saves(self):
+        competition = self.make('改期', (0, 3), (5, 6))
+        self.assertEqual(len(calendar_index.overlapping(self.at(0), self.at(7))), 1)
+        competition.reg_time_start, competition.reg_time_end = self.at(20), self.at(25)
+        competition.comp_time_start, competition.comp_time_end = self.at(30), self.at(31)
+        competition.save()
+        self.assertEqual(calendar_index.overlapping(self.at(0), self.at(7)), [])
+
+    def test_invalid_parameters(self):
+        for params in [{}, {'start': '2024-05-08', 'end': '2024-05-01'},
+                       {'start': '2024-01-01', 'end': '2024-12-31'},
+                       {'start': '五月', 'end': '2024-05-08'}]:
+            response = self.client.get('/api/competitions/calendar/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CatalogSnapshotTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'catalog.snap')
+        settings_override = override_settings(CATALOG_SNAPSHOT_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for index in (search_index, autocomplete_index):
+            index.reset()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first = make_competition('全国大学生"网络安全"竞赛', days=3,
+                                          description='<b>夺旗赛</b>\u2028第二行')
+            make_competition('数学建模挑战赛', days=3)
+            make_competition('没有时间的竞赛', status=2, reg_time_start=None, reg_time_end=None,
+                             comp_time_start=None, comp_time_end=None)
+            for i in range(5):
+                make_competition(f'竞赛{i}', days=i - 2, type='线下')
+
+    def fetch_pair(self, url):
+        """同一请求分别由快照和数据库响应，绕过响应缓存"""
+        def uncached(key, compute, version=None):
+            return compute()
+
+        with mock.patch.object(catalog_cache, 'get', side_effect=uncached):
+            with self.assertNumQueries(0):
+                from_snapshot = self.client.get(url)
+            with override_settings(CATALOG_SNAPSHOT_PATH=None):
+                from_database = self.client.get(url)
+        return from_snapshot, from_database
+
+    def test_published_after_commit(self):
+        snapshot = current_snapshot()
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(snapshot.count, 8)
+
+    def test_list_matches_database_byte_for_byte(self):
+        from_snapshot, from_database = self.fetch_pair('/api/competitions/')
+        self.assertEqual(from_snapshot.content, from_database.content)
+        self.assertEqual(from_snapshot['Content-Type'], from_database['Content-Type'])
+
+    def test_pages_match_database(self):
+        url = '/api/competitions/?page_size=3'
+        while url:
+            from_snapshot, from_database = self.fetch_pair(url)
+            self.assertEqual(from_snapshot.content, from_database.content)
+            url = from_snapshot.json()['next']
+
+    def test_detail_matches_database(self):
+        from_snapshot, from_database = self.fetch_pair(f'/api/competitions/{self.first.id}/')
+        self.assertEqual(from_snapshot.content, from_database.content)
+        missing = self.client.get('/api/competitions/999999/')
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_indexes_load_from_snapshot(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/competitions/search/', {'query': '网络安全'})
+            autocomplete_index.suggest('数学')
+        self.assertEqual(response.json()[0]['id'], self.first.id)
+
+    def test_outdated_snapshot_is_not_used(self):
+        with mock.patch('apps.competitions.signals.publish_snapshot_safely'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.first.name = '改名后的竞赛'
+                self.first.save()
+        self.assertIsNone(current_snapshot())
+        response = self.client.get(f'/api/competitions/{self.first.id}/')
+        self.assertEqual(response.json()['name'], '改名后的竞赛')
+
+    def test_filtered_requests_use_database(self):
+        response = self.client.get('/api/competitions/', {'type': '线下'})
+        self.assertEqual(len(response.data), 5)
+
+    def test_open_uses_database(self):
+        expected = sorted(Competition.objects.open_for_registration().values_list('id', flat=True))
+        self.assertLess(len(expected), Competition.objects.count())
+        for url in ('/api/competitions/open/', '/api/competitions/open/?page_size=2'):
+            ids = []
+            while url:
+                body = self.client.get(url).json()
+                if isinstance(body, list):
+                    ids.extend(item['id'] for item in body)
+                    break
+                ids.extend(item['id'] for item in body['results'])
+                url = body['next']
+            self.assertEqual(sorted(ids), expected)
+
+    def test_one_publish_per_transaction(self):
+        with mock.patch('apps.competitions.signals.publish_snapshot_safely') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                for competition in Competition.objects.all()[:3]:
+                    competition.save()
+        publish.assert_called_once()
+
+    def test_publish_without_fcntl(self):
+        # Windows 没有 fcntl，改用 msvcrt 锁定锁文件
+        from . import snapshot as snapshot_module
+        msvcrt = mock.Mock(LK_LOCK=2, LK_UNLCK=0)
+        with mock.patch.object(snapshot_module, 'fcntl', None), \
+                mock.patch.object(snapshot_module, 'msvcrt', msvcrt, create=True):
+            record_change([self.first.id])
+            version = publish_snapshot()
+        self.assertEqual(CatalogSnapshot(self.path).version, version)
+        self.assertEqual([call.args[1:] for call in msvcrt.locking.call_args_list], [(2, 1), (0, 1)])
+
+    def test_older_version_does_not_replace_newer(self):
+        record_change([self.first.id])
+        newer = publish_snapshot()
+        with mock.patch('apps.competitions.snapshot.current_seq', return_value=newer - 1):
+            self.assertEqual(publish_snapshot(), newer)
+        self.assertEqual(CatalogSnapshot(self.path).version, newer)
+
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class CatalogCommitTests(TransactionTestCase):
+    """真实提交下，一个事务只写一条变更日志、发布一次快照"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_publish_per_committed_transaction(self):
+        with mock.patch('apps.competitions.signals.publish_snapshot_safely') as publish:
+            seq = current_seq()
+            with transaction.atomic():
+                ids = [make_competition(f'竞赛{i}').id for i in range(3)]
+            self.assertEqual(publish.call_count, 1)
+            self.assertEqual(changes_since(seq), (seq + 1, set(ids)))
+
+            # 回滚的事务不发布，也不影响之后的事务
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    make_competition('回滚')
+                    raise RuntimeError
+            self.assertEqual(publish.call_count, 1)
+            with transaction.atomic():
+                make_competition('回滚之后')
+            self.assertEqual(publish.call_count, 2)
+
+            # 不在事务中的写入立即发布
+            make_competition('自动提交')
+            self.assertEqual(publish.call_count, 3)
+
+class CompetitionSyncTests(CatalogTestCase):
+
+    def _record(self, name, **overrides):
+        now = timezone.now().replace(microsecond=0)
+        record = {
+            'name': name,
+            'link': 'https://example.com',
+            'type': '线上',
+            'reg_time_start': now,
+            'reg_time_end': now + timedelta(days=1),
+            'comp_time_start': now + timedelta(days=2),
+            'comp_time_end': now + timedelta(days=3),
+            'description': '介绍',
+            'status': 1,
+        }
+        record.update(overrides)
+        return record
+
+    def test_creates_updates_and_skips_unchanged(self):
+        first = [self._record('A'), self._record('B'), self._record('C')]
+        report = sync_competitions(first)
+        self.assertEqual(report.as_dict()['created'], 3)
+
+        second = [self._record('A'), self._record('B', description='新介绍'), self._record('D')]
+        report = sync_competitions(second)
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 1, 1))
+        self.assertEqual(Competition.objects.get(name='B').description, '新介绍')
+        self.assertEqual(Competition.objects.count(), 4)
+
+    def test_resync_is_read_only(self):
+        records = [self._record(f'竞赛{i}') for i in range(20)]
+        sync_competitions(records)
+        with self.assertNumQueries(1):
+            report = sync_competitions(records)
+        self.assertEqual(report.unchanged, 20)
+
+    def test_bulk_writes_reach_search_index(self):
+        search_index.reset()
+        search_index.ensure_fresh()
+        sync_competitions([self._record('信息安全大赛')])
+        self.assertEqual(len(search_index.match_ids('信息安全')), 1)
+
+    def test_status_derived_from_synced_times(self):
+        past = timezone.now() - timedelta(days=10)
+        sync_competitions([
+            # 数据源的状态已过期，以时间字段为准
+            self._record('已结束', reg_time_start=past, reg_time_end=past, comp_time_start=past,
+                         comp_time_end=past, status=1),
+            self._record('未排期', reg_time_start=None, reg_time_end=None, comp_time_start=None,
+                         comp_time_end=None, status=3),
+        ])
+        self.assertEqual(Competition.objects.get(name='已结束').status, 4)
+        self.assertEqual(Competition.objects.get(name='未排期').status, 3)
+
+        # 没有时间的竞赛：已有的状态不被数据源覆盖
+        report = sync_competitions([self._record('未排期', reg_time_start=None, reg_time_end=None,
+                                                 comp_time_start=None, comp_time_end=None, status=0)])
+        self.assertEqual(report.unchanged, 1)
+        self.assertEqual(Competition.objects.get(name='未排期').status, 3)
+
+    def test_adapter_records_sync(self):
+        adapter = ingestion.HelloCTFtimeAdapter()
+        event = {'name': '导入竞赛', 'link': 'https://example.com', 'type': '线上', 'readmore': '介绍',
+                 'status': '报名进行中', 'reg_time_start': '2024年01月01日 08:00',
+                 'reg_time_end': '2024年01月10日 08:00', 'comp_time_start': '2024年01月15日 09:00',
+                 'comp_time_end': '2024年01月16日 18:00'}
+        records = [adapter.normalize(event)]
+        self.assertEqual(records[0]['status'], 1)
+        self.assertEqual(sync_competitions(records).created, 1)
+        self.assertEqual(sync_competitions(records).unchanged, 1)
+        with self.assertLogs('apps.competitions.ingestion', 'WARNING'):
+            self.assertIsNone(adapter.normalize(dict(event, link=None)))
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """本地数据源：支持 ETag / If-None-Match，可配置响应延迟和前几次请求失败"""
+    body = b''
+    etag = '"v1"'
+    delay = 0
+    drip = 0  # 大于 0 时响应内容每次只发送 16 字节，间隔 drip 秒
+    failures = 0
+    requests_seen = []
+
+    def do_GET(self):
+        handler = type(self)
+        handler.requests_seen.append(dict(self.headers))
+        if self.delay:
+            time.sleep(self.delay)
+        if handler.failures:
+            handler.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        try:
+            if not self.drip:
+                self.wfile.write(self.body)
+            for start in range(0, len(self.body) if self.drip else 0, 16):
+                self.wfile.write(self.body[start:start + 16])
+                self.wfile.flush()
+                time.sleep(self.drip)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端已超时断开
+
+    def log_message(self, *args):
+        pass
+
+
+class FeedServer:
+    """在本地端口上提供一个数据源"""
+
+    def __init__(self):
+        self.handler = type('Handler', (FeedHandler,), {'requests_seen': []})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/CN.json'
+
+    def serve(self, events, etag, key='result'):
+        self.handler.body = json.dumps(
+            {'code': 0, 'data': {'total': len(events), key: events}}, ensure_ascii=False
+        ).encode('utf-8')
+        self.handler.etag = etag
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def feed_event(name, **overrides):
+    event = {
+        'name': name, 'link': 'https://example.com', 'type': '线上', 'readmore': '介绍 [含括号] {}',
+        'status': '报名进行中', 'reg_time_start': '2024年01月01日 08:00',
+        'reg_time_end': '2024-01-10 08:00:00', 'comp_time_start': '2024年01月15日 09:00',
+        'comp_time_end': '2024-01-16 18:00',
+    }
+    event.update(overrides)
+    return event
+
+
+@ingestion.register_adapter('test_flat')
+class FlatFeedAdapter(ingestion.FeedAdapter):
+    """测试用的另一种数据格式：data.items 数组，时间为 ISO 格式"""
+    result_path = ('data', 'items')
+
+    def normalize(self, event):
+        start = datetime.fromisoformat(event['start'])
+        return {
+            'name': event['title'], 'link': event['url'], 'type': '线上',
+            'reg_time_start': start, 'reg_time_end': start, 'comp_time_start': start,
+            'comp_time_end': start, 'description': event['title'], 'status': 0,
+        }
+
+
+class FeedIngestionTests(CatalogTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servers = [FeedServer() for _ in range(3)]
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers:
+            server.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.state_filename = os.path.join(self.tmpdir, 'state.json')
+        for n, server in enumerate(self.servers):
+            server.serve([feed_event(f'竞赛{n}-A'), feed_event(f'竞赛{n}-B')], etag='"v1"')
+            server.handler.delay = 0
+            server.handler.drip = 0
+            server.handler.failures = 0
+            server.handler.requests_seen.clear()
+        self.primary = self.servers[0]
+
+    def feeds(self, count=1, **options):
+        return [
+            ingestion.FeedConfig(f'feed{n}', server.url, **options)
+            for n, server in enumerate(self.servers[:count])
+        ]
+
+    def run_ingestion(self, feeds=None):
+        return ingestion.run_ingestion(feeds or self.feeds(), self.tmpdir, self.state_filename)
+
+    def test_first_run_imports_and_persists_validators(self):
+        report = self.run_ingestion()
+        self.assertEqual(report.sync.created, 2)
+        state = ingestion.load_feed_state(self.state_filename)
+        self.assertEqual(state['feed0']['etag'], '"v1"')
+
+    def test_not_modified_skips_processing(self):
+        self.run_ingestion()
+        report = self.run_ingestion()
+        self.assertIsNone(report.sync)
+        self.assertEqual(report.outcomes[0].status, ingestion.FeedOutcome.NOT_MODIFIED)
+        self.assertEqual(self.primary.handler.requests_seen[-1].get('If-None-Match'), '"v1"')
+
+    def test_same_payload_with_new_etag_exits_early(self):
+        self.run_ingestion()
+        self.primary.handler.etag = '"v2"'
+        with mock.patch.object(ingestion.HelloCTFtimeAdapter, 'records') as records:
+            report = self.run_ingestion()
+        records.assert_not_called()
+        self.assertEqual(report.outcomes[0].status, ingestion.FeedOutcome.UNCHANGED)
+        self.assertEqual(ingestion.load_feed_state(self.state_filename)['feed0']['etag'], '"v2"')
+
+    def test_changed_payload_is_synced(self):
+        self.run_ingestion()
+        self.primary.serve([feed_event('竞赛0-A', readmore='新介绍'), feed_event('竞赛C')], etag='"v3"')
+        report = self.run_ingestion()
+        self.assertEqual((report.sync.created, report.sync.updated, report.sync.unchanged), (1, 1, 0))
+
+    def test_feeds_are_fetched_concurrently(self):
+        for server in self.servers:
+            server.handler.delay = 0.5
+        started = time.perf_counter()
+        report = self.run_ingestion(self.feeds(3))
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, 1.2)  # 顺序抓取至少需要 1.5 秒
+        self.assertEqual(report.sync.created, 6)
+
+    @mock.patch.object(ingestion, 'RETRY_BACKOFF', 0.01)
+    def test_transient_errors_are_retried(self):
+        self.primary.handler.failures = 2
+        with self.assertLogs('apps.competitions.ingestion', 'WARNING'):
+            report = self.run_ingestion(self.feeds(retries=2))
+        self.assertEqual(report.outcomes[0].attempts, 3)
+        self.assertEqual(report.sync.created, 2)
+
+    @mock.patch.object(ingestion, 'RETRY_BACKOFF', 0.01)
+    def test_slow_feed_times_out_without_blocking_others(self):
+        self.servers[1].handler.delay = 2
+        feeds = self.feeds(3, timeout=0.5, retries=0)
+        started = time.perf_counter()
+        with self.assertLogs('apps.competitions.ingestion', 'ERROR'):
+            report = self.run_ingestion(feeds)
+        self.assertLess(time.perf_counter() - started, 1.5)
+        self.assertEqual([outcome.feed.name for outcome in report.failed], ['feed1'])
+        self.assertEqual(report.sync.created, 4)
+        # 失败的数据源不记录抓取状态，下次重新抓取
+        self.assertNotIn('feed1', ingestion.load_feed_state(self.state_filename))
+
+    def test_slow_download_is_cut_off_at_the_deadline(self):
+        # 每次读取都不超时，但整个下载远超总时限
+        self.primary.handler.drip = 0.05
+        feeds = self.feeds(1, timeout=0.5, retries=0)
+        started = time.perf_counter()
+        with self.assertLogs('apps.competitions.ingestion', 'ERROR'):
+            report = self.run_ingestion(feeds)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertIn('Timeout', report.outcomes[0].error)
+        self.assertFalse(os.path.exists(ingestion.feed_filename(self.tmpdir, feeds[0])))
+        self.assertEqual([name for name in os.listdir(self.tmpdir) if name.endswith('.tmp')], [])
+
+    def test_cancelled_fetch_does_not_replace_file(self):
+        filename = ingestion.feed_filename(self.tmpdir, self.feeds()[0])
+        cancelled = threading.Event()
+        cancelled.set()
+        with ingestion.make_session() as session:
+            self.assertIsNone(ingestion.fetch_feed(session, self.primary.url, {}, filename, cancelled=cancelled))
+        self.assertFalse(os.path.exists(filename))
+
+    def test_duplicates_are_merged_by_feed_priority(self):
+        self.servers[0].serve([feed_event('共同竞赛', readmore='主数据源')], etag='"a1"')
+        self.servers[1].serve([feed_event(' 共同竞赛 ', readmore='次数据源'), feed_event('其他')], etag='"b1"')
+        report = self.run_ingestion(self.feeds(2))
+        self.assertEqual((report.merged, report.duplicates), (2, 1))
+        self.assertEqual(Competition.objects.get(name='共同竞赛').description, '主数据源')
+
+        # 主数据源未变化（304）时仍使用其上次下载的内容参与合并
+        self.servers[1].serve([feed_event('共同竞赛', readmore='次数据源更新')], etag='"b2"')
+        report = self.run_ingestion(self.feeds(2))
+        self.assertEqual(report.outcomes[0].status, ingestion.FeedOutcome.NOT_MODIFIED)
+        self.assertEqual(Competition.objects.get(name='共同竞赛').description, '主数据源')
+
+    def test_adapters_are_pluggable(self):
+        self.servers[1].serve(
+            [{'title': '格式不同的竞赛', 'url': 'https://example.com/x', 'start': '2024-03-01T09:00:00+08:00'}],
+            etag='"f1"', key='items',
+        )
+        feeds = [
+            ingestion.FeedConfig('feed0', self.servers[0].url),
+            ingestion.FeedConfig('flat', self.servers[1].url, adapter='test_flat'),
+        ]
+        report = self.run_ingestion(feeds)
+        self.assertEqual(report.sync.created, 3)
+        self.assertTrue(Competition.objects.filter(name='格式不同的竞赛').exists())
+        with self.assertRaises(ValueError):
+            ingestion.FeedConfig('bad', self.servers[0].url, adapter='missing')
+
+    def test_streaming_parser_handles_chunk_boundaries(self):
+        filename = os.path.join(self.tmpdir, 'competitions.json')
+        events = [feed_event(f'竞赛{i}', readmore='"result": [引号与括号]' * i) for i in range(30)]
+        payload = {'data': {'result': events, 'total': 30}}
+        with open(filename, 'w', encoding='utf-8') as json_file:
+            json.dump(payload, json_file, ensure_ascii=False, indent=4)
+        items = list(ingestion.iter_feed_items(filename, chunk_size=7))
+        self.assertEqual(items, events)
+
+    def test_streaming_parser_follows_the_path(self):
+        # 其他位置的 result 数组、截断在读取边界的数字都不影响定位 data.result
+        filename = os.path.join(self.tmpdir, 'competitions.json')
+        events = [feed_event(f'竞赛{i}') for i in range(3)]
+        payload = {'meta': {'result': [1, 2]}, 'code': 1234567, 'data': {'total': 3, 'result': events}}
+        with open(filename, 'w', encoding='utf-8') as json_file:
+            json.dump(payload, json_file, ensure_ascii=False)
+        for chunk_size in (1, 7, 4096):
+            self.assertEqual(list(ingestion.iter_feed_items(filename, chunk_size=chunk_size)), events)
+
+        with open(filename, 'w', encoding='utf-8') as json_file:
+            json.dump({'result': events, 'data': {'total': 0}}, json_file, ensure_ascii=False)
+        with self.assertLogs('apps.competitions.ingestion', 'WARNING'):
+            self.assertEqual(list(ingestion.iter_feed_items(filename)), [])
+
+    def test_parse_datetime_formats(self):
+        expected = timezone.make_aware(datetime(2024, 1, 5, 8, 30), timezone.get_current_timezone())
+        for value in ['2024年01月05日 08:30', '2024年1月5日 08:30:00', '2024-01-05 08:30', '2024-01-05 08:30:00']:
+            self.assertEqual(ingestion.parse_datetime(value), expected)
+        self.assertIsNone(ingestion.parse_datetime(None))
+        with self.assertLogs('apps.competitions.ingestion', 'WARNING'):
+            for value in ['', '2024/01/05', '2024-13-05 08:30']:
+                self.assertIsNone(ingestion.parse_datetime(value))
+
+        # 缓存按时区区分
+        with timezone.override('Asia/Shanghai'):
+            self.assertEqual(ingestion.parse_datetime('2024-01-05 08:30'), expected - timedelta(hours=8))
+        self.assertEqual(ingestion.parse_datetime('2024-01-05 08:30'), expected)
+
+
+class CatalogCacheTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        search_index.reset()
+        # 准备数据先提交，之后的写入才是单独的事务
+        with self.captureOnCommitCallbacks(execute=True):
+            self.competition = make_competition('网络安全竞赛')
+            make_competition('数学建模竞赛', days=3)
+
+    def test_revalidation_returns_304_without_queries(self):
+        first = self.client.get('/api/competitions/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first['ETag']
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/competitions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get('/api/competitions/', {'page_size': 1})
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/competitions/', {'page_size': 1})
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_query_params_change_etag(self):
+        first = self.client.get('/api/competitions/', {'page_size': 1})
+        second = self.client.get('/api/competitions/', {'page_size': 2})
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'api.example.com'])
+    def test_host_and_scheme_have_separate_entries(self):
+        # 分页的 next 链接是绝对地址，不能把一个主机的响应返回给另一个主机
+        first = self.client.get('/api/competitions/', {'page_size': 1})
+        other_host = self.client.get('/api/competitions/', {'page_size': 1}, HTTP_HOST='api.example.com')
+        https = self.client.get('/api/competitions/', {'page_size': 1}, secure=True)
+        self.assertTrue(first.json()['next'].startswith('http://testserver/'))
+        self.assertTrue(other_host.json()['next'].startswith('http://api.example.com/'))
+        self.assertTrue(https.json()['next'].startswith('https://testserver/'))
+        self.assertEqual(len({first['ETag'], other_host['ETag'], https['ETag']}), 3)
+
+    def test_write_invalidates_cached_responses(self):
+        first = self.client.get(f'/api/competitions/{self.competition.id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.competition.name = '网络安全挑战赛'
+            self.competition.save()
+
+        response = self.client.get(f'/api/competitions/{self.competition.id}/',
+                                   HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.json()['name'], '网络安全挑战赛')
+
+    def test_status_boundary_invalidates_cached_responses(self):
+        # 没有写入，但报名开始时间已到，status 从报名未开始变为报名进行中
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            upcoming = make_competition('即将开放报名', days=5, reg_time_start=now + timedelta(hours=1))
+        url = f'/api/competitions/{upcoming.id}/'
+        first = self.client.get(url)
+        self.assertEqual(first.json()['status'], 0)
+
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(hours=2)):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            cached = self.client.get(url)
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(revalidated['ETag'], first['ETag'])
+        self.assertEqual(revalidated.json()['status'], 1)
+        self.assertEqual(cached.json()['status'], 1)
+
+    def test_search_is_cached(self):
+        first = self.client.get('/api/competitions/search/', {'query': '竞赛'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/competitions/search/', {'query': '竞赛'},
+                                       HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_are_not_cached(self):
+        response = self.client.post('/api/competitions/', {'name': '新竞赛'})
+        self.assertNotIn('ETag', response)
+
+
+class CatalogQueryBudgetTests(QueryBudgetTestMixin, CatalogTestCase):
+    """目录列表类接口的查询数与竞赛数量无关；响应缓存被绕过，只统计取数"""
+
+    def setUp(self):
+        super().setUp()
+        for index in (search_index, autocomplete_index, facet_index, calendar_index):
+            index.reset()
+        self.created = 0
+        self.add_competitions(3)
+
+    def add_competitions(self, count):
+        for _ in range(count):
+            self.created += 1
+            make_competition(f'网络安全竞赛{self.created}', days=self.created % 5)
+
+    def assert_list_budget(self, url, budget):
+        def request():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with mock.patch.object(catalog_cache, 'get', side_effect=lambda key, compute, version=None: compute()):
+            self.assertConstantQueries(request, lambda: self.add_competitions(10), budget=budget)
+
+    def test_list(self):
+        self.assert_list_budget('/api/competitions/', budget=1)
+
+    def test_list_pages(self):
+        self.assert_list_budget('/api/competitions/?page_size=50', budget=1)
+
+    def test_list_by_popularity(self):
+        self.assert_list_budget('/api/competitions/?ordering=popular&page_size=50', budget=1)
+
+    def test_filtered_list(self):
+        url = '/api/competitions/?type=线上&search=网络'
+        self.client.get(url)  # 首次请求加载检索索引
+        self.assert_list_budget(url, budget=1)
+
+    def test_open(self):
+        self.assert_list_budget('/api/competitions/open/', budget=1)
+
+    def test_index_backed_endpoints(self):
+        start = timezone.now().date()
+        for url in [
+            '/api/competitions/facets/',
+            f'/api/competitions/calendar/?start={start}&end={start + timedelta(days=31)}',
+            '/api/competitions/search/?query=网络',
+            '/api/competitions/autocomplete/?query=网络',
+        ]:
+            self.client.get(url)  # 首次请求加载索引
+            self.assert_list_budget(url, budget=0)
+
+
+class StaleWhileRevalidateTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.swr = StaleWhileRevalidateCache('test', soft_ttl=60, hard_ttl=600, lock_timeout=5)
+
+    def test_counts_hits_and_misses(self):
+        self.assertEqual(self.swr.get('k', lambda: 1), 1)
+        self.assertEqual(self.swr.get('k', lambda: 2), 1)
+        self.assertEqual(self.swr.stats(), {'hit': 1, 'stale': 0, 'miss': 1})
+
+    def test_serves_stale_value_while_another_worker_recomputes(self):
+        self.swr.get('k', lambda: 'old', version=1)
+        # 模拟另一个进程已抢到锁、正在重新计算
+        self.assertTrue(self.swr._acquire(self.swr._entry_key('k')))
+        compute = mock.Mock(return_value='new')
+        self.assertEqual(self.swr.get('k', compute, version=2), 'old')
+        compute.assert_not_called()
+        self.assertEqual(self.swr.stats()['stale'], 1)
+
+        self.swr._release(self.swr._entry_key('k'))
+        self.assertEqual(self.swr.get('k', compute, version=2), 'new')
+        self.assertEqual(self.swr.get('k', compute, version=2), 'new')
+        compute.assert_called_once()
+
+    def test_soft_ttl_expiry_triggers_refresh(self):
+        swr = StaleWhileRevalidateCache('test-expiry', soft_ttl=0, hard_ttl=600)
+        swr.get('k', lambda: 'old')
+        self.assertEqual(swr.get('k', lambda: 'new'), 'new')
+
+    def test_cold_miss_is_computed_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.swr.get('k', compute)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_uncacheable_results_are_not_stored(self):
+        self.assertIsNone(self.swr.get('k', lambda: None))
+        self.assertEqual(self.swr.get('k', lambda: 'value'), 'value')
 
-# Create your tests here.
@@ -1,25 +1,183 @@
 #competitions/views.py
 
-from rest_framework import viewsets, filters
+from datetime import timedelta
+
+from rest_framework import viewsets
+from rest_framework.decorators import action
 from .models import Competition
-from .serializers import CompetitionSerializer
+from .serializers import CompetitionSerializer, CompetitionListSerializer
+from .pagination import CompetitionCursorPagination, CompetitionPopularityPagination, CompetitionSearchPagination
+from .filters import CompetitionSearchFilter, CompetitionFacetFilter, parse_facet_query, parse_moment
+from .calendar_index import KINDS, calendar_index
+from .facets import facet_index
+from .search import search_index
+from .autocomplete import autocomplete_index
+from .caching import CatalogCacheMixin, cache_catalog
+from .snapshot import current_snapshot
+from utils.compiled_serializer import CompiledReadMixin, compile_serializer
 from rest_framework.permissions import AllowAny
-from django.http import JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
-class CompetitionViewSet(viewsets.ModelViewSet):
+# 日历查询的最大时间范围，月视图加前后两周足够
+CALENDAR_MAX_RANGE = timedelta(days=62)
+
+
+class CompetitionViewSet(CatalogCacheMixin, CompiledReadMixin, viewsets.ModelViewSet):
     queryset = Competition.objects.all()
     serializer_class = CompetitionSerializer
     permission_classes = [AllowAny]  # 确保允许任何人访问
     authentication_classes = []
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [CompetitionSearchFilter, CompetitionFacetFilter]
     search_fields = ['name']
+    pagination_class = CompetitionCursorPagination  # 带 page_size/cursor 参数时启用游标分页
+
+    def _ordering(self):
+        return self.request.query_params.get('ordering')
+
+    @property
+    def paginator(self):
+        # ordering=popular 时按申请数排序分页，带检索词时按相关度分页，游标与默认排序不通用
+        if not hasattr(self, '_paginator'):
+            if self._ordering() == 'popular':
+                self._paginator = CompetitionPopularityPagination()
+            elif self.request is not None and self.request.query_params.get(CompetitionSearchFilter.search_param):
+                self._paginator = CompetitionSearchPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'open':
+            queryset = queryset.open_for_registration()
+        if self.action in ('list', 'open'):
+            # 列表不加载 description，只有详情接口才需要
+            queryset = queryset.defer('description')
+            if self._ordering() == 'popular':
+                queryset = queryset.order_by('-application_count', 'id')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'open'):
+            return CompetitionListSerializer
+        return CompetitionSerializer
+
+    def _snapshot(self, request, allowed_params=()):
+        """
+        可以直接由目录快照响应时返回快照：只处理 JSON 格式、
+        不带筛选条件的请求，其余情况走数据库
+        """
+        if request.accepted_renderer.format != 'json':
+            return None
+        if not set(request.query_params) <= set(allowed_params):
+            return None
+        return current_snapshot()
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        snapshot = None
+        # 快照是完整目录，open 等复用 list 的动作有自己的筛选条件，只能走数据库
+        if self.action == 'list':
+            snapshot = self._snapshot(
+                request, (paginator.page_size_query_param, paginator.cursor_query_param)
+            )
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        positions = paginator.paginate_snapshot(snapshot, request)
+        if positions is None:
+            return HttpResponse(snapshot.list_json(), content_type='application/json')
+        envelope = JSONRenderer().render({'next': paginator.get_next_link()})
+        content = envelope[:-1] + b',"results":' + snapshot.list_json(positions) + b'}'
+        return HttpResponse(content, content_type='application/json')
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = self._snapshot(request)
+        content = None
+        if snapshot is not None and str(kwargs.get('pk', '')).isdigit():
+            content = snapshot.detail_json(int(kwargs['pk']))
+        if content is None:
+            return super().retrieve(request, *args, **kwargs)
+        return HttpResponse(content, content_type='application/json')
+
+    @action(detail=False, methods=['get'])
+    def open(self, request):
+        """
+        当前报名进行中的竞赛，条件由报名时间推导，走 reg_time_end 索引
+        """
+        return self.list(request)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        各类型、各状态的竞赛数量，筛选参数与列表接口相同，由内存位图索引计算
+        """
+        return Response(facet_index.facets(parse_facet_query(request.query_params)))
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        报名或比赛时间段与 [start, end) 有重叠的竞赛，供月视图、周视图使用。
+        kind 可限定为 registration 或 competition，结果中 windows 为重叠的时间段。
+        """
+        params = request.query_params
+        if not params.get('start') or not params.get('end'):
+            raise ValidationError({'detail': '需要 start 和 end 参数。'})
+        start, end = parse_moment('start', params['start']), parse_moment('end', params['end'])
+        if not start < end <= start + CALENDAR_MAX_RANGE:
+            raise ValidationError({'detail': f'end 应晚于 start，且范围不超过 {CALENDAR_MAX_RANGE.days} 天。'})
+        kinds = [kind for kind in params.getlist('kind') if kind in KINDS] or None
+
+        matches = calendar_index.overlapping(start, end, kinds=kinds)
+        # 用索引中的字段构造未保存的实例，输出格式与列表接口一致
+        serializer = compile_serializer(CompetitionListSerializer)(
+            [Competition(**{k: v for k, v in row.items() if k != 'windows'}) for row in matches],
+            many=True,
+        )
+        return Response([
+            dict(item, windows=row['windows']) for item, row in zip(serializer.data, matches)
+        ])
+
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+
+def _parse_limit(value, default, maximum):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
 
 @csrf_exempt
+@cache_catalog
 def search_competitions(request):
     query = request.GET.get('query', '')
     if not query:
         return JsonResponse([], safe=False)  # 如果没有查询参数，返回空列表
-    competitions = Competition.objects.filter(name__icontains=query)  # 按名称搜索
-    competition_list = [{"id": comp.id, "name": comp.name} for comp in competitions]
-    return JsonResponse(competition_list, safe=False)
\ No newline at end of file
+    limit = _parse_limit(request.GET.get('limit'), SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+    # 按相关度返回前 limit 条，附带得分和高亮片段
+    competition_list = search_index.results(query, limit=limit)
+    return JsonResponse(competition_list, safe=False)
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+@csrf_exempt
+def autocomplete_competitions(request):
+    """
+    竞赛名称输入联想，支持名称前缀、名称中间片段和拼音首字母
+    """
+    query = request.GET.get('query', '')
+    if not query:
+        return JsonResponse([], safe=False)
+    limit = _parse_limit(request.GET.get('limit'), AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT)
+    order = 'recent' if request.GET.get('order') == 'recent' else 'relevance'
+    suggestions = autocomplete_index.suggest(query, limit=limit, order=order)
+    return JsonResponse(suggestions, safe=False)
\ No newline at end of file
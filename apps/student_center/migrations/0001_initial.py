@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100, null=True)),
+                ('school', models.CharField(max_length=100)),
+                ('major', models.CharField(max_length=100)),
+                ('grade', models.CharField(max_length=10)),
+                ('gender', models.CharField(max_length=10)),
+                ('phone', models.CharField(max_length=15)),
+                ('email', models.EmailField(max_length=254, null=True)),
+                ('student_id', models.CharField(max_length=20, null=True, unique=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='student_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -6,6 +6,11 @@ from django.contrib.auth import get_user_model
 CustomUser = get_user_model()
 
 
+def profile_label(student_id):
+    """StudentProfile 的字符串表示；申请列表的快速路径（competition_application/rows.py）直接用 student_id 调用"""
+    return f"{student_id}'s profile"
+
+
 class StudentProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='student_profile')
     name = models.CharField(max_length=100, blank=True, null=True)  # 可为空，等待用户填写
@@ -18,4 +23,4 @@ class StudentProfile(models.Model):
     student_id = models.CharField(max_length=20, unique=True,null=True)  # 始终在注册时自动填入
 
     def __str__(self):
-        return f"{self.student_id}'s profile"
\ No newline at end of file
+        return profile_label(self.student_id)
\ No newline at end of file
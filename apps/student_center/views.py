@@ -5,8 +5,9 @@ from .models import StudentProfile
 from .serializers import StudentProfileSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from utils.compiled_serializer import CompiledReadMixin
 from apps.competition_application.serializers import CompetitionApplicationSerializer
-class StudentProfileView(generics.RetrieveUpdateAPIView):
+class StudentProfileView(CompiledReadMixin, generics.RetrieveUpdateAPIView):
     """
     获取和更新学生个人资料。
     """
@@ -0,0 +1,20 @@
+# apps/teacher_center/caching.py
+
+from django.core.cache import cache
+
+from utils.swr_cache import StaleWhileRevalidateCache
+
+# 教师目录版本号，任何 TeacherProfile 写入都会递增，
+# 教师搜索的缓存条目版本不一致时视为过期
+DIRECTORY_VERSION_KEY = 'teachers:directory_version'
+
+teacher_search_cache = StaleWhileRevalidateCache('teacher_search')
+
+
+def directory_version():
+    return cache.get(DIRECTORY_VERSION_KEY, 0)
+
+
+def bump_directory_version():
+    cache.add(DIRECTORY_VERSION_KEY, 0, None)
+    return cache.incr(DIRECTORY_VERSION_KEY)
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, default='', max_length=100)),
+                ('department', models.CharField(blank=True, default='', max_length=100)),
+                ('teacher_id', models.CharField(max_length=20, unique=True)),
+                ('phone', models.CharField(blank=True, default='', max_length=15)),
+                ('email', models.EmailField(max_length=254)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='teacher_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['teacher_id'],
+            },
+        ),
+    ]
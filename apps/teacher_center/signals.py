@@ -1,7 +1,9 @@
 # apps/teacher_center/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from .caching import bump_directory_version
 from .models import TeacherProfile
 
 CustomUser = get_user_model()
@@ -30,4 +32,11 @@ def create_or_update_teacher_profile(sender, instance, created, **kwargs):
                 profile.teacher_id = instance.teacher_id
                 profile.save()
             except TeacherProfile.DoesNotExist:
-                pass
\ No newline at end of file
+                pass
+
+
+@receiver(post_save, sender=TeacherProfile)
+@receiver(post_delete, sender=TeacherProfile)
+def teacher_profile_changed(sender, instance, **kwargs):
+    """教师资料变化后使教师搜索缓存过期"""
+    transaction.on_commit(bump_directory_version)
@@ -1,3 +1,82 @@
-from django.test import TestCase
+# apps/teacher_center/tests.py
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.competition_application.models import CompetitionApplication
+from apps.competitions.models import Competition
+from apps.student_center.models import StudentProfile
+
+from .caching import teacher_search_cache
+from .models import TeacherProfile
+
+CustomUser = get_user_model()
+
+
+class TeacherSearchCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create_user(
+            username='teacher1', email='teacher1@example.com', password='password123',
+            role='teacher', teacher_id='T0001',
+        )
+        self.profile = TeacherProfile.objects.get(user=user)
+        self.profile.name = '王老师'
+        self.profile.department = '计算机学院'
+        self.profile.save()
+
+    def test_repeat_search_is_cached(self):
+        first = self.client.get('/api/teacher/search/', {'query': '计算机'})
+        self.assertEqual([item['teacher_id'] for item in first.json()], ['T0001'])
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/teacher/search/', {'query': '计算机'})
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(teacher_search_cache.stats()['hit'], 1)
+
+    def test_profile_update_expires_cached_results(self):
+        self.client.get('/api/teacher/search/', {'query': '王'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.name = '李老师'
+            self.profile.save()
+        response = self.client.get('/api/teacher/search/', {'query': '王'})
+        self.assertEqual(response.json(), [])
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH=None)
+class TeacherAssignedApplicationsTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='teacher1', email='teacher1@example.com', password=None,
+            role='teacher', teacher_id='T0001',
+        )
+        teacher = TeacherProfile.objects.get(user=self.user)
+        student_user = CustomUser.objects.create_user(
+            username='student1', email='student1@example.com', password=None,
+            role='student', student_id='S0001',
+        )
+        student = StudentProfile.objects.get(user=student_user)
+        now = timezone.now()
+        for i in range(5):
+            competition = Competition.objects.create(name=f'竞赛{i}', reg_time_end=now + timedelta(days=i))
+            CompetitionApplication.objects.create(
+                student=student, competition=competition, teacher=teacher, contact_info='13800000000',
+            )
+        self.expected = list(CompetitionApplication.objects.order_by('-submission_time', 'id').values_list('id', flat=True))
+        self.client.force_authenticate(self.user)
+
+    def test_paginated_with_total(self):
+        ids, url = [], '/api/teacher/applications/?page_size=2&with_total=1'
+        while url:
+            page = self.client.get(url).json()
+            self.assertEqual(page['total'], 5)
+            ids.extend(item['id'] for item in page['results'])
+            url = page['next']
+        self.assertEqual(ids, self.expected)
@@ -2,7 +2,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TeacherProfileView, ApproveCompetitionApplicationView, search_teachers,TeacherAssignedApplicationsView
+from .views import TeacherProfileView, ApproveCompetitionApplicationView, search_teachers,TeacherAssignedApplicationsView, TeacherDashboardView
 
 router = DefaultRouter()
 # 注册 TeacherProfileViewSet，如果有多个视图，推荐使用 ViewSet
@@ -16,4 +16,5 @@ urlpatterns = [
     path('', include(router.urls)),  # 如果有其他视图，可以继续注册
     path('search/', search_teachers, name='teacher-search'),
     path('applications/', TeacherAssignedApplicationsView.as_view(), name='teacher-applications'),
+    path('dashboard/', TeacherDashboardView.as_view(), name='teacher-dashboard'),
 ]
@@ -2,19 +2,27 @@
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from apps.competition_application.models import CompetitionApplication
+from apps.competition_application.rows import STATUS_QUERY_PARAM, ApplicationRowListMixin
 from apps.competition_application.serializers import CompetitionApplicationSerializer
+from apps.competition_application.caching import TEACHER, cached_for_owner
+from apps.competition_application.pagination import ApplicationCursorPagination
+from apps.competition_application.rollups import summary
+from apps.competition_application.transitions import APPLICATION_TRANSITIONS, can_transition, transition
+from utils.compiled_serializer import CompiledReadMixin
 from rest_framework import generics, permissions, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied  # 添加这行导入
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import TeacherProfile
 from .serializers import TeacherProfileSerializer
 from .permissions import IsTeacher
+from .caching import teacher_search_cache, directory_version
 from django.db import models
 import logging
 logger = logging.getLogger(__name__)
 
-class TeacherProfileView(generics.RetrieveUpdateAPIView):
+class TeacherProfileView(CompiledReadMixin, generics.RetrieveUpdateAPIView):
     """
     获取和更新教师个人资料
     """
@@ -72,29 +80,32 @@ def search_teachers(request):
     if not query:
         return JsonResponse([], safe=False)
 
-    # 按名称或部门进行模糊搜索
-    teachers = TeacherProfile.objects.filter(
-        models.Q(name__icontains=query) |
-        models.Q(department__icontains=query)
-    )
-
-    # 返回更完整的教师信息
-    teacher_list = [
-        {
-            "id": teacher.id,
-            "name": teacher.name,
-            "department": teacher.department,
-            "teacher_id": teacher.teacher_id
-        }
-        for teacher in teachers
-    ]
-
+    def compute():
+        # 按名称或部门进行模糊搜索
+        teachers = TeacherProfile.objects.filter(
+            models.Q(name__icontains=query) |
+            models.Q(department__icontains=query)
+        ).only('id', 'name', 'department', 'teacher_id')
+
+        # 返回更完整的教师信息
+        return [
+            {
+                "id": teacher.id,
+                "name": teacher.name,
+                "department": teacher.department,
+                "teacher_id": teacher.teacher_id
+            }
+            for teacher in teachers
+        ]
+
+    # 选择指导教师时大量学生会同时搜索，结果缓存并在过期时只由一个进程重新查询
+    teacher_list = teacher_search_cache.get(query, compute, version=directory_version())
     return JsonResponse(teacher_list, safe=False)
 
 
 
 
-class ApproveCompetitionApplicationView(generics.UpdateAPIView):
+class ApproveCompetitionApplicationView(CompiledReadMixin, generics.UpdateAPIView):
     queryset = CompetitionApplication.objects.all()
     serializer_class = CompetitionApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -110,40 +121,47 @@ class ApproveCompetitionApplicationView(generics.UpdateAPIView):
         # 获取更新的状态
         status_input = request.data.get('status')
 
-        if status_input == 'approved':
-            application.application_status = 'approved'  # 设置状态为批准
-        elif status_input == 'rejected':
-            application.application_status = 'rejected'  # 设置状态为拒绝
-        else:
+        if status_input not in ('approved', 'rejected'):
             return Response({'detail': '无效的状态。'}, status=status.HTTP_400_BAD_REQUEST)
 
-        application.save()  # 保存更新后的申请状态
-        serializer = self.get_serializer(application)
+        if not can_transition(APPLICATION_TRANSITIONS, application.application_status, status_input):
+            return Response({'detail': '只能审核申报中的申请。'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 条件更新状态，同时调整名额和计数；读取之后已被并发处理时不再修改
+        if not transition(application, status_input):
+            return Response({'detail': '申请已被他人处理，请刷新后重试。'}, status=status.HTTP_409_CONFLICT)
+        serializer = self.get_read_serializer(application)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TeacherAssignedApplicationsView(generics.ListAPIView):
+class TeacherAssignedApplicationsView(ApplicationRowListMixin, generics.ListAPIView):
     serializer_class = CompetitionApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ApplicationCursorPagination  # 带 page_size/cursor 参数时启用游标分页
 
     def get_queryset(self):
-        teacher_id = self.request.user.teacher_id
-        print(f"查询教师工号: {teacher_id} 的申请")
-
-        # 修改查询条件，确保与数据库字段匹配
-        queryset = CompetitionApplication.objects.filter(
-            teacher__teacher_id=teacher_id  # 使用双下划线访问关联字段
+        return CompetitionApplication.objects.filter(
+            teacher__teacher_id=self.request.user.teacher_id  # 使用双下划线访问关联字段
         ).select_related(
             'student',
             'competition',
-            'teacher'
+            'teacher',
+            'reimbursement'
         )
-        # 添加调试信息
-        print(f"SQL Query: {queryset.query}")
-        print(f"找到的申请数量: {queryset.count()}")
-        return queryset
-
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+
+    def get_approximate_total(self, queryset):
+        """分页时附带的申请总数，按教师缓存；按状态筛选时直接计数"""
+        if self.request.query_params.get(STATUS_QUERY_PARAM):
+            return queryset.count()
+        return cached_for_owner(TEACHER, self.request.user.teacher_id, 'total', queryset.count)
+
+
+class TeacherDashboardView(APIView):
+    """
+    教师工作台汇总：名下申请按申报状态、流程状态、报销状态的数量，以及报销金额。
+    读取教师汇总表中的一行，不对申请表做统计
+    """
+    permission_classes = [IsAuthenticated, IsTeacher]
+
+    def get(self, request):
+        return Response(summary(request.user.teacher_id))
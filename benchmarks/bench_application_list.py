@@ -0,0 +1,121 @@
+# benchmarks/bench_application_list.py
+"""
+测量申请列表的生成吞吐量：CompetitionApplicationSerializer（select_related）
+与 rows 模块的 .values() 快速路径、只取 id、状态、竞赛名称的稀疏字段集，
+以及竞赛、教师旁加载（include=competition,teacher）的响应。
+每次生成一个教师名下的 500 条申请（分布在 5 个竞赛上），含查询和 JSON 渲染。
+
+    python -m benchmarks.bench_application_list
+"""
+import random
+
+from benchmarks.common import TestDatabase, make_competitions, measure, summarize, print_table, fmt_ms
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.competition_application import rows
+from apps.competition_application.models import CompetitionApplication, CompetitionReimbursement
+from apps.competition_application.serializers import CompetitionApplicationSerializer
+from apps.competitions.models import Competition
+from apps.student_center.models import StudentProfile
+from apps.teacher_center.models import TeacherProfile
+
+APPLICATIONS = 500
+COMPETITIONS = 5
+REPEAT = 30
+
+CustomUser = get_user_model()
+
+
+def make_applications(count, seed=3):
+    rng = random.Random(seed)
+    user = CustomUser.objects.create(username='T0001', email='T0001@example.com', role='teacher', teacher_id='T0001')
+    teacher = TeacherProfile.objects.get_or_create(
+        user=user, defaults={'teacher_id': 'T0001', 'name': '王老师', 'department': '计算机学院'},
+    )[0]
+    competitions = list(Competition.objects.values_list('id', flat=True)[:COMPETITIONS])
+    applications = []
+    for n in range(count):
+        student_user = CustomUser.objects.create(
+            username=f'S{n:05d}', email=f'S{n:05d}@example.com', role='student', student_id=f'S{n:05d}',
+        )
+        student = StudentProfile.objects.get_or_create(user=student_user, defaults={'student_id': f'S{n:05d}'})[0]
+        applications.append(CompetitionApplication(
+            student=student, competition_id=rng.choice(competitions), teacher=teacher,
+            contact_info='13800000000', description='参赛说明' * 5,
+            application_status=rng.choice(['pending', 'approved', 'rejected']),
+            photo='competition_files/photo.jpg' if rng.random() < 0.5 else None,
+        ))
+    CompetitionApplication.objects.bulk_create(applications)
+    CompetitionReimbursement.objects.bulk_create([
+        CompetitionReimbursement(
+            application=application, registration_fee=100, transportation_fee=20, accommodation_fee=0,
+            other_fee=0, total_amount=120, bank_name='银行', bank_account='6222000000000000',
+            account_name='学生', invoice='reimbursement_files/invoice.pdf',
+        )
+        for application in CompetitionApplication.objects.all()[::3]
+    ])
+
+
+def queryset():
+    return CompetitionApplication.objects.filter(teacher__teacher_id='T0001').select_related(
+        'student', 'competition', 'teacher', 'reimbursement',
+    )
+
+
+def via_serializer(request):
+    return JSONRenderer().render(
+        CompetitionApplicationSerializer(queryset(), many=True, context={'request': request}).data
+    )
+
+
+def via_rows(request, fields):
+    return JSONRenderer().render(rows.render(rows.values(queryset(), fields), fields, request))
+
+
+def via_sideload(request, fields, include):
+    page = list(rows.values(queryset(), fields, include))
+    return JSONRenderer().render({
+        'results': rows.render(page, fields, request, include),
+        'included': rows.included(page, include, request),
+    })
+
+
+def main():
+    with TestDatabase():
+        make_competitions(COMPETITIONS)
+        make_applications(APPLICATIONS)
+        request = Request(RequestFactory().get('/api/teacher/applications/'))
+        full = rows.parse_fields(None)
+        sparse = rows.parse_fields('id,application_status,competition')
+        include = rows.parse_include('competition,teacher', full)
+
+        same = via_serializer(request) == via_rows(request, full)
+        print(f'{APPLICATIONS} 条申请，两条路径输出逐字节相同: {same}')
+
+        results = [
+            ('序列化器', lambda: via_serializer(request)),
+            ('values() 快速路径', lambda: via_rows(request, full)),
+            ('快速路径 fields=id,application_status,competition', lambda: via_rows(request, sparse)),
+            ('快速路径 include=competition,teacher', lambda: via_sideload(request, full, include)),
+        ]
+        table = []
+        for label, func in results:
+            stats = summarize(measure(func, repeat=REPEAT))
+            table.append([
+                label, fmt_ms(stats['mean']), fmt_ms(stats['p50']), fmt_ms(stats['p99']),
+                f"{APPLICATIONS / stats['mean'] * 1000:,.0f}", f'{len(func()) / 1024:,.0f}KB',
+            ])
+
+    print_table(
+        f'生成 {APPLICATIONS} 条申请的列表（查询 + JSON 渲染），重复 {REPEAT} 次',
+        ['路径', 'mean', 'p50', 'p99', '行/秒', '响应大小'],
+        table,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_autocomplete.py
+"""
+模拟并发的逐键输入，测量输入联想接口的延迟，并与原 icontains 搜索对比。
+
+    python -m benchmarks.bench_autocomplete
+"""
+import random
+import threading
+
+from benchmarks.common import (
+    TestDatabase, make_competitions, measure, summarize, print_table, fmt_ms,
+)
+
+from django.test import RequestFactory
+
+from apps.competitions.autocomplete import autocomplete_index, pinyin_initials
+from apps.competitions.models import Competition
+from apps.competitions.views import autocomplete_competitions
+
+SIZES = [5_000, 50_000]
+THREADS = 16
+WORDS_PER_THREAD = 20
+
+
+def keystrokes(names, rng):
+    """随机挑选名称，按逐个字符输入生成查询序列（部分使用拼音首字母）"""
+    queries = []
+    for _ in range(WORDS_PER_THREAD):
+        name = rng.choice(names)
+        word = pinyin_initials(name) if rng.random() < 0.3 else name[rng.randint(0, 4):]
+        queries.extend(word[:n] for n in range(1, min(len(word), 8) + 1))
+    return queries
+
+
+def run_concurrent(func, names):
+    samples = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        local = []
+        for query in keystrokes(names, random.Random(seed)):
+            local.extend(measure(lambda: func(query), repeat=1))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def main():
+    factory = RequestFactory()
+
+    def via_view(query):
+        return autocomplete_competitions(factory.get('/api/competitions/autocomplete/', {'query': query}))
+
+    def via_icontains(query):
+        return [{'id': c.id, 'name': c.name} for c in Competition.objects.filter(name__icontains=query)]
+
+    rows = []
+    with TestDatabase():
+        loaded = 0
+        for size in SIZES:
+            make_competitions(size - loaded, seed=size)
+            loaded = size
+            names = list(Competition.objects.values_list('name', flat=True))
+
+            autocomplete_index.reset()
+            build = measure(lambda: autocomplete_index.suggest('全'), repeat=1)[0]
+            print(f'{size} 条竞赛建索引耗时: {build:.0f}ms')
+
+            for label, func in [
+                ('index', lambda q: autocomplete_index.suggest(q)),
+                ('view', via_view),
+            ]:
+                stats = summarize(run_concurrent(func, names))
+                rows.append([size, label, THREADS, fmt_ms(stats['p50']), fmt_ms(stats['p99'])])
+
+            # 原实现逐键调用 icontains，只取单线程少量样本
+            queries = keystrokes(names, random.Random(0))[:40]
+            stats = summarize([measure(lambda: via_icontains(q), repeat=1)[0] for q in queries])
+            rows.append([size, 'icontains', 1, fmt_ms(stats['p50']), fmt_ms(stats['p99'])])
+
+    print_table(
+        '输入联想：并发逐键输入延迟',
+        ['竞赛数', '路径', '线程数', 'p50', 'p99'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_bulk_transition.py
+"""
+教师批量审批：逐条调用 transitions.transition 与一次 transitions.transition_many，
+同一教师名下 500 条申报中的申请（分布在 5 个竞赛上）全部批准或拒绝。
+每次运行在事务中执行后回滚，下一次仍从全部申报中开始；耗时包含计数、名额、汇总的更新。
+
+    python -m benchmarks.bench_bulk_transition
+"""
+from benchmarks.bench_application_list import APPLICATIONS, COMPETITIONS, make_applications
+from benchmarks.common import TestDatabase, make_competitions, measure, summarize, print_table, fmt_ms
+
+from django.db import transaction
+
+from apps.competition_application.counters import reconcile_counters
+from apps.competition_application.models import CompetitionApplication
+from apps.competition_application.quotas import reconcile_quotas, set_capacity
+from apps.competition_application.rollups import rebuild_rollups
+from apps.competition_application.transitions import transition, transition_many
+from apps.competitions.models import Competition
+from utils.query_budget import QueryRecorder
+
+REPEAT = 10
+
+
+def rolled_back(func):
+    def run():
+        with transaction.atomic():
+            func()
+            transaction.set_rollback(True)
+    return run
+
+
+def one_by_one(target):
+    for application in CompetitionApplication.objects.filter(teacher_id='T0001').only(
+            'id', 'competition', 'student', 'teacher', 'process_status'):
+        transition(application, target)
+
+
+def in_bulk(target):
+    ids = list(CompetitionApplication.objects.filter(teacher_id='T0001').values_list('id', flat=True))
+    transition_many(ids, target, 'T0001')
+
+
+def main():
+    with TestDatabase():
+        make_competitions(COMPETITIONS)
+        make_applications(APPLICATIONS)
+        CompetitionApplication.objects.update(application_status='pending')
+        for competition in Competition.objects.all():
+            set_capacity(competition, APPLICATIONS)
+        reconcile_counters()
+        reconcile_quotas()
+        rebuild_rollups()
+
+        table = []
+        for target in ('approved', 'rejected'):
+            for label, func in (('逐条 transition', one_by_one), ('transition_many', in_bulk)):
+                run = rolled_back(lambda: func(target))
+                with QueryRecorder() as queries:
+                    run()
+                stats = summarize(measure(run, repeat=REPEAT))
+                table.append([
+                    f'{target} / {label}', fmt_ms(stats['mean']), fmt_ms(stats['p50']), fmt_ms(stats['p99']),
+                    len(queries),
+                ])
+
+    print_table(
+        f'审批 {APPLICATIONS} 条申请（{COMPETITIONS} 个竞赛，均设名额），重复 {REPEAT} 次',
+        ['方式', 'mean', 'p50', 'p99', 'SQL 语句数'],
+        table,
+    )
+
+
+if __name__ == '__main__':
+    main()
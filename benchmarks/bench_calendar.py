@@ -0,0 +1,67 @@
+# benchmarks/bench_calendar.py
+"""
+测量日历重叠查询的延迟：区间树索引与四个时间比较条件的 ORM 查询对比。
+
+    python -m benchmarks.bench_calendar
+"""
+import random
+from datetime import timedelta
+
+from benchmarks.common import (
+    TestDatabase, make_competitions, measure, summarize, print_table, fmt_ms,
+)
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.competitions.calendar_index import calendar_index
+from apps.competitions.models import Competition
+
+SIZES = [5_000, 50_000]
+VIEWS = [('周视图', 7), ('月视图', 31)]
+QUERIES = 100
+
+
+def via_orm(start, end):
+    return list(Competition.objects.filter(
+        Q(reg_time_start__lt=end, reg_time_end__gte=start)
+        | Q(comp_time_start__lt=end, comp_time_end__gte=start)
+    ).values('id', 'name', 'type', 'reg_time_start', 'reg_time_end', 'comp_time_start', 'comp_time_end'))
+
+
+def main():
+    rows = []
+    with TestDatabase():
+        loaded = 0
+        for size in SIZES:
+            make_competitions(size - loaded, seed=size)
+            loaded = size
+
+            calendar_index.reset()
+            now = timezone.now()
+            build = measure(lambda: calendar_index.overlapping(now, now + timedelta(days=1)), repeat=1)[0]
+            print(f'{size} 条竞赛建区间树耗时: {build:.0f}ms')
+
+            for label, days in VIEWS:
+                rng = random.Random(days)
+                windows = []
+                for _ in range(QUERIES):
+                    start = now + timedelta(days=rng.randint(-180, 180))
+                    windows.append((start, start + timedelta(days=days)))
+
+                hits = [len(calendar_index.overlapping(s, e)) for s, e in windows]
+                for path, func in [('interval tree', calendar_index.overlapping), ('orm', via_orm)]:
+                    samples = [measure(lambda: func(s, e), repeat=1)[0] for s, e in windows]
+                    stats = summarize(samples)
+                    rows.append([size, label, path, sum(hits) // len(hits),
+                                 fmt_ms(stats['p50']), fmt_ms(stats['p99'])])
+
+    print_table(
+        '日历：时间段重叠查询延迟',
+        ['竞赛数', '视图', '路径', '平均命中数', 'p50', 'p99'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_compiled_serializer.py
+"""
+序列化器微基准：DRF 序列化器与 compile_serializer 编译后的输出吞吐量（行/秒）。
+实例预先从数据库加载，只测量序列化本身；“单个实例” 一列为每次新建序列化器输出一个对象，
+对应详情、审批等接口，“列表” 一列为一次输出 500 个对象。
+
+    python -m benchmarks.bench_compiled_serializer
+"""
+from benchmarks.bench_application_list import APPLICATIONS, COMPETITIONS, make_applications
+from benchmarks.common import TestDatabase, make_competitions, measure, summarize, print_table
+
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from apps.competition_application.models import CompetitionApplication
+from apps.competition_application.serializers import CompetitionApplicationSerializer
+from apps.competitions.models import Competition
+from apps.competitions.serializers import CompetitionSerializer
+from apps.student_center.models import StudentProfile
+from apps.student_center.serializers import StudentProfileSerializer
+from apps.teacher_center.models import TeacherProfile
+from apps.teacher_center.serializers import TeacherProfileSerializer
+from utils.compiled_serializer import compile_serializer
+
+SINGLE = 500
+REPEAT = 10
+
+
+def rows_per_second(func, count):
+    stats = summarize(measure(func, repeat=REPEAT))
+    return count / stats['p50'] * 1000
+
+
+def main():
+    with TestDatabase():
+        make_competitions(APPLICATIONS)
+        make_applications(APPLICATIONS)
+        context = {'request': Request(RequestFactory().get('/api/competition_applications/'))}
+        cases = [
+            (CompetitionSerializer, list(Competition.objects.all()[:APPLICATIONS])),
+            (TeacherProfileSerializer, list(TeacherProfile.objects.all()) * APPLICATIONS),
+            (StudentProfileSerializer, list(StudentProfile.objects.all()[:APPLICATIONS])),
+            (CompetitionApplicationSerializer, list(CompetitionApplication.objects.select_related(
+                'student', 'competition', 'teacher', 'reimbursement',
+            ))),
+        ]
+        table = []
+        for serializer_class, instances in cases:
+            compiled = compile_serializer(serializer_class)
+            count = len(instances)
+            singles = instances[:SINGLE]
+            before_list = rows_per_second(lambda: serializer_class(instances, many=True, context=context).data, count)
+            after_list = rows_per_second(lambda: compiled(instances, many=True, context=context).data, count)
+            before_one = rows_per_second(
+                lambda: [serializer_class(item, context=context).data for item in singles], len(singles))
+            after_one = rows_per_second(
+                lambda: [compiled(item, context=context).data for item in singles], len(singles))
+            table.append([
+                serializer_class.__name__,
+                f'{before_list:,.0f}', f'{after_list:,.0f}', f'{after_list / before_list:.1f}x',
+                f'{before_one:,.0f}', f'{after_one:,.0f}', f'{after_one / before_one:.1f}x',
+            ])
+
+    print_table(
+        f'序列化吞吐量（行/秒，p50，重复 {REPEAT} 次；申请 {APPLICATIONS} 条，分布在 {COMPETITIONS} 个竞赛上）',
+        ['序列化器', '列表 DRF', '列表编译后', '提升', '单个实例 DRF', '单个实例编译后', '提升'],
+        table,
+    )
+
+
+if __name__ == '__main__':
+    main()
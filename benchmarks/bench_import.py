@@ -0,0 +1,98 @@
+# benchmarks/bench_import.py
+"""
+在 5 万条合成数据上对比逐条 get_or_create + save 与批量差异同步。
+
+    python -m benchmarks.bench_import
+"""
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.common import TestDatabase, competition_name, print_table, TYPES, FILLER
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.competitions.models import Competition
+from apps.competitions.sync import sync_competitions
+
+FEED_SIZE = 50_000
+# 逐条写入太慢，只跑一部分再按行数换算
+LEGACY_SAMPLE = 5_000
+
+
+def synthetic_feed(size, seed=7):
+    rng = random.Random(seed)
+    now = timezone.now().replace(second=0, microsecond=0)
+    records = []
+    for n in range(size):
+        reg_start = now + timedelta(days=rng.randint(-100, 100))
+        records.append({
+            'name': competition_name(rng, n),
+            'link': f'https://example.com/{n}',
+            'type': rng.choice(TYPES),
+            'reg_time_start': reg_start,
+            'reg_time_end': reg_start + timedelta(days=10),
+            'comp_time_start': reg_start + timedelta(days=15),
+            'comp_time_end': reg_start + timedelta(days=16),
+            'description': FILLER,
+            'status': rng.randint(0, 4),
+        })
+    return records
+
+
+def legacy_import(records):
+    """原 process_competitions 的写入方式"""
+    for record in records:
+        values = {k: v for k, v in record.items() if k != 'name'}
+        competition, created = Competition.objects.get_or_create(name=record['name'], defaults=values)
+        if not created:
+            for field, value in values.items():
+                setattr(competition, field, value)
+            competition.save()
+
+
+def timed(func, *args):
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+    return result, elapsed, len(queries)
+
+
+def main():
+    feed = synthetic_feed(FEED_SIZE)
+    changed_feed = [dict(r) for r in feed]
+    for record in random.Random(1).sample(changed_feed, FEED_SIZE // 10):
+        record['description'] += '（已更新）'
+
+    rows = []
+    with TestDatabase():
+        for label, records in [('首次导入', feed), ('重复导入（无变化）', feed), ('10% 记录变化', changed_feed)]:
+            report, elapsed, queries = timed(sync_competitions, records)
+            rows.append(['bulk sync', label, report.created, report.updated, report.unchanged,
+                         queries, f'{elapsed:.2f}s'])
+        Competition.objects.all().delete()
+
+        sample = feed[:LEGACY_SAMPLE]
+        for label in ['首次导入', '重复导入（无变化）']:
+            _, elapsed, queries = timed(legacy_import, sample)
+            scale = FEED_SIZE / LEGACY_SAMPLE
+            rows.append(['get_or_create', label, '-', '-', '-',
+                         f'{int(queries * scale)}*', f'{elapsed * scale:.2f}s*'])
+
+    print_table(
+        f'竞赛导入：{FEED_SIZE} 条合成数据（* 为按 {LEGACY_SAMPLE} 条样本换算）',
+        ['方式', '场景', '新增', '更新', '未变化', 'SQL 数', '耗时'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_open_feed.py
+"""
+测量 “对我开放” 推荐第一页的延迟：每次请求对申请表做反连接的 ORM 查询，
+与进程内开放集合加缓存的已申请集合对比。20000 名学生，每人申请 0～10 个竞赛。
+
+    python -m benchmarks.bench_open_feed
+"""
+import random
+
+from benchmarks.common import (
+    TestDatabase, make_competitions, measure, summarize, print_table, fmt_ms,
+)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from apps.competition_application.feed import APPLIED_STATUSES, applied_competition_ids
+from apps.competition_application.models import CompetitionApplication
+from apps.competitions.models import Competition
+from apps.competitions.open_index import open_index
+from apps.student_center.models import StudentProfile
+from apps.teacher_center.models import TeacherProfile
+
+CATALOG_SIZE = 20_000
+STUDENTS = 20_000
+MAX_APPLICATIONS = 10
+PAGE_SIZE = 20
+QUERIES = 500
+BATCH_SIZE = 2000
+
+CustomUser = get_user_model()
+
+
+def make_students(count):
+    users = [
+        CustomUser(username=f'S{n:06d}', email=f'S{n:06d}@example.com', role='student', student_id=f'S{n:06d}')
+        for n in range(count)
+    ]
+    CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    users = CustomUser.objects.filter(role='student').order_by('id')
+    StudentProfile.objects.bulk_create(
+        [StudentProfile(user=user, student_id=user.student_id) for user in users],
+        batch_size=BATCH_SIZE,
+    )
+    return list(StudentProfile.objects.values_list('id', flat=True))
+
+
+def make_applications(students, seed=7):
+    """学生大多申请报名进行中的竞赛，使反连接确实排除掉一部分开放竞赛"""
+    rng = random.Random(seed)
+    user = CustomUser.objects.create(username='T0001', email='T0001@example.com', role='teacher', teacher_id='T0001')
+    teacher = TeacherProfile.objects.get_or_create(user=user, defaults={'teacher_id': 'T0001'})[0]
+    open_ids = list(Competition.objects.open_for_registration().values_list('id', flat=True))
+    all_ids = list(Competition.objects.values_list('id', flat=True))
+    batch = []
+    for student in students:
+        chosen = set()
+        for _ in range(rng.randint(0, MAX_APPLICATIONS)):
+            chosen.add(rng.choice(open_ids if rng.random() < 0.8 else all_ids))
+        for competition_id in chosen:
+            batch.append(CompetitionApplication(
+                student_id=student,
+                competition_id=competition_id,
+                teacher=teacher,
+                contact_info='13800000000',
+                application_status=rng.choice(['pending', 'pending', 'approved', 'cancelled']),
+            ))
+        if len(batch) >= BATCH_SIZE:
+            CompetitionApplication.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        CompetitionApplication.objects.bulk_create(batch)
+    return len(open_ids)
+
+
+def via_anti_join(student):
+    applied = CompetitionApplication.objects.filter(
+        student_id=student, application_status__in=APPLIED_STATUSES,
+    ).values('competition_id')
+    return [c.id for c in Competition.objects.open_for_registration().exclude(id__in=applied).defer(
+        'description',
+    ).order_by(F('reg_time_end').asc(nulls_last=True), 'id')[:PAGE_SIZE + 1]]
+
+
+def via_index(student):
+    ids = open_index.open_ids(exclude=applied_competition_ids(student), limit=PAGE_SIZE + 1)
+    competitions = Competition.objects.defer('description').in_bulk(ids)
+    return [pk for pk in ids if pk in competitions]
+
+
+def main():
+    with TestDatabase():
+        make_competitions(CATALOG_SIZE)
+        students = make_students(STUDENTS)
+        open_count = make_applications(students)
+        print(f'{CATALOG_SIZE} 条竞赛（报名进行中 {open_count} 条），{STUDENTS} 名学生，'
+              f'{CompetitionApplication.objects.count()} 条申请')
+
+        open_index.reset()
+        build = measure(lambda: open_index.open_ids(limit=1), repeat=1)[0]
+        print(f'开放集合索引加载耗时: {build:.0f}ms')
+
+        rng = random.Random(1)
+        sample = [rng.choice(students) for _ in range(QUERIES)]
+        now = timezone.now()
+        mismatched = sum(via_anti_join(s) != open_index.open_ids(
+            now=now, exclude=applied_competition_ids(s), limit=PAGE_SIZE + 1,
+        ) for s in sample[:50])
+        print(f'两条路径结果不一致的学生数（抽查 50 名）: {mismatched}')
+
+        rows = []
+        cache.clear()
+        for label, func in [
+            ('orm 反连接', via_anti_join),
+            ('索引，已申请集合未缓存', via_index),
+            ('索引，已申请集合已缓存', via_index),
+        ]:
+            stats = summarize([measure(lambda: func(s), repeat=1)[0] for s in sample])
+            rows.append([label, fmt_ms(stats['mean']), fmt_ms(stats['p50']), fmt_ms(stats['p99'])])
+
+    print_table(
+        f'“对我开放” 推荐第一页（{PAGE_SIZE} 条）延迟，{QUERIES} 次随机学生请求',
+        ['路径', 'mean', 'p50', 'p99'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
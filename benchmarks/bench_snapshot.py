@@ -0,0 +1,107 @@
+# benchmarks/bench_snapshot.py
+"""
+8 个工作进程同时请求竞赛列表、分页和详情接口，对比数据库路径与目录快照路径的
+延迟和内存占用（RSS 与按共享比例分摊的 PSS）。响应缓存被绕过，只比较取数和序列化。
+
+    python -m benchmarks.bench_snapshot
+"""
+import multiprocessing
+import os
+import random
+import tempfile
+from unittest import mock
+
+from benchmarks.common import (
+    TestDatabase, make_competitions, measure, summarize, print_table, fmt_ms,
+)
+
+from django.db import connection
+from django.test import Client, override_settings
+
+from apps.competitions.caching import catalog_cache
+from apps.competitions.models import Competition
+from apps.competitions.snapshot import publish_snapshot
+
+CATALOG_SIZE = 5_000
+WORKERS = 8
+REQUESTS_PER_WORKER = 300
+
+
+def memory_kb():
+    """返回 (RSS, PSS)，单位 KB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0])
+    return values.get('Rss', 0), values.get('Pss', 0)
+
+
+def requests_for(seed, ids):
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(REQUESTS_PER_WORKER):
+        roll = rng.random()
+        if roll < 0.1:
+            urls.append('/api/competitions/')
+        elif roll < 0.5:
+            urls.append(f'/api/competitions/?page_size={rng.choice([20, 50, 100])}')
+        else:
+            urls.append(f'/api/competitions/{rng.choice(ids)}/')
+    return urls
+
+
+def worker(args):
+    seed, ids, snapshot_path = args
+    # 子进程重新建立数据库连接
+    connection.close()
+    client = Client()
+
+    def uncached(key, compute, version=None):
+        return compute()
+
+    samples = []
+    with override_settings(CATALOG_SNAPSHOT_PATH=snapshot_path), \
+            mock.patch.object(catalog_cache, 'get', side_effect=uncached):
+        for url in requests_for(seed, ids):
+            samples.extend(measure(lambda: client.get(url), repeat=1))
+    rss, pss = memory_kb()
+    return samples, rss, pss
+
+
+def run(snapshot_path, ids):
+    context = multiprocessing.get_context('fork')
+    with context.Pool(WORKERS) as pool:
+        results = pool.map(worker, [(seed, ids, snapshot_path) for seed in range(WORKERS)])
+    samples = [sample for result in results for sample in result[0]]
+    rss = sum(result[1] for result in results) / len(results)
+    pss = sum(result[2] for result in results) / len(results)
+    return summarize(samples), rss, pss
+
+
+def main():
+    rows = []
+    with TestDatabase(shared=True):
+        make_competitions(CATALOG_SIZE)
+        ids = list(Competition.objects.values_list('id', flat=True))
+        directory = tempfile.mkdtemp()
+        snapshot_path = os.path.join(directory, 'catalog.snap')
+        publish_snapshot(snapshot_path)
+        print(f'{CATALOG_SIZE} 条竞赛的快照大小: {os.path.getsize(snapshot_path) / 1024:.0f}KB')
+        connection.close()
+
+        for label, path in [('orm', None), ('snapshot', snapshot_path)]:
+            stats, rss, pss = run(path, ids)
+            rows.append([label, WORKERS, fmt_ms(stats['p50']), fmt_ms(stats['p99']),
+                         f'{rss / 1024:.1f}MB', f'{pss / 1024:.1f}MB'])
+
+    print_table(
+        f'目录接口：{WORKERS} 个进程并发（列表 10%、分页 40%、详情 50%）',
+        ['路径', '进程数', 'p50', 'p99', '平均 RSS', '平均 PSS'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
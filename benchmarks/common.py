@@ -0,0 +1,123 @@
+# benchmarks/common.py
+"""
+基准测试公共工具。
+
+基准测试在独立创建的测试库中运行，不会读写业务数据。运行方式（项目根目录）：
+
+    python -m benchmarks.bench_search
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'competition_platform.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.competitions.models import Competition  # noqa: E402
+
+PREFIXES = ['全国', '全国大学生', '中国', '华东', '西部', '国际', '高校', '青少年', '省级', '第十届']
+TOPICS = ['网络安全', '信息安全', '数学建模', '程序设计', '人工智能', '机器人', '电子设计',
+          '创新创业', '物联网', '大数据', '密码学', '软件测试', '嵌入式', '区块链']
+SUFFIXES = ['竞赛', '大赛', '挑战赛', '技能大赛', '邀请赛', '联赛', 'CTF', '夺旗赛']
+TYPES = ['线上', '线下', '线上+线下', '团队赛', '个人赛']
+FILLER = ('本次比赛面向全国高校在校学生，旨在提升学生的实践能力与创新意识，'
+          '比赛分为初赛与决赛两个阶段，题目涵盖 Web、Pwn、Reverse、Crypto、Misc 等方向。')
+
+
+class TestDatabase:
+    """
+    在临时测试库中运行基准测试，结束后自动销毁。
+    shared=True 时 SQLite 测试库使用临时文件而不是内存库，供多个工作进程共同访问。
+    """
+
+    def __init__(self, shared=False):
+        self.shared = shared
+
+    def __enter__(self):
+        setup_test_environment()
+        if self.shared and connection.vendor == 'sqlite':
+            test_settings = connection.settings_dict.setdefault('TEST', {})
+            test_settings['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        self.old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection.creation.destroy_test_db(self.old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def competition_name(rng, n):
+    return f'{rng.choice(PREFIXES)}{rng.choice(TOPICS)}{rng.choice(SUFFIXES)}-{n}'
+
+
+def make_competitions(count, seed=42, batch_size=2000):
+    """批量生成 count 条合成竞赛数据"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    batch = []
+    for n in range(count):
+        reg_start = now + timedelta(days=rng.randint(-180, 180), minutes=rng.randint(0, 1440))
+        reg_end = reg_start + timedelta(days=rng.randint(3, 40))
+        comp_start = reg_end + timedelta(days=rng.randint(1, 20))
+        batch.append(Competition(
+            name=competition_name(rng, n),
+            link=f'https://example.com/competitions/{n}',
+            type=rng.choice(TYPES),
+            reg_time_start=reg_start,
+            reg_time_end=reg_end,
+            comp_time_start=comp_start,
+            comp_time_end=comp_start + timedelta(days=rng.randint(1, 3)),
+            description=f'{rng.choice(TOPICS)}方向。{FILLER}',
+            status=rng.randint(0, 4),
+        ))
+        if len(batch) >= batch_size:
+            Competition.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Competition.objects.bulk_create(batch)
+
+
+def measure(func, repeat=50):
+    """执行 func repeat 次，返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': percentile(samples, 50),
+        'p99': percentile(samples, 99),
+    }
+
+
+def print_table(title, headers, rows):
+    print(f'\n{title}')
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in rows:
+        print('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def fmt_ms(value):
+    return f'{value:.3f}ms'
@@ -71,8 +71,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.query_budget.RepeatedQueryMiddleware',  # N+1 查询检测，DETECT_REPEATED_QUERIES 为 True 时启用
 ]
 
+# 开发时检测同一请求中反复执行的同形状查询（N+1），在日志中输出 SQL 和调用位置
+DETECT_REPEATED_QUERIES = False
+REPEATED_QUERY_THRESHOLD = 3
+
 CORS_ALLOW_ALL_ORIGINS = True  # 仅在开发环境使用
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -109,6 +114,42 @@ DATABASES = {
 
 CORS_ALLOW_CREDENTIALS = True
 
+# 缓存
+# 竞赛目录的变更日志（apps/competitions/changes.py）依赖缓存在进程间共享，
+# 多进程部署时请改用 Redis：
+# 'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+# 'LOCATION': 'redis://localhost:6379/1',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'competition-platform',
+    }
+}
+
+# 竞赛数据源（import_competitions.py），靠前的数据源在竞赛重复时优先；
+# adapter 为 apps/competitions/ingestion.py 中注册的适配器名称，timeout 为单次抓取总时限（秒）
+COMPETITION_FEEDS = [
+    {
+        'name': 'hello-ctftime-cn',
+        'url': 'https://gitee.com/Probius/Hello-CTFtime/raw/main/CN.json',
+        'adapter': 'hello_ctftime',
+        'timeout': 30,
+        'retries': 2,
+    },
+]
+
+# 竞赛目录快照文件（apps/competitions/snapshot.py），所有工作进程只读映射同一个文件；
+# 设为 None 时不生成快照，列表和详情接口直接查库
+CATALOG_SNAPSHOT_PATH = os.path.join(BASE_DIR, 'var', 'catalog.snap')
+
+# 热点接口缓存（utils/swr_cache.py），单位为秒：
+# SOFT_TTL 内直接命中；之后到 HARD_TTL 前返回旧值，同时只有一个进程重新计算；
+# LOCK_TIMEOUT 为重新计算的锁超时时间。竞赛目录有写入时条目立即视为过期。
+SWR_CACHES = {
+    'catalog': {'SOFT_TTL': 300, 'HARD_TTL': 3600, 'LOCK_TIMEOUT': 10},
+    'teacher_search': {'SOFT_TTL': 60, 'HARD_TTL': 600, 'LOCK_TIMEOUT': 5},
+}
+
 # 密码验证
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,252 @@
+# utils/compiled_serializer.py
+"""
+只读场景下的 “编译” 序列化器。
+
+DRF 的 ModelSerializer 每次实例化都会重新检查模型字段、构建并深拷贝字段实例，
+嵌套的序列化器也一样；逐行输出时每个字段还要经过 get_attribute 的通用查找。
+compile_serializer(SerializerClass) 只在第一次使用时实例化一次序列化器，
+把可读字段整理成 (字段名, 取值函数, 转换函数) 的列表并缓存，之后输出只执行这些函数：
+
+    compile_serializer(CompetitionSerializer)(competitions, many=True).data
+
+输出与原序列化器相同。依赖 context 的字段只支持 FileField（request 用于生成绝对地址）
+和 SerializerMethodField；其余字段按不依赖 context 处理。
+重写了 to_representation 的序列化器不做编译，直接使用原序列化器。
+"""
+import threading
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PKOnlyObject, RelatedField
+from rest_framework.settings import api_settings
+
+# 输出值就是 str(value) / int(value) 的字段类型（只按精确类型匹配，子类可能重写了输出）
+_STR_FIELDS = (drf_fields.CharField, drf_fields.EmailField, drf_fields.URLField, drf_fields.SlugField)
+_INT_FIELDS = (drf_fields.IntegerField,)
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+class _Context:
+    """一次输出共用的上下文：原始 context、按当前时区绑定的时间格式化、方法字段使用的序列化器外壳"""
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context.get('request')
+        self._datetime = None
+        self._shells = {}
+
+    def datetime(self, value):
+        if self._datetime is None:
+            # 当前时区每次输出只取一次，不在每个时间字段上重复查找
+            field = serializers.DateTimeField(default_timezone=timezone.get_current_timezone())
+            self._datetime = field.to_representation
+        return self._datetime(value)
+
+    def shell(self, serializer_class):
+        """SerializerMethodField 的方法以它作为 self，只提供 context"""
+        shell = self._shells.get(serializer_class)
+        if shell is None:
+            shell = object.__new__(serializer_class)
+            shell.parent = None
+            shell._context = self.context
+            self._shells[serializer_class] = shell
+        return shell
+
+
+def _overrides_representation(serializer):
+    return type(serializer).to_representation is not serializers.Serializer.to_representation
+
+
+def _model_field(serializer, name):
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        return None
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _getter(serializer, field):
+    """取值函数；可能抛出 SkipField 时第二项为 True"""
+    if field.source == '*':
+        return (lambda instance: instance), False
+    attrs = field.source_attrs
+    model_field = _model_field(serializer, attrs[0]) if len(attrs) == 1 else None
+    if model_field is not None and model_field.concrete and not model_field.is_relation:
+        return attrgetter(attrs[0]), False
+    if (model_field is not None and (model_field.many_to_one or model_field.one_to_one)
+            and not (isinstance(field, RelatedField) and field.use_pk_only_optimization())):
+        name = attrs[0]
+
+        def get_related(instance):
+            # 与 DRF 相同：反向一对一等关联不存在时取值为 None
+            try:
+                return getattr(instance, name)
+            except ObjectDoesNotExist:
+                return None
+        return get_related, False
+
+    get_attribute = field.get_attribute
+
+    def get_generic(instance):
+        value = get_attribute(instance)
+        if isinstance(value, PKOnlyObject) and value.pk is None:
+            return None
+        return value
+    return get_generic, True
+
+
+def _converter(serializer, field):
+    """转换函数 (value, context) -> 输出值"""
+    if isinstance(field, serializers.ListSerializer) and not _overrides_representation(field.child):
+        child = _Plan(field.child)
+
+        def convert_many(value, context):
+            iterable = value.all() if isinstance(value, models.Manager) else value
+            return [child.represent(item, context) for item in iterable]
+        return convert_many
+
+    if isinstance(field, serializers.Serializer) and not _overrides_representation(field):
+        return _Plan(field).represent
+
+    if isinstance(field, serializers.SerializerMethodField):
+        method = getattr(type(serializer), field.method_name)
+        serializer_class = type(serializer)
+        return lambda value, context: method(context.shell(serializer_class), value)
+
+    field_type = type(field)
+    if field_type in _STR_FIELDS:
+        return lambda value, context: str(value)
+    if field_type in _INT_FIELDS:
+        return lambda value, context: int(value)
+
+    if (field_type is drf_fields.DateTimeField and not hasattr(field, 'timezone')
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == api_settings.DATETIME_FORMAT
+            and str(api_settings.DATETIME_FORMAT).lower() == drf_fields.ISO_8601):
+        return lambda value, context: context.datetime(value) if value else None
+
+    if field_type in (drf_fields.FileField, drf_fields.ImageField):
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+        def convert_file(value, context):
+            if not value:
+                return None
+            if not use_url:
+                return value.name
+            try:
+                url = value.url
+            except AttributeError:
+                return None
+            request = context.request
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert_file
+
+    to_representation = field.to_representation
+    return lambda value, context: to_representation(value)
+
+
+class _Plan:
+    """一个序列化器实例的可读字段编译结果"""
+
+    def __init__(self, serializer):
+        self.steps = []
+        for field in serializer._readable_fields:
+            get, skippable = _getter(serializer, field)
+            self.steps.append((field.field_name, get, skippable, _converter(serializer, field)))
+
+    def represent(self, instance, context):
+        result = {}
+        for name, get, skippable, convert in self.steps:
+            if skippable:
+                try:
+                    value = get(instance)
+                except SkipField:
+                    continue
+            else:
+                value = get(instance)
+            result[name] = None if value is None else convert(value, context)
+        return result
+
+
+class _Output:
+    """与序列化器实例一样通过 .data 取得输出"""
+
+    def __init__(self, compiled, instance, many, context):
+        self._compiled = compiled
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        if not hasattr(self, '_data'):
+            self._data = self._compiled.represent(self.instance, self.many, self.context)
+        return self._data
+
+
+class CompiledSerializer:
+    """
+    调用方式与序列化器类相同（只读）：compiled(instance, many=..., context=...).data。
+    字段列表在第一次输出时生成，之后的实例化和输出都不再构建字段。
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+
+    def _get_plan(self):
+        if self._plan is None:
+            prototype = self.serializer_class(context={})
+            self._plan = False if _overrides_representation(prototype) else _Plan(prototype)
+        return self._plan
+
+    def __call__(self, instance=None, many=False, context=None):
+        return _Output(self, instance, many, context)
+
+    def represent(self, instance, many=False, context=None):
+        plan = self._get_plan()
+        context = context or {}
+        if plan is False:
+            return self.serializer_class(instance, many=many, context=context).data
+        shared = _Context(context)
+        if many:
+            iterable = instance.all() if isinstance(instance, models.Manager) else instance
+            return [plan.represent(item, shared) for item in iterable]
+        return plan.represent(instance, shared)
+
+
+def compile_serializer(serializer_class):
+    """返回 serializer_class 的编译结果，每个类只编译一次"""
+    compiled = _compiled.get(serializer_class)
+    if compiled is None:
+        with _compiled_lock:
+            compiled = _compiled.setdefault(serializer_class, CompiledSerializer(serializer_class))
+    return compiled
+
+
+class CompiledReadMixin:
+    """
+    视图混入类：GET 等只读请求的输出使用编译后的序列化器。
+    带 data 的调用（校验、写入）以及浏览器界面生成表单时仍使用原序列化器。
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if (not args or 'data' in kwargs or self.request is None
+                or self.request.method not in SAFE_METHODS):
+            return super().get_serializer(*args, **kwargs)
+        return self.get_read_serializer(*args, **kwargs)
+
+    def get_read_serializer(self, instance=None, many=False, **kwargs):
+        """只输出、不校验的序列化器，写操作返回结果时也可以使用"""
+        return compile_serializer(self.get_serializer_class())(
+            instance, many=many, context=self.get_serializer_context(),
+        )
@@ -0,0 +1,125 @@
+# utils/explain_advisor.py
+"""
+热点查询的执行计划检查。
+
+各应用在 hot_queries 模块中用 @hot_query 登记请求路径上的查询（返回查询集的函数），
+explain_hot_queries 命令对每个查询执行 EXPLAIN，标出全表扫描、额外排序（filesort）
+和临时表，索引被删除或查询形状变化导致不再走索引时可以及时发现：
+
+    @hot_query('applications.teacher_list')
+    def teacher_list():
+        return CompetitionApplication.objects.filter(teacher_id='T0001').order_by('-submission_time', 'id')[:21]
+
+执行计划与数据量、统计信息有关，应在接近生产数据的库上运行；
+确实需要扫描全表的查询（例如整表统计）用 allow 声明可以接受的问题。
+"""
+from django.db import connections, router
+
+FULL_SCAN = 'full_scan'
+FILESORT = 'filesort'
+TEMPORARY = 'temporary'
+
+PROBLEM_LABELS = {
+    FULL_SCAN: '全表扫描',
+    FILESORT: '额外排序',
+    TEMPORARY: '临时表',
+}
+
+_registry = {}
+
+
+def hot_query(name, allow=()):
+    """登记一个热点查询；allow 为可以接受的问题，例如 (FULL_SCAN,)"""
+    def register(factory):
+        _registry[name] = (factory, frozenset(allow))
+        return factory
+    return register
+
+
+def registered_queries():
+    return dict(sorted(_registry.items()))
+
+
+def _sqlite_problems(rows):
+    # EXPLAIN QUERY PLAN 的每行为 (id, parent, notused, detail)
+    for row in rows:
+        detail = row[-1]
+        if detail.startswith('SCAN ') and ' USING ' not in detail:
+            yield FULL_SCAN, detail
+        elif detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail:
+            yield FILESORT, detail
+        elif detail.startswith('USE TEMP B-TREE FOR'):
+            yield TEMPORARY, detail
+
+
+def _mysql_problems(rows, columns):
+    for row in rows:
+        values = dict(zip(columns, row))
+        target = f"{values.get('table')}: type={values.get('type')} key={values.get('key')} {values.get('Extra') or ''}"
+        if values.get('type') == 'ALL':
+            yield FULL_SCAN, target
+        extra = values.get('Extra') or ''
+        if 'Using filesort' in extra:
+            yield FILESORT, target
+        if 'Using temporary' in extra:
+            yield TEMPORARY, target
+
+
+def _postgresql_problems(rows):
+    for (line,) in rows:
+        node = line.strip().lstrip('-> ')
+        if node.startswith('Seq Scan'):
+            yield FULL_SCAN, node
+        elif node.startswith(('Sort', 'Incremental Sort')):
+            yield FILESORT, node
+
+
+def explain(queryset, using=None):
+    """
+    对查询集执行 EXPLAIN，返回 (执行计划的各行, [(问题, 所在行)])。
+    使用数据库自己的 EXPLAIN 输出逐行判断，支持 SQLite、MySQL、PostgreSQL
+    """
+    using = using or router.db_for_read(queryset.model)
+    connection = connections[using]
+    sql, params = queryset.query.sql_with_params()
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+
+    if connection.vendor == 'sqlite':
+        problems = list(_sqlite_problems(rows))
+        lines = [row[-1] for row in rows]
+    elif connection.vendor == 'mysql':
+        problems = list(_mysql_problems(rows, columns))
+        lines = ['\t'.join(str(value) for value in row) for row in rows]
+    elif connection.vendor == 'postgresql':
+        problems = list(_postgresql_problems(rows))
+        lines = [row[0] for row in rows]
+    else:
+        problems = []
+        lines = ['\t'.join(str(value) for value in row) for row in rows]
+    return lines, problems
+
+
+def advise(names=None, using=None):
+    """
+    检查登记的热点查询，返回 {名称: {'plan': 执行计划各行, 'problems': 未被 allow 的问题,
+    'allowed': 已声明可以接受的问题}}；names 为空时检查全部
+    """
+    queries = registered_queries()
+    unknown = set(names or ()) - set(queries)
+    if unknown:
+        raise KeyError(', '.join(sorted(unknown)))
+    report = {}
+    for name, (factory, allow) in queries.items():
+        if names and name not in names:
+            continue
+        plan, problems = explain(factory(), using=using)
+        report[name] = {
+            'plan': plan,
+            'problems': [problem for problem in problems if problem[0] not in allow],
+            'allowed': [problem for problem in problems if problem[0] in allow],
+        }
+    return report
@@ -0,0 +1,150 @@
+# utils/pagination.py
+
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    游标（keyset）分页。
+
+    按 ordering 中的 (排序字段, 主键) 定位下一页，查询条件形如
+    ``(field > v) OR (field = v AND id > last_id)``，代价只与页大小有关；
+    并发插入的新行只会出现在它们应在的位置，不会导致已翻过的页重复或遗漏。
+
+    只有请求中带有 page_size 或 cursor 参数时才分页，
+    不带参数的旧客户端仍然拿到完整列表。
+    """
+    # 形如 ('reg_time_end', 'id') 或 ('-submission_time', 'id')，第二项必须唯一
+    ordering = None
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '无效的游标。'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        rows = list(self.page_queryset(queryset, self.decode_cursor(request)))
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def page_queryset(self, queryset, position=None):
+        """
+        一页的查询：排序、位于游标 position 之后的条件，多取一行用于判断是否还有下一页。
+        热点查询登记（hot_queries）也用它生成与接口相同形状的查询
+        """
+        self.model = queryset.model
+        queryset = queryset.order_by(*self.get_order_by())
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(*position))
+        return queryset[:self.page_size + 1]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        field_name, tie_name = self._field_names()
+        # 页中的行可以是模型实例，也可以是 .values() 得到的字典
+        get = last.get if isinstance(last, dict) else partial(getattr, last)
+        cursor = self.encode_cursor(get(field_name), get(tie_name))
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_order_by(self):
+        (field_name, tie_name), (field_desc, tie_desc) = self._field_names(), self._directions()
+        field = F(field_name).desc(nulls_last=True) if field_desc else F(field_name).asc(nulls_last=True)
+        tie = F(tie_name).desc() if tie_desc else F(tie_name).asc()
+        return [field, tie]
+
+    def get_position_filter(self, value, tie_value):
+        """
+        生成 “位于游标之后” 的条件。空值统一排在最后。
+        """
+        field_name, tie_name = self._field_names()
+        field_desc, tie_desc = self._directions()
+        field_cmp = 'lt' if field_desc else 'gt'
+        tie_cmp = 'lt' if tie_desc else 'gt'
+
+        after_tie = Q(**{f'{tie_name}__{tie_cmp}': tie_value})
+        if value is None:
+            return Q(**{f'{field_name}__isnull': True}) & after_tie
+        return (
+            Q(**{f'{field_name}__{field_cmp}': value})
+            | (Q(**{field_name: value}) & after_tie)
+            | Q(**{f'{field_name}__isnull': True})
+        )
+
+    def encode_cursor(self, value, tie_value):
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        payload = json.dumps([value, tie_value], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        field_name, tie_name = self._field_names()
+        try:
+            value, tie_value = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            field = self.get_cursor_field(field_name)
+            tie_field = self.get_cursor_field(tie_name)
+            value = None if value is None else field.to_python(value)
+            tie_value = tie_field.to_python(tie_value)
+        except (TypeError, ValueError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, tie_value
+
+    def get_cursor_field(self, name):
+        """解析游标中 name 的值使用的字段；按注解排序的子类可以返回不属于模型的字段"""
+        return self.model._meta.get_field(name)
+
+    def _field_names(self):
+        return tuple(name.lstrip('-') for name in self.ordering)
+
+    def _directions(self):
+        return tuple(name.startswith('-') for name in self.ordering)
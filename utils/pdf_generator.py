@@ -16,8 +16,10 @@ logger = logging.getLogger(__name__)
 
 
 class CompetitionProcessPDF:
-    def __init__(self, application):
+    def __init__(self, application, milestones=None):
         self.application = application
+        # 流程各节点的时间，来自申请事件表（events.milestones），不根据 update_time 推断
+        self.milestones = milestones or {}
         self.buffer = BytesIO()
         self.use_basic_font = True  # 添加这个属性
 
@@ -247,11 +249,13 @@ class CompetitionProcessPDF:
             logger.error(f"处理文件时间时出错: {str(e)}")
             return '未知'
 
+    def _get_milestone_date(self, name, default):
+        created = self.milestones.get(name)
+        return created.strftime('%Y-%m-%d') if created else default
+
     def _get_approval_date(self):
         """获取审批时间"""
-        if self.application.update_time and self.application.application_status in ['approved', 'rejected']:
-            return self.application.update_time.strftime('%Y-%m-%d')
-        return '未审批'
+        return self._get_milestone_date('reviewed', '未审批')
 
     def _get_approval_status(self):
         """获取审批状态"""
@@ -266,7 +270,9 @@ class CompetitionProcessPDF:
     def _get_reimbursement_submit_date(self):
         """获取报销提交时间"""
         if hasattr(self.application, 'reimbursement'):
-            return self.application.reimbursement.submit_time.strftime('%Y-%m-%d')
+            return self._get_milestone_date(
+                'reimbursement_submitted', self.application.reimbursement.submit_time.strftime('%Y-%m-%d')
+            )
         return '未提交'
 
     def _get_reimbursement_status(self):
@@ -284,8 +290,7 @@ class CompetitionProcessPDF:
     def _get_reimbursement_review_date(self):
         """获取报销审核时间"""
         if hasattr(self.application, 'reimbursement'):
-            if self.application.reimbursement.status != 'pending':
-                return self.application.reimbursement.update_time.strftime('%Y-%m-%d')
+            return self._get_milestone_date('reimbursement_reviewed', '未审核')
         return '未审核'
 
     def _get_reimbursement_review_status(self):
@@ -302,9 +307,7 @@ class CompetitionProcessPDF:
 
     def _get_process_end_date(self):
         """获取流程结束时间"""
-        if self.application.process_status == 'ended':
-            return self.application.update_time.strftime('%Y-%m-%d')
-        return '未结束'
+        return self._get_milestone_date('ended', '未结束')
 
     def _get_process_status(self):
         """获取流程状态"""
@@ -0,0 +1,156 @@
+# utils/query_budget.py
+
+import logging
+import re
+import traceback
+from collections import defaultdict
+from contextlib import ContextDecorator, ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """
+    SQL 的 “形状”：字面量和 IN 列表替换为占位符，只是参数不同的查询形状相同。
+    同一请求中相同形状的查询反复出现，通常是在循环里逐行查询（N+1）。
+    """
+    shape = _LITERALS.sub('%s', sql)
+    shape = _IN_LISTS.sub('IN (...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+def _project_stack():
+    """调用栈中属于本项目的帧，忽略 Django、DRF 等第三方代码"""
+    root = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(root) and frame.filename != __file__
+        and '/site-packages/' not in frame.filename
+    ]
+
+
+class QueryRecorder:
+    """
+    记录所有数据库连接上执行的 SQL（不依赖 DEBUG）。
+    with_stack=True 时同时记录每条查询在本项目代码中的调用栈，开销较大，只用于排查。
+    """
+
+    def __init__(self, using=None, with_stack=False):
+        self.using = using
+        self.with_stack = with_stack
+        self.queries = []   # [(sql, 调用栈)]
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, _project_stack() if self.with_stack else None))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        aliases = [self.using] if self.using else list(connections)
+        for alias in aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        return False
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold):
+        """返回出现次数不少于 threshold 的查询形状 {形状: [(sql, 调用栈)]}"""
+        groups = defaultdict(list)
+        for sql, stack in self.queries:
+            groups[sql_shape(sql)].append((sql, stack))
+        return {shape: entries for shape, entries in groups.items() if len(entries) >= threshold}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    限制一段代码执行的查询数，超出时抛出 QueryBudgetExceeded 并列出全部 SQL。
+    可作为上下文管理器或装饰器使用：
+
+        with query_budget(3):
+            client.get('/api/competitions/')
+    """
+
+    def __init__(self, limit, using=None):
+        self.limit = limit
+        self.using = using
+        self.recorder = None
+
+    def __enter__(self):
+        self.recorder = QueryRecorder(using=self.using).__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.recorder.__exit__(exc_type, exc_value, tb)
+        if exc_type is None and len(self.recorder) > self.limit:
+            listing = '\n'.join(
+                f'{n}. {sql}' for n, (sql, _) in enumerate(self.recorder.queries, start=1)
+            )
+            raise QueryBudgetExceeded(
+                f'执行了 {len(self.recorder)} 条查询，超出预算 {self.limit} 条：\n{listing}'
+            )
+        return False
+
+
+class QueryBudgetTestMixin:
+    """
+    测试用例混入类：断言列表接口的查询数与数据量无关。
+
+        self.assertConstantQueries(lambda: self.client.get(url), grow=lambda: make_rows(10))
+    """
+
+    def assertConstantQueries(self, request, grow, budget=None):
+        """
+        先执行一次 request 作为基线，调用 grow() 增加数据后再执行一次，
+        两次查询数必须相同，且不超过 budget（给出时）
+        """
+        with QueryRecorder() as baseline:
+            request()
+        if budget is not None:
+            self.assertLessEqual(len(baseline), budget, f'基线执行了 {len(baseline)} 条查询，超出预算 {budget} 条')
+        grow()
+        with query_budget(len(baseline)):
+            request()
+        return len(baseline)
+
+
+class RepeatedQueryMiddleware:
+    """
+    开发时使用的 N+1 查询检测：同一请求中相同形状的查询出现
+    REPEATED_QUERY_THRESHOLD 次以上时，记录警告和首次出现时的调用栈。
+    默认关闭，设置 DETECT_REPEATED_QUERIES = True 后启用。
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DETECT_REPEATED_QUERIES', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'REPEATED_QUERY_THRESHOLD', 3)
+
+    def __call__(self, request):
+        with QueryRecorder(with_stack=True) as recorder:
+            response = self.get_response(request)
+        for shape, entries in recorder.repeated(self.threshold).items():
+            stack = ''.join(traceback.format_list(entries[0][1]))
+            logger.warning(
+                f"{request.method} {request.path} 中同一形状的查询执行了 {len(entries)} 次，"
+                f"可能是 N+1 查询：\n{shape}\n首次执行位置：\n{stack}"
+            )
+        return response
@@ -0,0 +1,142 @@
+# utils/swr_cache.py
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# 各缓存的默认参数（秒），可在 settings.SWR_CACHES 中按名称覆盖：
+# SOFT_TTL     新鲜期，期内直接返回缓存值
+# HARD_TTL     缓存条目的实际过期时间，新鲜期之后到此之前返回旧值并由一个进程重新计算
+# LOCK_TIMEOUT 重新计算的锁超时时间，持锁进程异常退出时锁会自动释放
+DEFAULTS = {
+    'SOFT_TTL': 60,
+    'HARD_TTL': 600,
+    'LOCK_TIMEOUT': 10,
+}
+
+# 没有旧值可用、锁又被其他进程持有时，等待对方算好结果的轮询间隔（秒）
+POLL_INTERVAL = 0.05
+
+COUNTERS = ('hit', 'stale', 'miss')
+
+_registry = {}
+
+
+class StaleWhileRevalidateCache:
+    """
+    带旧值兜底和单飞保护的缓存。
+
+    条目保存 (值, 版本, 新鲜截止时间)。新鲜期内且版本一致时直接命中；
+    过期或版本变化后，用 cache.add 抢占该键的锁，抢到的进程重新计算并写回，
+    其余进程继续返回旧值；完全没有缓存时，未抢到锁的进程轮询等待结果，
+    因此同一个键同一时刻只有一个进程在查库。
+
+    命中（hit）、返回旧值（stale）、未命中并计算或等待（miss）的次数
+    记在共享缓存中，多进程部署时为全局计数，见 stats()。
+    """
+
+    def __init__(self, name, soft_ttl=None, hard_ttl=None, lock_timeout=None):
+        self.name = name
+        self._overrides = {
+            'SOFT_TTL': soft_ttl,
+            'HARD_TTL': hard_ttl,
+            'LOCK_TIMEOUT': lock_timeout,
+        }
+        _registry[name] = self
+
+    def option(self, key):
+        value = self._overrides[key]
+        if value is None:
+            configured = getattr(settings, 'SWR_CACHES', {}).get(self.name, {})
+            value = configured.get(key, DEFAULTS[key])
+        return value
+
+    def _entry_key(self, key):
+        digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        return f'swr:{self.name}:{digest}'
+
+    def _stats_key(self, counter):
+        return f'swr:{self.name}:stats:{counter}'
+
+    def _count(self, counter):
+        stats_key = self._stats_key(counter)
+        try:
+            cache.incr(stats_key)
+        except ValueError:
+            if not cache.add(stats_key, 1, None):
+                cache.incr(stats_key)
+
+    def get(self, key, compute, version=None):
+        """
+        返回 key 对应的值，需要时调用 compute() 计算。
+        version 与缓存条目不一致时视为过期；compute() 返回 None 表示结果不可缓存。
+        """
+        entry_key = self._entry_key(key)
+        entry = cache.get(entry_key)
+        if entry is not None:
+            value, entry_version, fresh_until = entry
+            if entry_version == version and time.time() < fresh_until:
+                self._count('hit')
+                return value
+            if not self._acquire(entry_key):
+                # 其他进程正在重新计算，先返回旧值
+                self._count('stale')
+                return value
+            self._count('miss')
+            return self._refresh(entry_key, compute, version)
+
+        self._count('miss')
+        if self._acquire(entry_key):
+            return self._refresh(entry_key, compute, version)
+        return self._wait(entry_key, compute, version)
+
+    def _acquire(self, entry_key):
+        return cache.add(f'{entry_key}:lock', 1, self.option('LOCK_TIMEOUT'))
+
+    def _release(self, entry_key):
+        cache.delete(f'{entry_key}:lock')
+
+    def _refresh(self, entry_key, compute, version):
+        try:
+            value = compute()
+            if value is not None:
+                fresh_until = time.time() + self.option('SOFT_TTL')
+                cache.set(entry_key, (value, version, fresh_until), self.option('HARD_TTL'))
+            return value
+        finally:
+            self._release(entry_key)
+
+    def _wait(self, entry_key, compute, version):
+        deadline = time.monotonic() + self.option('LOCK_TIMEOUT')
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(entry_key)
+            if entry is not None:
+                return entry[0]
+            if self._acquire(entry_key):
+                # 持锁进程的结果不可缓存或已失败，由本进程自己计算
+                return self._refresh(entry_key, compute, version)
+        logger.warning(f"缓存 {self.name} 等待重新计算超时，直接计算")
+        return compute()
+
+    def stats(self):
+        keys = {counter: self._stats_key(counter) for counter in COUNTERS}
+        values = cache.get_many(list(keys.values()))
+        return {counter: values.get(stats_key, 0) for counter, stats_key in keys.items()}
+
+    def reset_stats(self):
+        cache.delete_many([self._stats_key(counter) for counter in COUNTERS])
+
+
+def registered_caches():
+    return dict(_registry)
+
+
+def all_stats():
+    """返回所有已注册缓存的计数 {名称: {'hit': ..., 'stale': ..., 'miss': ...}}"""
+    return {name: swr_cache.stats() for name, swr_cache in sorted(_registry.items())}